@@ -7,4 +7,13 @@ class Settings:
     WRITER_API_URL: str = os.getenv("WRITER_API_URL", "")
     WRITER_API_KEY: str = os.getenv("WRITER_API_KEY", "")
 
+    # Document sections sent to Writer (see common/document.py); "all" sends the whole paper
+    TEXT_PARTS: str = os.getenv("AI_TEXT_PARTS", "abstract,body")
+
+    PREFETCH_COUNT: int = int(os.getenv("PREFETCH_COUNT", "10"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", os.getenv("PREFETCH_COUNT", "10")))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    # Prometheus /metrics served from a background thread; 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
+
 settings = Settings()
@@ -3,21 +3,27 @@ import logging
 
 from app.config import settings
 from app.service import AiAnalyzerService
+from common.document import parse_kinds
+from common.metrics import start_metrics_server
+from common.tracing import setup_tracing
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    start_metrics_server(settings.METRICS_PORT)
+    setup_tracing("ai-analyzer")
 
     service = AiAnalyzerService(
         rabbitmq_url=settings.RABBITMQ_URL,
         redis_url=settings.REDIS_URL,
         writer_api_key=settings.WRITER_API_KEY,
-        writer_api_url=settings.WRITER_API_URL
+        writer_api_url=settings.WRITER_API_URL,
+        text_parts=parse_kinds(settings.TEXT_PARTS),
     )
 
     loop = asyncio.get_event_loop()
     try:
         loop.run_until_complete(service.start())
-        loop.run_forever()
+        loop.run_until_complete(service.consumer.run_until_stopped())
     except KeyboardInterrupt:
         logging.info("AiAnalyzerService is stopping (KeyboardInterrupt).")
     finally:
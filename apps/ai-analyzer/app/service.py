@@ -1,12 +1,15 @@
-import json
 import logging
 import asyncio
+import time
 import httpx
 
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
+from common.document import BODY_KINDS, select_text
 from common.job_store import JobStore
-from common.messaging import RabbitConsumer
+from common.messaging import RabbitConsumer, PoisonMessage
+from common.metrics import UPSTREAM_SECONDS, timed
+from common.rate_limit import RateLimiter
 from app.config import settings
 
 logger = logging.getLogger("ai_analyzer.service")
@@ -20,12 +23,21 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 class AiAnalyzerService:
-    def __init__(self, rabbitmq_url: str, redis_url: str, writer_api_key: str, writer_api_url: str):
-        self.consumer = RabbitConsumer(rabbitmq_url)
+    def __init__(
+        self,
+        rabbitmq_url: str,
+        redis_url: str,
+        writer_api_key: str,
+        writer_api_url: str,
+        text_parts: Tuple[str, ...] = BODY_KINDS,
+    ):
         self.job_store = JobStore(redis_url)
+        self.consumer = RabbitConsumer(rabbitmq_url, job_store=self.job_store)
+        self.rate_limiter = RateLimiter(redis_url)
 
         self.writer_api_key = writer_api_key
         self.writer_api_url = writer_api_url
+        self.text_parts = text_parts
 
     async def start(self) -> None:
         logger.info("AiAnalyzerService is starting...")
@@ -33,99 +45,104 @@ class AiAnalyzerService:
         await self.consumer.consume(
             queue_name="ai-detection-requests",
             on_message=self.handle_message,
-            prefetch_count=1
+            prefetch_count=settings.PREFETCH_COUNT,
+            concurrency=settings.CONCURRENCY,
+            max_retries=settings.MAX_RETRIES,
+            on_give_up=self.handle_give_up
         )
         logger.info("AiAnalyzerService is now listening to 'ai-detection-requests' queue.")
 
     async def handle_message(self, payload: Dict[str, Any]) -> None:
-        try:
-            job_id = payload.get("job_id")
-            if not job_id:
-                logger.error("Payload does not contain 'job_id': %r", payload)
-                return
+        job_id = payload.get("job_id")
+        index = payload.get("index")
+        if not job_id or index is None:
+            raise PoisonMessage(f"Payload does not contain 'job_id'/'index': {payload!r}")
 
-            logger.info("New job received, job_id=%s", job_id)
-            now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
-            await self.job_store.set_field(job_id, "ai_analyzer_start_time", now_str)
+        now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
+        if await self.job_store.set_field_if_missing(job_id, "ai_analyzer_start_time", now_str):
             await self.job_store.set_field(job_id, "ai_analyze_status", "AI analyzer started.")
-            await self.process_job(job_id)
+        # Transient Writer API errors propagate so the consumer retries with backoff
+        await self.process_article(job_id, index)
+        await self.complete_article(job_id, index)
+
+    async def handle_give_up(self, payload: Dict[str, Any]) -> None:
+        job_id = payload.get("job_id")
+        index = payload.get("index")
+        logger.error("Giving up on AI analysis (job_id=%s, article_index=%s)", job_id, index)
+        await self.complete_article(job_id, index)
+
+    async def complete_article(self, job_id: str, index: int) -> None:
+        if await self.job_store.mark_article_done(job_id, "ai_analyzer", index):
             now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
             await self.job_store.set_field(job_id, "ai_analyzer_end_time", now_str)
             await self.job_store.set_field(job_id, "ai_analyze_status", "AI analyzer finished successfully.")
-            # Deneme için koydun, sonradan yorum satırına al.
-            await self.job_store.set_field(job_id, "plagiarism_check_status", "Plagiarism checker finished successfully.")
             logger.info("Job %s processed successfully.", job_id)
 
-        except Exception as exc:
-            logger.exception("Error while processing job (job_id=%s): %s", payload.get("job_id"), exc)
-            await self.job_store.set_field(job_id, "ai_analyze_status", "AI analyzer error.")
+            if await self.job_store.finish_branch(job_id, "ai_analyzer"):
+                await self.job_store.set_field(job_id, "analysis_status", "Analysis completed.")
+                logger.info("All analysis branches finished for job %s.", job_id)
 
-    async def process_job(self, job_id: str) -> None:
-        raw_job_data = await self.job_store.get_field(job_id, "job_data")
-        if raw_job_data is None:
-            logger.error("'job:%s:job_data' not found in Redis!", job_id)
+    async def process_article(self, job_id: str, idx: int) -> None:
+        article = await self.job_store.get_article(job_id, idx)
+        if article is None:
+            logger.error("Article %d of job %s not found in Redis!", idx, job_id)
             return
 
-        try:
-            job_data = json.loads(raw_job_data)
-        except json.JSONDecodeError as e:
-            logger.exception("job_data JSON parse error (job_id=%s): %s", job_id, e)
+        # Body without references/acknowledgements: smaller request, fewer false signals
+        text = select_text(article, self.text_parts)
+        if text is None or (isinstance(text, str) and text.strip() == ""):
+            logger.debug("Article %d has empty/null 'text', skipping.", idx)
             return
 
-        results = job_data.get("results", [])
-        if not isinstance(results, list):
-            logger.error("'results' in job_data is not a list! (job_id=%s)", job_id)
-            return
+        payload = {"input": text}
+        headers = {
+            "Authorization": f"Bearer {self.writer_api_key}",
+            "Content-Type": "application/json"
+        }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for idx, article in enumerate(results):
-                text = article.get("text")
-                if text is None or (isinstance(text, str) and text.strip() == ""):
-                    logger.debug("Article %d has empty/null 'text', skipping.", idx)
-                    continue
-
-                payload = {"input": text}
-                headers = {
-                    "Authorization": f"Bearer {self.writer_api_key}",
-                    "Content-Type": "application/json"
-                }
-
-                try:
+        t0 = time.perf_counter()
+        try:
+            await self.rate_limiter.acquire("writer")
+            t1 = time.perf_counter()
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                with timed(UPSTREAM_SECONDS, upstream="writer"):
                     response = await client.post(
                         self.writer_api_url,
                         headers=headers,
                         json=payload
                     )
-                    response.raise_for_status()
-                except httpx.HTTPError as exc:
-                    logger.error(
-                        "Writer API request failed (job_id=%s, article_index=%d): %s",
-                        job_id, idx, exc
-                    )
-                    continue
-
-                try:
-                    result_json = response.json()
-                    label = result_json.get("label")
-                    score = result_json.get("score")
-                except Exception as e:
-                    logger.exception(
-                        "Error parsing Writer API response (job_id=%s, article_index=%d): %s",
-                        job_id, idx, e
-                    )
-                    continue
-
-                article["ai_analyzer_label"] = label
-                article["ai_analyzer_score"] = score
-                logger.debug(
-                    "Job %s: added label=%r, score=%r for article %d",
-                    job_id, label, score, idx
-                )
+                await self.rate_limiter.observe("writer", response.status_code, response.headers)
+                response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            code = exc.response.status_code
+            if code >= 500 or code == 429:
+                raise
+            logger.error(
+                "Writer API rejected the request (job_id=%s, article_index=%d): %s",
+                job_id, idx, exc
+            )
+            return
+        await self.job_store.record_timing(
+            job_id, "ai-detection-requests", "detect", index=idx,
+            throttle_ms=(t1 - t0) * 1000, detect_ms=(time.perf_counter() - t1) * 1000
+        )
 
         try:
-            updated_raw = json.dumps(job_data)
-            await self.job_store.set_field(job_id, "job_data", updated_raw)
-            logger.info("Updated job_data written to Redis (job_id=%s).", job_id)
+            result_json = response.json()
+            label = result_json.get("label")
+            score = result_json.get("score")
         except Exception as e:
-            logger.exception("Failed to write update to Redis (job_id=%s): %s", job_id, e)
+            logger.exception(
+                "Error parsing Writer API response (job_id=%s, article_index=%d): %s",
+                job_id, idx, e
+            )
             return
+
+        await self.job_store.set_article_result(job_id, "ai_analyzer", str(idx), {
+            "ai_analyzer_label": label,
+            "ai_analyzer_score": score,
+        })
+        logger.debug(
+            "Job %s: stored label=%r, score=%r for article %d",
+            job_id, label, score, idx
+        )
@@ -13,4 +13,10 @@ class Settings:
     TITLE_SIM_THRESHOLD: float = float(os.getenv("TITLE_SIM_THRESHOLD", "60.0"))
     AUTHOR_SIM_THRESHOLD: float = float(os.getenv("AUTHOR_SIM_THRESHOLD", "75.0"))
 
+    PREFETCH_COUNT: int = int(os.getenv("PREFETCH_COUNT", "10"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", os.getenv("PREFETCH_COUNT", "10")))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    # Prometheus /metrics served from a background thread; 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
+
 settings = Settings()
@@ -1,11 +1,16 @@
 import asyncio
 import logging
 
+from app.config import settings
 from app.service import DoiResolverService
+from common.metrics import start_metrics_server
+from common.tracing import setup_tracing
 
 logging.basicConfig(level=logging.INFO)
 
 if __name__ == "__main__":
+    start_metrics_server(settings.METRICS_PORT)
+    setup_tracing("doi-resolver")
     service = DoiResolverService()
     try:
         asyncio.run(service.start())
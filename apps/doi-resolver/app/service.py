@@ -1,11 +1,13 @@
-import asyncio
 import logging
 import httpx
 from datetime import datetime
 from rapidfuzz import fuzz
 
-from common.messaging import RabbitConsumer, RabbitPublisher
+from common.messaging import RabbitConsumer, RabbitPublisher, PoisonMessage
 from common.job_store   import JobStore
+from common.lanes       import lane_priority
+from common.rate_limit  import RateLimiter
+from common.resilience  import CircuitOpen, upstream
 from app.config         import settings
 
 DOI_RESOLVE_QUEUE  = "doi-resolve-requests"
@@ -15,29 +17,43 @@ logger = logging.getLogger("doi-resolver")
 
 class DoiResolverService:
     def __init__(self):
-        self.consumer  = RabbitConsumer(settings.RABBITMQ_URL)
-        self.publisher = RabbitPublisher(settings.RABBITMQ_URL)
         self.job_store     = JobStore(settings.REDIS_URL)
+        self.consumer  = RabbitConsumer(settings.RABBITMQ_URL, job_store=self.job_store)
+        self.publisher = RabbitPublisher(settings.RABBITMQ_URL)
+        self.rate_limiter  = RateLimiter(settings.REDIS_URL)
+
+    async def _get(self, name: str, url: str, params: dict, timeout: float) -> httpx.Response:
+        """Rate-limited GET through the upstream's circuit breaker (hedged if enabled)."""
+        async def send():
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                return await client.get(url, params=params)
+
+        resp = await upstream(name).call(send, acquire=lambda: self.rate_limiter.acquire(name))
+        await self.rate_limiter.observe(name, resp.status_code, resp.headers)
+        return resp
 
     def normalize(self, text: str) -> str:
         return "".join(c.lower() for c in text if c.isalnum() or c.isspace()).strip()
 
-    async def resolve_doi_for_article(self, job_id: str, title: str, author: str) -> tuple[str|None, bool]:
+    async def resolve_doi_for_article(self, job_id: str, title: str, author: str) -> tuple[dict|None, bool]:
         params = {
             "query.bibliographic": title,
             "query.author":       author,
             "rows":               5,
             "mailto":             settings.CROSSREF_MAILTO
         }
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(settings.CROSSREF_API_URL, params=params)
-            resp.raise_for_status()
-            items = resp.json().get("message", {}).get("items", [])
+        resp = await self._get("crossref", settings.CROSSREF_API_URL, params, timeout=10.0)
+        resp.raise_for_status()
+        items = resp.json().get("message", {}).get("items", [])
 
         if not items:
             logger.warning(f"[{job_id}] '{title}' no CrossRef items")
             return None, False
 
+        return self.match_candidates(job_id, title, author, items)
+
+    def match_candidates(self, job_id: str, title: str, author: str, items: list[dict]) -> tuple[dict|None, bool]:
+        """Pick the first Crossref item whose title and one of whose authors are close enough."""
         title_norm = self.normalize(title)
         passed, max_sim = [], 0.0
         for item in items:
@@ -58,9 +74,8 @@ class DoiResolverService:
                 name = f"{a.get('given','')} {a.get('family','')}"
                 best_sim = max(best_sim, fuzz.token_sort_ratio(author_norm, self.normalize(name)))
             if best_sim >= settings.AUTHOR_SIM_THRESHOLD:
-                doi = item.get("DOI")
-                logger.info(f"[{job_id}] '{title}' matched (author sim={best_sim:.1f}%) ⇒ DOI={doi}")
-                return doi, True
+                logger.info(f"[{job_id}] '{title}' matched (author sim={best_sim:.1f}%) ⇒ DOI={item.get('DOI')}")
+                return item, True
 
         logger.info(f"[{job_id}] '{title}' no author sim ≥ {settings.AUTHOR_SIM_THRESHOLD}% (max={best_sim:.1f}%)")
         return None, False
@@ -69,56 +84,99 @@ class DoiResolverService:
         url    = f"{settings.UNPAYWALL_API_URL}/{doi}"
         params = {"email": settings.UNPAYWALL_EMAIL}
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(url, params=params)
-                resp.raise_for_status()
-                return resp.json().get("is_oa", False)
+            resp = await self._get("unpaywall", url, params, timeout=5.0)
+            resp.raise_for_status()
+            return resp.json().get("is_oa", False)
+        except CircuitOpen:
+            # Don't record "closed access" just because Unpaywall is down; retry later
+            raise
         except:
             return False
 
-    async def fetch_citation_count(self, job_id: str, doi: str) -> int|None:
-        url    = f"{settings.CROSSREF_API_URL}/{doi}"
-        params = {"mailto": settings.CROSSREF_MAILTO}
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(url, params=params)
-                resp.raise_for_status()
-                return resp.json().get("message", {}).get("is-referenced-by-count")
-        except:
-            return None
+    def crossref_metadata(self, work: dict) -> dict:
+        """
+        Pick the Crossref work fields later stages need, so text-extractor and
+        plagiarism-checker don't have to request the same record again.
+        """
+        links = work.get("link", [])
+        urls  = [link.get("URL") for link in links if link.get("URL")]
+        pdf_url = next(
+            (link.get("URL") for link in links
+             if link.get("content-type", "").lower() == "application/pdf" and link.get("URL")),
+            None
+        )
+        licenses = [lic.get("URL") for lic in work.get("license", []) if lic.get("URL")]
+        return {
+            "crossref_links":   list(dict.fromkeys(urls)),
+            "crossref_pdf_url": pdf_url,
+            "license":          licenses[0] if licenses else None,
+            "crossref_citations": work.get("is-referenced-by-count"),
+        }
+
+    async def enrich(self, job_id: str, author: str, rec: dict) -> dict:
+        title = rec.get("title", "")
+        work, verified = await self.resolve_doi_for_article(job_id, title, author)
+        doi = work.get("DOI") if work else None
+        oa = await self.detect_open_access(job_id, doi) if doi else False
+
+        if verified and doi:
+            # The search query has no select=, so each item is the full work
+            # record: no "link" means the work has none, not a trimmed item.
+            meta = self.crossref_metadata(work)
+            if rec.get("citations") is None:
+                rec["citations"] = meta["crossref_citations"]
+            rec.update({
+                "crossref_links":   meta["crossref_links"],
+                "crossref_pdf_url": meta["crossref_pdf_url"],
+                "license":          meta["license"],
+            })
+
+        rec.update({"doi": doi, "verified": verified, "open_access": oa})
+        return rec
 
     async def on_message(self, payload: dict):
         job_id  = payload.get("job_id")
         author  = payload.get("author", "")
-        results = payload.get("results", [])
+        index   = payload.get("index")
+        rec     = payload.get("article", {})
 
         now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
-        await self.job_store.set_field(job_id, "doi_resolver_start_time", now_str)
-        await self.job_store.set_field(job_id, "state", "DOIs resolving.")
-        enriched = []
+        if await self.job_store.set_field_if_missing(job_id, "doi_resolver_start_time", now_str):
+            await self.job_store.set_field(job_id, "state", "DOIs resolving.")
 
+        # Transient Crossref/network errors propagate so the consumer retries with backoff
         try:
-            for rec in results:
-                title = rec.get("title", "")
-                doi, verified = await self.resolve_doi_for_article(job_id, title, author)
-                oa = await self.detect_open_access(job_id, doi) if doi else False
-
-                if verified and rec.get("citations") is None and doi:
-                    rec["citations"] = await self.fetch_citation_count(job_id, doi)
-
-                rec.update({"doi": doi, "verified": verified, "open_access": oa})
-                enriched.append(rec)
-
-            await self.publisher.publish(TEXT_EXTRACT_QUEUE, {
-                "job_id": job_id, "author": author, "results": enriched
-            })
-
+            rec = await self.enrich(job_id, author, rec)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code < 500 and e.response.status_code != 429:
+                raise PoisonMessage(f"Crossref rejected the query: {e}") from e
+            raise
+        await self.forward(job_id, author, index, rec, payload.get("lane"))
+
+    async def on_give_up(self, payload: dict):
+        # Out of retries: pass the article on unresolved so the job can still finish
+        job_id = payload.get("job_id")
+        index  = payload.get("index")
+        logger.error(f"[{job_id}] DOI resolution failed for article {index}, forwarding unresolved")
+        rec = payload.get("article", {})
+        rec.update({"doi": None, "verified": False, "open_access": False})
+        await self.forward(job_id, payload.get("author", ""), index, rec, payload.get("lane"))
+
+    async def forward(self, job_id: str, author: str, index: int, rec: dict, lane: str | None = None):
+        # The job's lane rides along so every later stage keeps its priority
+        await self.publisher.publish(TEXT_EXTRACT_QUEUE, {
+            "job_id": job_id, "author": author, "index": index, "lane": lane, "article": rec
+        }, priority=lane_priority(lane))
+
+        if await self.job_store.mark_article_done(job_id, "doi_resolver", index):
             now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
             await self.job_store.set_field(job_id, "doi_resolver_end_time", now_str)
             await self.job_store.set_field(job_id, "state", "DOIs resolved.")
-        except Exception:
-            await self.job_store.set_field(job_id, "state", "DOI resolver error.")
 
     async def start(self):
-        await self.consumer.consume(DOI_RESOLVE_QUEUE, self.on_message, prefetch_count=1)
-        await asyncio.Event().wait()
\ No newline at end of file
+        await self.consumer.consume(
+            DOI_RESOLVE_QUEUE, self.on_message,
+            prefetch_count=settings.PREFETCH_COUNT, concurrency=settings.CONCURRENCY,
+            max_retries=settings.MAX_RETRIES, on_give_up=self.on_give_up
+        )
+        await self.consumer.run_until_stopped()
\ No newline at end of file
@@ -3,5 +3,10 @@ import os
 class Settings:
     RABBITMQ_URL: str = os.getenv("RABBITMQ_URL", "")
     REDIS_URL: str = os.getenv("REDIS_URL", "")
+    PUBLISHER_POOL_SIZE: int = int(os.getenv("PUBLISHER_POOL_SIZE", "8"))
+
+    # Bulk scans are released while scrape_requests holds fewer than this many messages
+    BULK_QUEUE_TARGET: int = int(os.getenv("BULK_QUEUE_TARGET", "4"))
+    BULK_DISPATCH_INTERVAL: float = float(os.getenv("BULK_DISPATCH_INTERVAL", "1.0"))
 
 settings = Settings()
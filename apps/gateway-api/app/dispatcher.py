@@ -0,0 +1,46 @@
+import asyncio
+
+from common.lanes import LaneScheduler, BULK, LANE_PRIORITIES, now_ms
+from common.messaging import RabbitPublisher
+from common.job_store import JobStore
+from app.config import settings
+from app.logger import logger
+from app.routers.scan import SCRAPE_QUEUE
+
+
+async def dispatch_bulk(publisher: RabbitPublisher, scheduler: LaneScheduler, job_store: JobStore):
+    """
+    Release bulk scans to the broker one tenant at a time, and only while
+    the scrape queue is shallow. The deep backlog stays in the fair-share
+    queues, where an interactive scan or a new tenant can't get stuck behind it.
+    """
+    while True:
+        try:
+            if await publisher.queue_depth(SCRAPE_QUEUE) >= settings.BULK_QUEUE_TARGET:
+                await asyncio.sleep(settings.BULK_DISPATCH_INTERVAL)
+                continue
+
+            item = await scheduler.next_bulk()
+            if item is None:
+                await asyncio.sleep(settings.BULK_DISPATCH_INTERVAL)
+                continue
+
+            tenant, payload = item
+            try:
+                await publisher.publish(SCRAPE_QUEUE, payload, priority=LANE_PRIORITIES[BULK])
+            except Exception:
+                # Put it back at the tenant's tail rather than losing it
+                await scheduler.enqueue_bulk(tenant, payload)
+                raise
+            await job_store.set_field(payload["job_id"], "state", "Dispatched.")
+            if payload.get("enqueued_at"):
+                await job_store.record_timing(
+                    payload["job_id"], "gateway", "dispatched", wait_ms=now_ms() - payload["enqueued_at"]
+                )
+            logger.info(f"Dispatched bulk job {payload['job_id']} for tenant '{tenant}'")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Bulk dispatcher error: {e}")
+            await asyncio.sleep(settings.BULK_DISPATCH_INTERVAL)
@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
 from app.routers.scan import router as scan_router
 from app.routers.status import router as status_router
 from common.messaging import RabbitPublisher
 from common.job_store import JobStore
+from common.lanes import LaneScheduler
+from common import metrics
+from common.tracing import setup_tracing
+from app.dispatcher import dispatch_bulk
 from app.config import settings
 from app.logger import logger
 
@@ -18,19 +23,30 @@ app.include_router(status_router, prefix="/api", tags=["status"])
 @app.on_event("startup")
 async def startup_event():
     logger.info("Gateway API starting up...")
-    app.state.rabbitPublisher = RabbitPublisher(settings.RABBITMQ_URL)
+    setup_tracing("gateway-api")
+    app.state.rabbitPublisher = RabbitPublisher(settings.RABBITMQ_URL, pool_size=settings.PUBLISHER_POOL_SIZE)
     app.state.job_store = JobStore(settings.REDIS_URL)
+    app.state.lane_scheduler = LaneScheduler(settings.REDIS_URL)
     await app.state.rabbitPublisher.connect()
     logger.info("RabbitPublisher connected")
+    app.state.dispatcher = asyncio.create_task(
+        dispatch_bulk(app.state.rabbitPublisher, app.state.lane_scheduler, app.state.job_store)
+    )
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Gateway API shutting down...")
+    app.state.dispatcher.cancel()
     try:
-        await app.state.rabbitPublisher._conn.close()
+        await app.state.rabbitPublisher.close()
     except Exception:
         pass
 
 @app.get("/healthz")
 async def healthz():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
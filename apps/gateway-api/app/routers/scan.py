@@ -1,22 +1,69 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Header, Query
 from uuid import uuid4
 from datetime import datetime
-from common.models import ScrapeRequest, JobResponse
+from common.models import ScrapeRequest, JobResponse, BatchScanRequest, BatchJobResponse
+from common.lanes import INTERACTIVE, BULK, LANE_PRIORITIES, now_ms
 from app.logger import logger
 
 router = APIRouter()
 
+SCRAPE_QUEUE = "scrape_requests"
+
 @router.post("/scan", response_model=JobResponse)
-async def scan(request: Request, author: str):
+async def scan(
+    request: Request,
+    author: str,
+    lane: str = Query(INTERACTIVE, pattern=f"^({INTERACTIVE}|{BULK})$"),
+    tenant: str = Header("anonymous", alias="X-Tenant")
+):
     job_id = uuid4().hex
     now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
     await request.app.state.job_store.set_field(job_id, "job_start_time", now_str)
-    payload = ScrapeRequest(job_id=job_id, author=author).dict()
+    payload = ScrapeRequest(
+        job_id=job_id, author=author, lane=lane, tenant=tenant, enqueued_at=now_ms()
+    ).dict()
+    await request.app.state.job_store.record_timing(job_id, "gateway", "submitted", ts=payload["enqueued_at"], outcome=lane)
     try:
-        # app.state.rabbitPublisher üzerinden publish işlemi
-        await request.app.state.rabbitPublisher.publish("scrape_requests", payload)
-        logger.info(f"Published scrape job {job_id} for author '{author}'")
+        if lane == BULK:
+            # Bulk work waits in the gateway's fair-share queue until the dispatcher releases it
+            await request.app.state.lane_scheduler.enqueue_bulk(tenant, payload)
+            await request.app.state.job_store.set_field(job_id, "state", "Queued.")
+            logger.info(f"Queued bulk scrape job {job_id} for tenant '{tenant}'")
+        else:
+            # app.state.rabbitPublisher üzerinden publish işlemi
+            await request.app.state.rabbitPublisher.publish(
+                SCRAPE_QUEUE, payload, priority=LANE_PRIORITIES[INTERACTIVE]
+            )
+            logger.info(f"Published scrape job {job_id} for author '{author}'")
         return JobResponse(job_id=job_id)
     except Exception as e:
         logger.error(f"Failed to publish message: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/scan/batch", response_model=BatchJobResponse)
+async def scan_batch(
+    request: Request,
+    body: BatchScanRequest,
+    tenant: str = Header("anonymous", alias="X-Tenant")
+):
+    """Roster scans always go to the bulk lane."""
+    job_ids = []
+    now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
+    try:
+        for author in body.authors:
+            job_id = uuid4().hex
+            await request.app.state.job_store.set_field(job_id, "job_start_time", now_str)
+            await request.app.state.job_store.set_field(job_id, "state", "Queued.")
+            payload = ScrapeRequest(
+                job_id=job_id, author=author, lane=BULK, tenant=tenant, enqueued_at=now_ms()
+            ).dict()
+            await request.app.state.job_store.record_timing(
+                job_id, "gateway", "submitted", ts=payload["enqueued_at"], outcome=BULK
+            )
+            await request.app.state.lane_scheduler.enqueue_bulk(tenant, payload)
+            job_ids.append(job_id)
+        logger.info(f"Queued {len(job_ids)} bulk scrape jobs for tenant '{tenant}'")
+        return BatchJobResponse(job_ids=job_ids)
+    except Exception as e:
+        logger.error(f"Failed to queue batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,13 +1,18 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 import json
+from typing import Any, Dict, List
 
 from common.models import (
     StatusResponse,
     AIAnalyzeStatusResponse,
     PlagiarismCheckStatusResponse,
     JobDataResponse,
+    LaneStatsResponse,
+    TimelineResponse,
+    TimingStatsResponse,
 )
 from common.job_store import JobStore
+from common.lanes import INTERACTIVE, BULK
 from app.config import settings
 
 router = APIRouter()
@@ -37,14 +42,86 @@ async def get_plagiarism_check_status(job_id: str):
 
 @router.get("/job_data/{job_id}", response_model=JobDataResponse)
 async def get_job_data(job_id: str):
-    data_str = await job_store.get_field(job_id, "job_data")
     try:
-        data = json.loads(data_str) if data_str else {}
+        data = await job_store.get_job_data(job_id) or {}
     except json.JSONDecodeError:
-        data = {"raw": data_str}
+        data = {"raw": await job_store.get_field(job_id, "job_data")}
 
     if isinstance(data.get("results"), list):
         for article in data["results"]:
             article.pop("text", None)
 
     return JobDataResponse(job_id=job_id, job_data=data)
+
+
+@router.get("/lanes", response_model=LaneStatsResponse)
+async def get_lane_stats(request: Request):
+    scheduler = request.app.state.lane_scheduler
+    pending = await scheduler.pending_bulk()
+    return LaneStatsResponse(
+        broker_depth=await request.app.state.rabbitPublisher.queue_depth("scrape_requests"),
+        lanes={
+            INTERACTIVE: {"queue_wait": await scheduler.wait_stats(INTERACTIVE)},
+            BULK: {
+                "queue_wait": await scheduler.wait_stats(BULK),
+                "pending": sum(pending.values()),
+                "pending_by_tenant": pending,
+            },
+        },
+    )
+
+
+def summarize_timeline(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Waterfall per stage from the timeline stream: first pickup to last
+    finish, plus summed queue wait vs. processing time over its messages.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    ends = []
+    for ev in events:
+        end = ev["ts"] + ev.get("processing_ms", 0)
+        ends.append(end)
+        if ev["event"] != "process":
+            continue
+        st = stages.setdefault(ev["stage"], {
+            "messages": 0, "first_start": ev["ts"], "last_end": end,
+            "queue_wait_ms": 0, "max_queue_wait_ms": 0, "processing_ms": 0, "max_processing_ms": 0,
+            "outcomes": {},
+        })
+        st["messages"] += 1
+        st["first_start"] = min(st["first_start"], ev["ts"])
+        st["last_end"] = max(st["last_end"], end)
+        st["queue_wait_ms"] += ev.get("wait_ms", 0)
+        st["max_queue_wait_ms"] = max(st["max_queue_wait_ms"], ev.get("wait_ms", 0))
+        st["processing_ms"] += ev.get("processing_ms", 0)
+        st["max_processing_ms"] = max(st["max_processing_ms"], ev.get("processing_ms", 0))
+        outcome = ev.get("outcome", "ack")
+        st["outcomes"][outcome] = st["outcomes"].get(outcome, 0) + 1
+
+    for st in stages.values():
+        st["elapsed_ms"] = st["last_end"] - st["first_start"]
+
+    started_at = min(ev["ts"] for ev in events) if events else None
+    finished_at = max(ends) if ends else None
+    return {
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "total_ms": finished_at - started_at if events else None,
+        "queue_wait_ms": sum(st["queue_wait_ms"] for st in stages.values()),
+        "processing_ms": sum(st["processing_ms"] for st in stages.values()),
+        "stages": stages,
+    }
+
+
+@router.get("/timeline/{job_id}", response_model=TimelineResponse)
+async def get_timeline(job_id: str):
+    events = await job_store.get_timeline(job_id)
+    if not events:
+        raise HTTPException(status_code=404, detail="No timeline recorded for this job")
+    return TimelineResponse(job_id=job_id, events=events, **summarize_timeline(events))
+
+
+@router.get("/timings", response_model=TimingStatsResponse)
+async def get_timing_stats():
+    """Percentiles over recent jobs, keyed "<stage>:<event>:<measurement>"."""
+    return TimingStatsResponse(series=await job_store.timing_stats())
@@ -10,4 +10,13 @@ class Settings:
     WINSTON_API_URL: str = os.getenv("WINSTON_API_URL", "")
     WINSTON_API_KEY: str = os.getenv("WINSTON_API_KEY", "")
 
+    # Document sections the Winston snippet is taken from (see common/document.py)
+    TEXT_PARTS: str = os.getenv("PLAGIARISM_TEXT_PARTS", "body")
+
+    PREFETCH_COUNT: int = int(os.getenv("PREFETCH_COUNT", "10"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", os.getenv("PREFETCH_COUNT", "10")))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    # Prometheus /metrics served from a background thread; 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
+
 settings = Settings()
@@ -1,6 +1,9 @@
 import asyncio
 import logging
 
+from common.metrics import start_metrics_server
+from common.tracing import setup_tracing
+from config import settings
 from service import PlagiarismCheckerService
 
 logger = logging.getLogger()
@@ -9,12 +12,13 @@ logging.basicConfig(
 )
 
 async def main():
+    start_metrics_server(settings.METRICS_PORT)
+    setup_tracing("plagiarism-checker")
     service = PlagiarismCheckerService()
     await service.start()
 
     logger.info("PlagiarismCheckerService started. Waiting for messages...")
-    while True:
-        await asyncio.sleep(10)
+    await service.consumer.run_until_stopped()
 
 
 if __name__ == "__main__":
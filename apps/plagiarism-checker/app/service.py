@@ -1,16 +1,23 @@
-import json
 import logging
 import re
+import time
 import aiohttp
 
 from datetime import datetime
+from common.document import parse_kinds, select_text
 from common.job_store import JobStore
-from common.messaging import RabbitConsumer
+from common.messaging import RabbitConsumer, PoisonMessage
+from common.rate_limit import RateLimiter
+from common.resilience import CircuitOpen, upstream
 from config import settings
 
 logger = logging.getLogger("plagiarism-checker.service")
 
 
+class WinstonUnavailable(RuntimeError):
+    """Winston answered 5xx/429; worth retrying later."""
+
+
 class PlagiarismCheckerService:
     def __init__(self):
         self.rabbit_url = settings.RABBITMQ_URL
@@ -21,124 +28,121 @@ class PlagiarismCheckerService:
 
         self.winston_url = settings.WINSTON_API_URL
         self.winston_key = settings.WINSTON_API_KEY
+        self.text_parts = parse_kinds(settings.TEXT_PARTS)
 
         self.job_store = JobStore(self.redis_url)
-        self.consumer = RabbitConsumer(self.rabbit_url)
+        self.consumer = RabbitConsumer(self.rabbit_url, job_store=self.job_store)
+        self.rate_limiter = RateLimiter(self.redis_url)
 
     async def start(self):
         await self.consumer.consume(
             queue_name="plagiarism-detection-requests",
             on_message=self._on_message,
-            prefetch_count=1,
+            prefetch_count=settings.PREFETCH_COUNT,
+            concurrency=settings.CONCURRENCY,
+            max_retries=settings.MAX_RETRIES,
+            on_give_up=self._on_give_up,
         )
         logger.info("PlagiarismCheckerService is now listening on queue 'plagiarism-detection-requests'.")
 
     async def _on_message(self, payload: dict):
         job_id = payload.get("job_id")
-        if not job_id:
-            logger.error("Received message without 'job_id': %r", payload)
-            return
+        index = payload.get("index")
+        if not job_id or index is None:
+            raise PoisonMessage(f"Received message without 'job_id'/'index': {payload!r}")
 
-        try:
-            now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
-            await self.job_store.set_field(job_id, "plagiarism_checker_start_time", now_str)
+        now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
+        if await self.job_store.set_field_if_missing(job_id, "plagiarism_checker_start_time", now_str):
             await self.job_store.set_field(job_id, "plagiarism_check_status", "Plagiarism checker started.")
-            raw_job_initial = await self.job_store.get_field(job_id, "job_data")
-            if not raw_job_initial:
-                logger.error("No job_data found in Redis for job_id=%s", job_id)
-                return
-
-            job_data_initial = json.loads(raw_job_initial)
-            results_initial = job_data_initial.get("results", [])
-            if not isinstance(results_initial, list):
-                logger.error("Invalid 'results' format for job_id=%s: %r", job_id, results_initial)
-                return
-
-            updated_results = []
-            for article in results_initial:
-                new_article = article.copy()
-
-                text = new_article.get("text")
-                if not text:
-                    new_article["plagiarism_checker_results"] = None
-                    updated_results.append(new_article)
-                    continue
-
-                doi = new_article.get("doi")
-                if not doi:
-                    new_article["plagiarism_checker_results"] = None
-                    updated_results.append(new_article)
-                    continue
-
-                crossref_links = await self._fetch_crossref_links(doi)
-                if not crossref_links:
-                    logger.warning("No Crossref links found for DOI=%s; proceeding with empty excluded_sources.", doi)
-
-                snippet = self._extract_snippet(text, word_count=30)
-                if not snippet:
-                    logger.warning("Could not extract a valid snippet for article DOI=%s; skipping Winston call.", doi)
-                    new_article["plagiarism_checker_results"] = None
-                    updated_results.append(new_article)
-                    continue
-
-                try:
-                    winston_result = await self._call_winston(snippet, excluded_sources=crossref_links)
-                    new_article["plagiarism_checker_results"] = winston_result
-                except Exception as e:
-                    logger.exception("Error while calling Winston API for DOI=%s: %s", doi, e)
-                    new_article["plagiarism_checker_results"] = None
-
-                updated_results.append(new_article)
-
-            raw_job_latest = await self.job_store.get_field(job_id, "job_data")
-            if not raw_job_latest:
-                logger.error("No job_data found in Redis when trying to merge for job_id=%s", job_id)
-                return
-
-            job_data_latest = json.loads(raw_job_latest)
-            results_latest = job_data_latest.get("results", [])
-            if not isinstance(results_latest, list):
-                logger.error("Invalid 'results' format on latest fetch for job_id=%s: %r", job_id, results_latest)
-                return
-
-            merged_results = []
-            for idx, article_latest in enumerate(results_latest):
-                merged = article_latest.copy()
-
-                if idx < len(updated_results):
-                    merged["plagiarism_checker_results"] = updated_results[idx].get("plagiarism_checker_results")
-                else:
-                    merged["plagiarism_checker_results"] = None
-
-                merged_results.append(merged)
-
-            job_data_latest["results"] = merged_results
+
+        article = await self.job_store.get_article(job_id, index)
+        if article is None:
+            raise PoisonMessage(f"Article {index} not found in Redis for job_id={job_id}")
+
+        # Transient Winston/network errors propagate so the consumer retries with backoff
+        t0 = time.perf_counter()
+        result = await self._check_article(article)
+        await self.job_store.record_timing(
+            job_id, "plagiarism-detection-requests", "detect", index=index,
+            outcome="checked" if result else "skipped", detect_ms=(time.perf_counter() - t0) * 1000
+        )
+        await self.job_store.set_article_result(
+            job_id, "plagiarism_checker", str(index), {"plagiarism_checker_results": result}
+        )
+        await self._complete_article(job_id, index)
+
+    async def _on_give_up(self, payload: dict):
+        job_id = payload.get("job_id")
+        index = payload.get("index")
+        if not job_id or index is None:
+            return
+        logger.error("Giving up on plagiarism check for job_id=%s article=%s", job_id, index)
+        await self._complete_article(job_id, index)
+
+    async def _complete_article(self, job_id: str, index: int):
+        if await self.job_store.mark_article_done(job_id, "plagiarism_checker", index):
             now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
             await self.job_store.set_field(job_id, "plagiarism_checker_end_time", now_str)
             await self.job_store.set_field(job_id, "plagiarism_check_status", "Plagiarism checker finished successfully.")
-            await self.job_store.set_field(job_id, "job_data", json.dumps(job_data_latest))
-            logger.info("Merged and updated job_data in Redis for job_id=%s", job_id)
+            logger.info("Stored plagiarism results in Redis for job_id=%s", job_id)
+
+            if await self.job_store.finish_branch(job_id, "plagiarism_checker"):
+                await self.job_store.set_field(job_id, "analysis_status", "Analysis completed.")
+                logger.info("All analysis branches finished for job_id=%s", job_id)
+
+    async def _check_article(self, article: dict) -> dict | None:
+        # Snippet from the body, never from the reference list (which always "matches")
+        text = select_text(article, self.text_parts)
+        if not text:
+            return None
+
+        doi = article.get("doi")
+        if not doi:
+            return None
+
+        crossref_links = article.get("crossref_links")
+        if crossref_links is None:
+            # Older jobs / unverified matches: doi-resolver didn't persist the links
+            crossref_links = await self._fetch_crossref_links(doi)
+        if not crossref_links:
+            logger.warning("No Crossref links found for DOI=%s; proceeding with empty excluded_sources.", doi)
+
+        snippet = self._extract_snippet(text, word_count=30)
+        if not snippet:
+            logger.warning("Could not extract a valid snippet for article DOI=%s; skipping Winston call.", doi)
+            return None
 
+        try:
+            return await self._call_winston(snippet, excluded_sources=crossref_links)
+        except (WinstonUnavailable, CircuitOpen, aiohttp.ClientError):
+            raise
         except Exception as e:
-            logger.exception("Failure processing job_id=%s: %s", job_id, e)
+            logger.exception("Error while calling Winston API for DOI=%s: %s", doi, e)
+            return None
 
     async def _fetch_crossref_links(self, doi: str) -> list[str]:
         endpoint = f"{self.crossref_base}/{doi}"
         params = {"mailto": self.crossref_mailto}
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(endpoint, params=params) as resp:
-                if resp.status != 200:
-                    logger.warning("Crossref returned %d for DOI=%s", resp.status, doi)
-                    return []
-
-                data = await resp.json()
-                message = data.get("message", {})
-                links = message.get("link", [])
-                urls = [item.get("URL") for item in links if item.get("URL")]
-                unique_urls = list(dict.fromkeys(urls))
-                logger.debug("Crossref links for DOI=%s: %s", doi, unique_urls)
-                return unique_urls
+        async def send():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(endpoint, params=params) as resp:
+                    await resp.read()
+                    return resp
+
+        resp = await upstream("crossref").call(send, acquire=lambda: self.rate_limiter.acquire("crossref"))
+        await self.rate_limiter.observe("crossref", resp.status, resp.headers)
+        if resp.status != 200:
+            logger.warning("Crossref returned %d for DOI=%s", resp.status, doi)
+            return []
+
+        data = await resp.json()
+        message = data.get("message", {})
+        links = message.get("link", [])
+        urls = [item.get("URL") for item in links if item.get("URL")]
+        unique_urls = list(dict.fromkeys(urls))
+        logger.debug("Crossref links for DOI=%s: %s", doi, unique_urls)
+        return unique_urls
 
     def _extract_snippet(self, text: str, word_count: int = 30) -> str | None:
         cleaned = re.sub(r"\\u[0-9A-Fa-f]{4}", "", text)
@@ -171,9 +175,19 @@ class PlagiarismCheckerService:
             "country": "us",
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.winston_url, json=body, headers=headers) as resp:
-                if resp.status != 200:
-                    raise RuntimeError(f"Winston API döndü: {resp.status} - {await resp.text()}")
-                result = await resp.json()
-                return result
\ No newline at end of file
+        async def send():
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.winston_url, json=body, headers=headers) as resp:
+                    await resp.read()
+                    return resp
+
+        # POST: breaker only, never hedged (a duplicate scan costs credits)
+        await self.rate_limiter.acquire("winston")
+        resp = await upstream("winston").call(send)
+        await self.rate_limiter.observe("winston", resp.status, resp.headers)
+        if resp.status >= 500 or resp.status == 429:
+            raise WinstonUnavailable(f"Winston API döndü: {resp.status} - {await resp.text()}")
+        if resp.status != 200:
+            raise RuntimeError(f"Winston API döndü: {resp.status} - {await resp.text()}")
+        result = await resp.json()
+        return result
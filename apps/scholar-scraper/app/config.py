@@ -7,4 +7,63 @@ class Settings:
     OXY_USERNAME: str = os.getenv("OXY_USERNAME", "")
     OXY_PASSWORD: str = os.getenv("OXY_PASSWORD", "")
 
+    PREFETCH_COUNT: int = int(os.getenv("PREFETCH_COUNT", "1"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", os.getenv("PREFETCH_COUNT", "1")))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "2"))
+    # "auto": adaptive routing over SCRAPER_BACKENDS; a backend name pins that backend
+    # (Oxylabs still the fallback), e.g. "oxylabs" for benchmarks or blocked IPs
+    SCRAPER_SOURCE: str = os.getenv("SCRAPER_SOURCE", "auto")
+    SCRAPER_BACKENDS: str = os.getenv("SCRAPER_BACKENDS", "scholarly,oxylabs,playwright")
+    # Cost per scrape in arbitrary units, and how many seconds of latency one unit is worth
+    SCRAPER_COSTS: str = os.getenv("SCRAPER_COSTS", "scholarly=0,playwright=0.2,oxylabs=1")
+    SCRAPER_COST_WEIGHT_S: float = float(os.getenv("SCRAPER_COST_WEIGHT_S", "30"))
+    # Interactive scans start the two best backends at once
+    SCRAPER_RACE_INTERACTIVE: bool = os.getenv("SCRAPER_RACE_INTERACTIVE", "1") != "0"
+    # Skip a backend for QUARANTINE_S after QUARANTINE_AFTER failures in a row
+    SCRAPER_QUARANTINE_AFTER: int = int(os.getenv("SCRAPER_QUARANTINE_AFTER", "5"))
+    SCRAPER_QUARANTINE_S: int = int(os.getenv("SCRAPER_QUARANTINE_S", "300"))
+
+    # Hand publications to doi-resolver while the scrape runs (0: all at the end), publishing
+    # whenever STREAM_BATCH_SIZE are waiting (1: every page as soon as it arrives)
+    SCRAPE_STREAMING: bool = os.getenv("SCRAPE_STREAMING", "1") != "0"
+    STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "1"))
+    # A stream that fails part-way is resumed after the papers already handed on, up to
+    # STREAM_RESUME_RETRIES times, pausing STREAM_RESUME_BACKOFF_S (doubling) in between
+    STREAM_RESUME_RETRIES: int = int(os.getenv("STREAM_RESUME_RETRIES", "3"))
+    STREAM_RESUME_BACKOFF_S: float = float(os.getenv("STREAM_RESUME_BACKOFF_S", "2"))
+
+    # Oxylabs: "search" (keyword result pages), "profile" (citations?user=, 100 per page)
+    # or "auto" (profile when one is found, search otherwise); search pages fetched at once
+    SCHOLAR_MODE: str = os.getenv("SCHOLAR_MODE", "search")
+    OXYLABS_PAGE_CONCURRENCY: int = int(os.getenv("OXYLABS_PAGE_CONCURRENCY", "3"))
+    # Threads running the blocking scholarly backend
+    SCHOLARLY_THREADS: int = int(os.getenv("SCHOLARLY_THREADS", "4"))
+
+    # Scrape results per author: served as-is for SCRAPE_CACHE_TTL seconds, then for up to
+    # SCRAPE_CACHE_STALE_TTL more while a background re-scrape refreshes them; 0 disables
+    SCRAPE_CACHE_TTL: int = int(os.getenv("SCRAPE_CACHE_TTL", str(24 * 3600)))
+    SCRAPE_CACHE_STALE_TTL: int = int(os.getenv("SCRAPE_CACHE_STALE_TTL", str(30 * 24 * 3600)))
+
+    # Oxylabs geo locations and Decodo proxy ports are picked by recent success rate; a
+    # CAPTCHA cools one down for PROXY_COOLDOWN_S, doubling per CAPTCHA in a row up to the max
+    OXYLABS_GEOS: str = os.getenv("OXYLABS_GEOS", "US,DE,GB,FR,CA")
+    PROXY_HALF_LIFE_S: int = int(os.getenv("PROXY_HALF_LIFE_S", "1800"))
+    PROXY_COOLDOWN_S: int = int(os.getenv("PROXY_COOLDOWN_S", "120"))
+    PROXY_MAX_COOLDOWN_S: int = int(os.getenv("PROXY_MAX_COOLDOWN_S", "3600"))
+
+    # Seconds between requests to one domain through one identity (proxy geo/port or
+    # direct), "*" for any other domain, stretched by up to POLITENESS_JITTER at random
+    POLITENESS_SPACING: str = os.getenv("POLITENESS_SPACING", "scholar.google.com=2,*=1")
+    POLITENESS_JITTER: float = float(os.getenv("POLITENESS_JITTER", "0.5"))
+
+    # Shared headless Chromium (PlaywrightScraper): open pages at once, pages per
+    # context and per browser before they are recycled, resource types not loaded
+    BROWSER_HEADLESS: bool = os.getenv("BROWSER_HEADLESS", "1") != "0"
+    BROWSER_MAX_PAGES: int = int(os.getenv("BROWSER_MAX_PAGES", "4"))
+    BROWSER_CONTEXT_MAX_PAGES: int = int(os.getenv("BROWSER_CONTEXT_MAX_PAGES", "50"))
+    BROWSER_RECYCLE_PAGES: int = int(os.getenv("BROWSER_RECYCLE_PAGES", "500"))
+    BROWSER_BLOCK_RESOURCES: str = os.getenv("BROWSER_BLOCK_RESOURCES", "image,media,font,stylesheet")
+    # Prometheus /metrics served from a background thread; 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
+
 settings = Settings()
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Query
 from app.models import ScholarResponse, Paper
-from app.scraper.fetch_router import fetch_publications
+from app.scraper.fetch_router import fetch_cached
 
 router = APIRouter()
 
 @router.get("/scrape", response_model=ScholarResponse)
 async def scrape_scholar(author: str = Query(..., description="Author name")):
-    publications = await fetch_publications(author)
-    return ScholarResponse(author=author, results=publications)
+    cached = await fetch_cached(author)
+    return ScholarResponse(author=author, results=cached.publications)
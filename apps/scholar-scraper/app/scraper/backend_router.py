@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from common.lanes import now_ms
+from common.metrics import redis_op
+
+logger = logging.getLogger("scholar-scraper.router")
+
+Scrape = Callable[[str], Awaitable[List[dict]]]
+# Same publications, yielded page by page as they arrive, after the first `skip`
+PageStream = Callable[[str, int], AsyncIterator[List[dict]]]
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"scholarly=0,oxylabs=1" → {"scholarly": 0.0, "oxylabs": 1.0}"""
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
+
+
+class BackendHealth:
+    """
+    Recent outcomes per scraper backend, shared by every replica through
+    Redis: the last `window` attempts (newer than `max_age_s`) as
+    "ts_ms,ok,latency_ms" in a capped list, plus a quarantine key with a TTL.
+    """
+
+    def __init__(self, url: str, window: int = 50, max_age_s: int = 3600):
+        self._url = url
+        self._redis = None
+        self.window = window
+        self.max_age_s = max_age_s
+
+    async def _client(self):
+        if not self._redis:
+            self._redis = aioredis.from_url(self._url, encoding="utf-8", decode_responses=True)
+        return self._redis
+
+    @redis_op
+    async def record_attempt(self, backend: str, ok: bool, latency_ms: int):
+        key = f"scraper:health:{backend}"
+        async with (await self._client()).pipeline(transaction=False) as pipe:
+            pipe.lpush(key, f"{now_ms()},{int(ok)},{latency_ms}")
+            pipe.ltrim(key, 0, self.window - 1)
+            pipe.expire(key, self.max_age_s)
+            await pipe.execute()
+
+    @redis_op
+    async def snapshot(self, backends: List[str]) -> Dict[str, Tuple[List[Tuple[bool, int]], bool]]:
+        """backend → ([(ok, latency_ms), ...] newest first, quarantined)"""
+        async with (await self._client()).pipeline(transaction=False) as pipe:
+            for name in backends:
+                pipe.lrange(f"scraper:health:{name}", 0, -1)
+                pipe.exists(f"scraper:quarantine:{name}")
+            raw = await pipe.execute()
+        cutoff = now_ms() - self.max_age_s * 1000
+        out = {}
+        for i, name in enumerate(backends):
+            samples = []
+            for entry in raw[2 * i]:
+                ts, ok, latency = entry.split(",")
+                if int(ts) >= cutoff:
+                    samples.append((ok == "1", int(latency)))
+            out[name] = (samples, bool(raw[2 * i + 1]))
+        return out
+
+    @redis_op
+    async def quarantine(self, backend: str, seconds: int):
+        # Start from a clean slate afterwards, so the backend gets probed again
+        async with (await self._client()).pipeline(transaction=False) as pipe:
+            pipe.set(f"scraper:quarantine:{backend}", "1", ex=seconds)
+            pipe.delete(f"scraper:health:{backend}")
+            await pipe.execute()
+
+
+class BackendRouter:
+    """
+    Picks the scraper backend with the lowest expected cost of one
+    successful scrape:
+
+        (mean latency of successes + cost_weight * cost per call) / success rate
+
+    with an optimistic prior, so a backend without history is tried. A
+    backend whose last `quarantine_after` attempts all failed (CAPTCHA or
+    block storms) is skipped for `quarantine_s`; if every backend is
+    quarantined they are still tried in ranked order. With race=True the
+    two best start together and the first non-empty result wins, unless
+    one of them is in `blocking`: those run on a worker thread that a
+    cancelled task doesn't stop, so the loser would keep scraping.
+
+    Only errors count against a backend. An empty result without one is
+    not recorded, since the author may simply have no publications.
+
+    `stream` is the page-by-page variant for backends listed in `streams`
+    (the others produce one batch); with race=True the two best start
+    together and the first to hand over a batch wins. A stream that fails
+    part-way is resumed on the same backend after what it already
+    produced, up to `resume_retries` times with a doubling pause from
+    `resume_backoff_s`.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, Scrape],
+        health: BackendHealth,
+        costs: Optional[Dict[str, float]] = None,
+        latency_priors_s: Optional[Dict[str, float]] = None,
+        cost_weight_s: float = 30.0,
+        quarantine_after: int = 5,
+        quarantine_s: int = 300,
+        streams: Optional[Dict[str, PageStream]] = None,
+        blocking: Iterable[str] = (),
+        resume_retries: int = 3,
+        resume_backoff_s: float = 2.0,
+    ):
+        self.backends = backends
+        self.streams = streams or {}
+        self.blocking = frozenset(blocking)
+        self.health = health
+        self.costs = costs or {}
+        self.latency_priors_s = latency_priors_s or {}
+        self.cost_weight_s = cost_weight_s
+        self.quarantine_after = quarantine_after
+        self.quarantine_s = quarantine_s
+        self.resume_retries = resume_retries
+        self.resume_backoff_s = resume_backoff_s
+
+    def expected_cost(self, name: str, samples: List[Tuple[bool, int]]) -> float:
+        successes = [latency for ok, latency in samples if ok]
+        success_rate = (len(successes) + 1) / (len(samples) + 1)
+        if successes:
+            latency_s = sum(successes) / len(successes) / 1000
+        else:
+            latency_s = self.latency_priors_s.get(name, 20.0)
+        return (latency_s + self.cost_weight_s * self.costs.get(name, 0.0)) / success_rate
+
+    async def ranked(self) -> List[str]:
+        names = list(self.backends)
+        try:
+            snapshot = await self.health.snapshot(names)
+        except Exception as e:
+            logger.warning("Backend health unavailable, using configured order: %s", e)
+            return names
+        scored = sorted(names, key=lambda n: self.expected_cost(n, snapshot[n][0]))
+        healthy = [n for n in scored if not snapshot[n][1]]
+        logger.debug("Backend ranking: %s", {n: round(self.expected_cost(n, snapshot[n][0]), 1) for n in scored})
+        return healthy or scored
+
+    async def _attempt(self, name: str, author: str) -> Tuple[List[dict], Optional[Exception]]:
+        t0 = time.perf_counter()
+        pubs: List[dict] = []
+        error = None
+        try:
+            pubs = await self.backends[name](author)
+        except asyncio.CancelledError:
+            # Lost a race; says nothing about the backend
+            raise
+        except Exception as e:
+            logger.info("Backend %s failed for '%s': %s", name, author, e)
+            error = e
+        if pubs or error:
+            await self._record(name, bool(pubs), int((time.perf_counter() - t0) * 1000))
+        return pubs, error
+
+    async def _record(self, name: str, ok: bool, latency_ms: int):
+        try:
+            await self.health.record_attempt(name, ok, latency_ms)
+            if ok:
+                return
+            samples, quarantined = (await self.health.snapshot([name]))[name]
+            recent = samples[:self.quarantine_after]
+            if not quarantined and len(recent) >= self.quarantine_after and not any(ok for ok, _ in recent):
+                logger.warning("Quarantining scraper backend %s for %ds (%d failures in a row)",
+                               name, self.quarantine_s, len(recent))
+                await self.health.quarantine(name, self.quarantine_s)
+        except Exception as e:
+            logger.warning("Could not record health of backend %s: %s", name, e)
+
+    async def _race(self, names: List[str], author: str) -> Tuple[Optional[str], List[dict], List[Exception]]:
+        tasks = {asyncio.create_task(self._attempt(name, author)): name for name in names}
+        pending = set(tasks)
+        errors = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pubs, error = task.result()
+                    if pubs:
+                        return tasks[task], pubs, errors
+                    if error:
+                        errors.append(error)
+            return None, [], errors
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def pages(self, name: str, author: str) -> AsyncIterator[List[dict]]:
+        """
+        Non-empty batches of one backend: page by page if it can stream,
+        else all at once. Batches already yielded are never fetched or
+        yielded again; once retries run out the error is raised.
+        """
+        if name not in self.streams:
+            batch = await self.backends[name](author)
+            if batch:
+                yield batch
+            return
+        produced = failures = 0
+        while True:
+            try:
+                async for batch in self.streams[name](author, produced):
+                    if batch:
+                        produced += len(batch)
+                        yield batch
+                return
+            except Exception as e:
+                if not produced or failures >= self.resume_retries:
+                    raise
+                failures += 1
+                pause = self.resume_backoff_s * 2 ** (failures - 1)
+                logger.warning("Backend %s failed for '%s' after %d publications, resuming in %.0fs: %s",
+                               name, author, produced, pause, e)
+                await asyncio.sleep(pause)
+
+    async def _race_first_batch(
+        self, names: List[str], author: str, errors: List[Exception]
+    ) -> Optional[Tuple[str, AsyncIterator[List[dict]], List[dict], float]]:
+        """(winner, its remaining batches, its first batch, start time); None if neither produced one."""
+        t0 = time.perf_counter()
+        streams = {name: self.pages(name, author) for name in names}
+        tasks = {asyncio.create_task(streams[name].__anext__()): name for name in names}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    try:
+                        batch = task.result()
+                    except StopAsyncIteration:
+                        continue
+                    except Exception as e:
+                        logger.info("Backend %s failed for '%s': %s", name, author, e)
+                        errors.append(e)
+                        await self._record(name, False, int((time.perf_counter() - t0) * 1000))
+                        continue
+                    return name, streams.pop(name), batch, t0
+            return None
+        finally:
+            # The loser stops where it is: its page fetches are cancelled, not left to finish
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for batches in streams.values():
+                await batches.aclose()
+
+    async def stream(self, author: str, race: bool = False) -> AsyncIterator[List[dict]]:
+        """
+        Like fetch, but yields batches as the backend produces them. Falls
+        through the ranking only while nothing was yielded; an error after
+        that is raised, since the caller has already handed batches on.
+        """
+        order = await self.ranked()
+        errors: List[Exception] = []
+        attempts = 0
+        if race and len(order) >= 2 and not self.blocking.intersection(order[:2]):
+            won = await self._race_first_batch(order[:2], author, errors)
+            if won is not None:
+                name, batches, first, t0 = won
+                logger.info("Backend %s won the race for '%s'", name, author)
+                try:
+                    yield first
+                    async for batch in batches:
+                        yield batch
+                except Exception:
+                    await self._record(name, False, int((time.perf_counter() - t0) * 1000))
+                    raise
+                finally:
+                    await batches.aclose()
+                await self._record(name, True, int((time.perf_counter() - t0) * 1000))
+                return
+            order, attempts = order[2:], 2
+        for name in order:
+            attempts += 1
+            t0 = time.perf_counter()
+            produced = 0
+            try:
+                async for batch in self.pages(name, author):
+                    produced += len(batch)
+                    yield batch
+            except Exception as e:
+                await self._record(name, False, int((time.perf_counter() - t0) * 1000))
+                if produced:
+                    raise
+                logger.info("Backend %s failed for '%s': %s", name, author, e)
+                errors.append(e)
+                continue
+            if produced:
+                await self._record(name, True, int((time.perf_counter() - t0) * 1000))
+                return
+        if errors and len(errors) == attempts:
+            raise errors[-1]
+
+    async def fetch(self, author: str, race: bool = False) -> List[dict]:
+        """
+        Publications from the best backend, falling through the ranking on
+        failure. Raises the last error if every backend raised (so the
+        consumer retries later); an empty list means no backend found any.
+        """
+        order = await self.ranked()
+        errors: List[Exception] = []
+        attempts = 0
+        if race and len(order) >= 2 and not self.blocking.intersection(order[:2]):
+            winner, pubs, errors = await self._race(order[:2], author)
+            if pubs:
+                logger.info("Backend %s won the race for '%s'", winner, author)
+                return pubs
+            order, attempts = order[2:], 2
+        for name in order:
+            pubs, error = await self._attempt(name, author)
+            attempts += 1
+            if pubs:
+                return pubs
+            if error:
+                errors.append(error)
+        if errors and len(errors) == attempts:
+            raise errors[-1]
+        return []
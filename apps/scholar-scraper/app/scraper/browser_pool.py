@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import async_playwright
+
+from app.config import settings
+
+logger = logging.getLogger("scholar-scraper.browser_pool")
+
+VIEWPORTS = [(1280, 800), (1366, 768), (1440, 900)]
+
+# (proxy server, user agent) → one reusable context
+ProfileKey = Tuple[Optional[str], str]
+
+
+class _Context:
+    def __init__(self, context, key: ProfileKey):
+        self.context = context
+        self.key = key
+        self.pages_served = 0
+        self.in_use = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """
+    One long-lived headless Chromium shared by every scrape in the process.
+
+    Contexts (cookies, UA, viewport, proxy) are kept per profile and reused
+    across authors; a context is recycled after `context_max_pages` pages and
+    the whole browser after `browser_max_pages`, or as soon as it stops
+    responding. At most `max_pages` pages are open at a time. Requests for
+    the resource types in `block` (images, fonts, CSS...) are aborted before
+    they leave the browser.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = 4,
+        context_max_pages: int = 50,
+        browser_max_pages: int = 500,
+        headless: bool = True,
+        block: Tuple[str, ...] = ("image", "media", "font", "stylesheet"),
+    ):
+        self.max_pages = max_pages
+        self.context_max_pages = context_max_pages
+        self.browser_max_pages = browser_max_pages
+        self.headless = headless
+        self.block = frozenset(block)
+
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._browser_pages = 0
+        self._contexts: Dict[ProfileKey, _Context] = {}
+        # Replaced browsers that still have pages open: (browser, its contexts)
+        self._draining: List[Tuple[object, List[_Context]]] = []
+        self.open_pages = 0
+        self.blocked_requests = 0
+
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        # No launch-level proxy: direct contexts would inherit it. Linux Chromium
+        # applies the per-context proxies without one.
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless,
+            args=["--disable-dev-shm-usage", "--disable-gpu"],
+        )
+        self._browser_pages = 0
+        logger.info("Launched Chromium (headless=%s, max %d pages)", self.headless, self.max_pages)
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected() \
+                and self._browser_pages < self.browser_max_pages:
+            return
+        if self._browser is not None:
+            reason = "disconnected" if not self._browser.is_connected() else f"{self._browser_pages} pages served"
+            logger.info("Recycling Chromium (%s)", reason)
+            await self._retire_browser()
+        await self._launch()
+
+    async def _retire_browser(self):
+        old, self._browser = self._browser, None
+        contexts, self._contexts = list(self._contexts.values()), {}
+        for ctx in contexts:
+            ctx.retired = True
+        # Pages still open on the old browser finish first; it is closed when the last one returns
+        if any(ctx.in_use for ctx in contexts):
+            self._draining.append((old, contexts))
+        else:
+            await _close_quietly(old)
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.block:
+            self.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _context_for(self, user_agent: str, proxy: Optional[dict]) -> _Context:
+        key = (proxy["server"] if proxy else None, user_agent)
+        async with self._lock:
+            await self._ensure_browser()
+            ctx = self._contexts.get(key)
+            if ctx is not None and ctx.pages_served >= self.context_max_pages:
+                self._contexts.pop(key)
+                ctx.retired = True
+                if not ctx.in_use:
+                    await _close_quietly(ctx.context)
+                ctx = None
+            if ctx is None:
+                w, h = random.choice(VIEWPORTS)
+                options = {
+                    "user_agent": user_agent,
+                    "viewport": {"width": w, "height": h},
+                    "locale": "en-US",
+                    "extra_http_headers": {"Accept-Language": "en-US,en;q=0.9"},
+                }
+                if proxy:
+                    options["proxy"] = proxy
+                context = await self._browser.new_context(**options)
+                if self.block:
+                    await context.route("**/*", self._block_resources)
+                ctx = self._contexts[key] = _Context(context, key)
+            ctx.pages_served += 1
+            ctx.in_use += 1
+            self._browser_pages += 1
+            return ctx
+
+    async def _release(self, ctx: _Context):
+        ctx.in_use -= 1
+        if ctx.retired and not ctx.in_use:
+            await _close_quietly(ctx.context)
+        for entry in list(self._draining):
+            browser, contexts = entry
+            if not any(c.in_use for c in contexts):
+                self._draining.remove(entry)
+                await _close_quietly(browser)
+
+    @asynccontextmanager
+    async def page(self, user_agent: str, proxy: Optional[dict] = None):
+        """
+        A fresh page in the context of the (proxy server, UA) profile; waits
+        while `max_pages` are open. `proxy` is Playwright's proxy dict.
+        """
+        async with self._semaphore:
+            ctx = await self._context_for(user_agent, proxy)
+            self.open_pages += 1
+            page = None
+            try:
+                page = await ctx.context.new_page()
+                yield page
+            except Exception:
+                if self._browser is not None and not self._browser.is_connected():
+                    logger.warning("Chromium went away mid-scrape; it will be relaunched")
+                raise
+            finally:
+                self.open_pages -= 1
+                if page is not None:
+                    await _close_quietly(page)
+                await self._release(ctx)
+
+    async def health(self) -> dict:
+        """Cheap liveness probe: browser connected and able to open a context."""
+        async with self._lock:
+            await self._ensure_browser()
+            context = await self._browser.new_context()
+            await context.close()
+        return {
+            "connected": self._browser.is_connected(),
+            "contexts": len(self._contexts),
+            "browser_pages": self._browser_pages,
+            "open_pages": self.open_pages,
+            "blocked_requests": self.blocked_requests,
+        }
+
+    async def close(self):
+        async with self._lock:
+            for ctx in self._contexts.values():
+                await _close_quietly(ctx.context)
+            self._contexts = {}
+            for browser, _ in self._draining:
+                await _close_quietly(browser)
+            self._draining = []
+            if self._browser is not None:
+                await _close_quietly(self._browser)
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+async def _close_quietly(obj):
+    try:
+        await obj.close()
+    except Exception as e:
+        logger.debug("close() failed: %s", e)
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """The process-wide pool, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(
+            max_pages=settings.BROWSER_MAX_PAGES,
+            context_max_pages=settings.BROWSER_CONTEXT_MAX_PAGES,
+            browser_max_pages=settings.BROWSER_RECYCLE_PAGES,
+            headless=settings.BROWSER_HEADLESS,
+            block=tuple(t.strip() for t in settings.BROWSER_BLOCK_RESOURCES.split(",") if t.strip()),
+        )
+    return _pool
+
+
+async def close_browser_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
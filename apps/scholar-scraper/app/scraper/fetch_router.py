@@ -1,10 +1,129 @@
+import functools
+
 from .scholarly_scraper import ScholarlyScraper
-from .playwright_scraper import PlaywrightScraper
+from .playwright_scraper import DECO_PORTS, PlaywrightScraper
+from .browser_pool import get_browser_pool
 from .oxylabs_scraper import OxylabsScraper
+from .backend_router import BackendHealth, BackendRouter, parse_weights
+from .result_cache import CachedScrape, ScrapeCache, StreamedScrape, single_batch
+from common.politeness import Politeness, parse_spacing
+from common.proxy_pool import ProxyPool
+from common.rate_limit import RateLimiter
+from app.config import settings
+
+# Shared with every other service that calls Oxylabs
+rate_limiter = RateLimiter(settings.REDIS_URL)
+# Which Oxylabs geos / Decodo ports currently get past Scholar's CAPTCHA, across replicas and restarts
+_proxy_settings = dict(
+    half_life_s=settings.PROXY_HALF_LIFE_S,
+    cooldown_s=settings.PROXY_COOLDOWN_S,
+    max_cooldown_s=settings.PROXY_MAX_COOLDOWN_S,
+)
+oxylabs_geos = ProxyPool(
+    settings.REDIS_URL, "oxylabs:scholar",
+    [g.strip() for g in settings.OXYLABS_GEOS.split(",") if g.strip()], **_proxy_settings,
+)
+decodo_ports = ProxyPool(settings.REDIS_URL, "decodo:scholar", DECO_PORTS, **_proxy_settings)
+# Request spacing per Scholar identity (geo, port, direct), shared with text-extractor's fetches
+politeness = Politeness(settings.REDIS_URL, parse_spacing(settings.POLITENESS_SPACING), jitter=settings.POLITENESS_JITTER)
+scrape_cache = ScrapeCache(settings.REDIS_URL, settings.SCRAPE_CACHE_TTL, settings.SCRAPE_CACHE_STALE_TTL)
+
+async def _scholarly(author_name: str):
+    return await ScholarlyScraper(max_threads=settings.SCHOLARLY_THREADS).fetch_publications(author_name)
+
+def _oxylabs_scraper() -> OxylabsScraper:
+    return OxylabsScraper(
+        geo_countries=oxylabs_geos.endpoints,
+        rate_limiter=rate_limiter,
+        proxy_pool=oxylabs_geos,
+        politeness=politeness,
+        page_concurrency=settings.OXYLABS_PAGE_CONCURRENCY,
+        mode=settings.SCHOLAR_MODE,
+    )
+
+async def _oxylabs(author_name: str):
+    return await _oxylabs_scraper().fetch_publications(author_name, max_pages=3)
+
+async def _oxylabs_pages(author_name: str, skip: int = 0):
+    async for page in _oxylabs_scraper().iter_publications(author_name, max_pages=3, skip=skip):
+        yield page
+
+async def _playwright(author_name: str):
+    return await PlaywrightScraper(pool=get_browser_pool(), proxy_pool=decodo_ports, politeness=politeness).fetch_publications(author_name, max_pages=3)
+
+BACKENDS = {"scholarly": _scholarly, "oxylabs": _oxylabs, "playwright": _playwright}
+# Backends that can hand results on page by page
+STREAMS = {"oxylabs": _oxylabs_pages}
+
+def _router() -> BackendRouter:
+    if settings.SCRAPER_SOURCE == "auto":
+        names = [n.strip() for n in settings.SCRAPER_BACKENDS.split(",") if n.strip() in BACKENDS]
+    else:
+        names = [settings.SCRAPER_SOURCE] + (["oxylabs"] if settings.SCRAPER_SOURCE != "oxylabs" else [])
+    return BackendRouter(
+        {name: BACKENDS[name] for name in names},
+        BackendHealth(settings.REDIS_URL),
+        costs=parse_weights(settings.SCRAPER_COSTS),
+        latency_priors_s={"scholarly": 20.0, "oxylabs": 15.0, "playwright": 30.0},
+        cost_weight_s=settings.SCRAPER_COST_WEIGHT_S,
+        quarantine_after=settings.SCRAPER_QUARANTINE_AFTER,
+        quarantine_s=settings.SCRAPER_QUARANTINE_S,
+        streams=STREAMS,
+        blocking={"scholarly"},
+        resume_retries=settings.STREAM_RESUME_RETRIES,
+        resume_backoff_s=settings.STREAM_RESUME_BACKOFF_S,
+    )
+
+router = _router()
+
+async def fetch_cached(author_name: str, interactive: bool = False) -> CachedScrape:
+    """Publications via the shared scrape cache (stale entries are refreshed in the background)."""
+    race = interactive and settings.SCRAPER_RACE_INTERACTIVE
+    return await scrape_cache.fetch(author_name, functools.partial(fetch_publications, race=race))
+
+async def stream_cached(author_name: str, interactive: bool = False) -> StreamedScrape:
+    """Publications batch by batch as pages arrive (one batch from the cache or with streaming off)."""
+    if not settings.SCRAPE_STREAMING:
+        cached = await fetch_cached(author_name, interactive=interactive)
+        return StreamedScrape(single_batch(cached.publications), cached.fetched_at, cached.status)
+    # Interactive scans race the two best backends to the first batch
+    race = interactive and settings.SCRAPER_RACE_INTERACTIVE
+    return await scrape_cache.stream(
+        author_name, functools.partial(stream_publications, race=race), fetch_publications,
+    )
+
+async def stream_publications(author_name: str, race: bool = False):
+    if settings.SCRAPER_SOURCE == "auto":
+        async for batch in router.stream(author_name, race=race):
+            yield batch
+        return
+    # Pinned backend: same fixed order and error handling as fetch_publications
+    for name in router.backends:
+        produced = 0
+        try:
+            async for batch in router.pages(name, author_name):
+                produced += len(batch)
+                yield batch
+        except Exception as e:
+            if name == "oxylabs" or produced:
+                raise
+            print(f"[INFO] {name} scraper failed: {e}")
+            continue
+        if produced or name == "oxylabs":
+            return
 
-async def fetch_publications(author_name: str):
-    try:
-        return await ScholarlyScraper().fetch_publications(author_name)
-    except Exception as e:
-        print(f"[INFO] ScholarlyScraper failed: {e}")
-        return await OxylabsScraper().fetch_publications(author_name, max_pages=3)
+async def fetch_publications(author_name: str, race: bool = False):
+    if settings.SCRAPER_SOURCE != "auto":
+        # Pinned backend: fixed order, no scoring
+        for name in router.backends:
+            try:
+                pubs = await BACKENDS[name](author_name)
+            except Exception as e:
+                if name == "oxylabs":
+                    raise
+                print(f"[INFO] {name} scraper failed: {e}")
+                continue
+            if pubs or name == "oxylabs":
+                return pubs
+        return []
+    return await router.fetch(author_name, race=race)
@@ -1,29 +1,66 @@
 import os
-import re
-import random
 import asyncio
 import httpx
-from bs4 import BeautifulSoup
+from typing import AsyncIterator
 from dotenv import load_dotenv, find_dotenv
+from common.metrics import UPSTREAM_SECONDS, timed
+from common.politeness import Politeness
+from common.proxy_pool import BURNED, FAILED, OK, ProxyPool
+from common.rate_limit import RateLimiter
 from .base import BaseScholarScraper
+from .scholar_html import SCHOLAR_BASE, parse_profile_page, parse_profile_search, parse_search_page, profile_id
 
 # Load .env from project root\load_dotenv(find_dotenv())
 
+SEARCH_PAGE_SIZE = 10
+PROFILE_PAGE_SIZE = 100   # the largest page Scholar serves on an author profile
+
+
 class OxylabsScraper(BaseScholarScraper):
+    """
+    Google Scholar through the Oxylabs realtime API, in two modes:
+
+    - "search": keyword search result pages (10 articles each); after the
+      first page the rest are fetched concurrently, `page_concurrency` at a
+      time, on top of the shared "oxylabs" rate limit
+    - "profile": the author's citations?user= page, paged with cstart and
+      pagesize=100, so a 300-article author takes 3 requests instead of 30
+
+    "auto" tries the profile first (a profile id/URL as author name, else a
+    profile lookup by name) and falls back to search. A profile URL or id
+    passed as author name always uses profile mode.
+
+    With a `proxy_pool` over the geo locations, each request goes out from
+    the geo that currently gets through best and CAPTCHAs cool a geo down
+    for every replica; without one geos are rotated by retry index.
+    Requests from one geo to Scholar are spaced out by `politeness`;
+    different geos go at the same time.
+    """
+
     def __init__(
         self,
         max_retries: int = 3,
         backoff_factor: float = 2.0,
-        geo_countries: list[str] = None
+        geo_countries: list[str] = None,
+        rate_limiter: RateLimiter | None = None,
+        page_concurrency: int = 3,
+        mode: str = "search",
+        proxy_pool: ProxyPool | None = None,
+        politeness: Politeness | None = None,
     ):
         self.username = os.getenv("OXY_USERNAME")
         self.password = os.getenv("OXY_PASSWORD")
         if not self.username or not self.password:
             raise RuntimeError("OXY_USERNAME or OXY_PASSWORD env vars are not set")
-        self.endpoint = "https://realtime.oxylabs.io/v1/queries"
+        self.endpoint = os.getenv("OXYLABS_ENDPOINT", "https://realtime.oxylabs.io/v1/queries")
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
         self.geo_countries = geo_countries or ["US", "DE", "GB", "FR", "CA"]
+        self.rate_limiter = rate_limiter
+        self.page_concurrency = max(1, page_concurrency)
+        self.mode = mode
+        self.proxy_pool = proxy_pool
+        self.politeness = politeness or Politeness()
         self.headers = {
             "User-Agent": (
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
@@ -34,6 +71,9 @@ class OxylabsScraper(BaseScholarScraper):
             "Referer": "https://scholar.google.com/"
         }
 
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(auth=(self.username, self.password), headers=self.headers, timeout=60.0)
+
     async def fetch_publications(
         self,
         author_name: str,
@@ -41,93 +81,175 @@ class OxylabsScraper(BaseScholarScraper):
         lang: str = "en"
     ) -> list[dict]:
         publications: list[dict] = []
+        async for page in self.iter_publications(author_name, max_pages, lang):
+            publications.extend(page)
+        return publications
 
-        async with httpx.AsyncClient(
-            auth=(self.username, self.password),
-            headers=self.headers,
-            timeout=60.0
-        ) as client:
-
-            for page_index in range(max_pages):
-                start = page_index * 10
-                target_url = (
-                    f"https://scholar.google.com/scholar?start={start}"
-                    f"&q={author_name.replace(' ', '+')}"
-                    f"&hl={lang}&as_sdt=0,5"
-                )
-
-                retry = 0
-                while retry <= self.max_retries:
-                    country = self.geo_countries[retry % len(self.geo_countries)]
-                    payload = {
-                        "url": target_url,
-                        "source": "google",
-                        "geo_location": country
-                    }
-                    print(f"[DEBUG] Using geo_location: {country}")
-
-                    await asyncio.sleep(random.uniform(1, 3))
-                    print(f"[DEBUG] Scraping page {page_index + 1}, try {retry + 1}: {target_url}")
-
-                    resp = await client.post(self.endpoint, json=payload)
-                    resp.raise_for_status()
-                    data = resp.json()
-
-                    try:
-                        html = data["results"][0]["content"]
-                    except (KeyError, IndexError):
-                        print("[WARN] No HTML content, breaking page loop.")
-                        retry = self.max_retries + 1
-                        break
-
-                    lower_html = html.lower()
-                    if "recaptcha" in lower_html:
-                        retry += 1
-                        wait = self.backoff_factor ** retry
-                        print(f"[WARN] CAPTCHA detected, retry after {wait:.1f}s...")
-                        await asyncio.sleep(wait)
-                        continue
-
-                    soup = BeautifulSoup(html, "lxml")
-                    items = soup.select("div.gs_ri")
-
-                    if not items:
-                        print("[INFO] No items found on this page, ending pagination.")
-                        retry = self.max_retries + 1
-                        break
-
-                    for it in items:
-                        title_el = it.select_one("h3.gs_rt")
-                        title = title_el.get_text(strip=True) if title_el else "Unknown"
-                        pdf_el = it.select_one("div.gs_or_ggsm a")
-                        link = pdf_el["href"] if pdf_el and pdf_el.has_attr("href") else None
-
-                        year = None
-                        meta = it.select_one("div.gs_a")
-                        if meta:
-                            m = re.search(r"\b(20\d{2}|19\d{2})\b", meta.get_text())
-                            if m:
-                                year = int(m.group(0))
-
-                        citations = None
-                        for a in it.select("div.gs_fl a"):
-                            txt = a.get_text()
-                            if "cited" in txt.lower() or "alıntı" in txt.lower():
-                                mm = re.search(r"\d+", txt)
-                                if mm:
-                                    citations = int(mm.group(0))
-                                break
-
-                        publications.append({
-                            "title": title,
-                            "year": year,
-                            "link": link,
-                            "citations": citations
-                        })
-
+    async def iter_publications(
+        self,
+        author_name: str,
+        max_pages: int = 5,
+        lang: str = "en",
+        skip: int = 0
+    ) -> AsyncIterator[list[dict]]:
+        """
+        The same publications page by page, in result order: each page is
+        yielded as soon as it and every page before it have arrived, so the
+        caller can hand page 1 on while later pages are still in flight.
+
+        `skip` resumes an interrupted run after its first `skip`
+        publications; pages holding only those are not fetched again.
+        """
+        async with self._client() as client:
+            user_id = profile_id(author_name)
+            if user_id is None and self.mode == "auto":
+                user_id = await self._find_profile(client, author_name, lang)
+            if user_id:
+                start, drop = divmod(skip, PROFILE_PAGE_SIZE)
+                # Resuming past the first page means the first run got its rows from the profile
+                found = start > 0
+                # max_pages bounds requests in both modes; a profile page holds 100 articles
+                async for rows in self._iter_profile(client, user_id, lang, max(1, max_pages), start):
+                    found = True
+                    rows, drop = rows[drop:], 0
+                    if rows:
+                        yield rows
+                if found or self.mode == "profile" or profile_id(author_name):
+                    return
+                print(f"[INFO] Profile {user_id} returned nothing, falling back to search")
+            elif self.mode == "profile":
+                print(f"[INFO] No Scholar profile found for '{author_name}'")
+                return
+            async for items in self._iter_search(client, author_name, max_pages, lang, skip):
+                yield items
+
+    # -- keyword search -------------------------------------------------------
+
+    async def _iter_search(
+        self, client: httpx.AsyncClient, author_name: str, max_pages: int, lang: str, skip: int = 0
+    ) -> AsyncIterator[list[dict]]:
+        def url(page_index: int) -> str:
+            return (
+                f"{SCHOLAR_BASE}/scholar?start={page_index * SEARCH_PAGE_SIZE}"
+                f"&q={author_name.replace(' ', '+')}"
+                f"&hl={lang}&as_sdt=0,5"
+            )
+
+        start, drop = divmod(skip, SEARCH_PAGE_SIZE)
+        if start >= max_pages:
+            return
+        # The first page tells whether there is more than one page at all
+        first = await self._fetch_html(client, url(start), f"search page {start + 1}")
+        items = parse_search_page(first) if first else []
+        if items[drop:]:
+            yield items[drop:]
+        if len(items) < SEARCH_PAGE_SIZE or start + 1 >= max_pages:
+            return
+
+        semaphore = asyncio.Semaphore(self.page_concurrency)
+
+        async def page(page_index: int) -> list[dict]:
+            async with semaphore:
+                html = await self._fetch_html(client, url(page_index), f"search page {page_index + 1}")
+            return parse_search_page(html) if html else []
+
+        tasks = [asyncio.create_task(page(i)) for i in range(start + 1, max_pages)]
+        try:
+            for task in tasks:
+                page_items = await task
+                # Keep result order; anything after the first empty or short page is past the end
+                if not page_items:
                     break
-
-                if retry > self.max_retries or not items:
+                yield page_items
+                if len(page_items) < SEARCH_PAGE_SIZE:
                     break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # pages past the end may have failed; nobody needs them
+
+    # -- author profile -------------------------------------------------------
+
+    async def _find_profile(self, client: httpx.AsyncClient, author_name: str, lang: str) -> str | None:
+        url = (
+            f"{SCHOLAR_BASE}/citations?view_op=search_authors"
+            f"&mauthors={author_name.replace(' ', '+')}&hl={lang}"
+        )
+        html = await self._fetch_html(client, url, "profile lookup")
+        return parse_profile_search(html) if html else None
+
+    async def _iter_profile(
+        self, client: httpx.AsyncClient, user_id: str, lang: str, max_profile_pages: int, start: int = 0
+    ) -> AsyncIterator[list[dict]]:
+        # Sequential on purpose: each page is 100 rows, and a short page marks the end
+        for page_index in range(start, max_profile_pages):
+            url = (
+                f"{SCHOLAR_BASE}/citations?user={user_id}&hl={lang}"
+                f"&cstart={page_index * PROFILE_PAGE_SIZE}&pagesize={PROFILE_PAGE_SIZE}"
+            )
+            html = await self._fetch_html(client, url, f"profile page {page_index + 1}")
+            rows = parse_profile_page(html) if html else []
+            if rows:
+                yield rows
+            if len(rows) < PROFILE_PAGE_SIZE:
+                break
+
+    # -- transport ------------------------------------------------------------
+
+    async def _fetch_html(self, client: httpx.AsyncClient, target_url: str, label: str) -> str | None:
+        """Page HTML via Oxylabs, rotating geo_location on CAPTCHAs; None if there is none."""
+        retry = 0
+        tried: list[str] = []
+        while retry <= self.max_retries:
+            country = await self._pick_geo(retry, tried)
+            tried.append(country)
+            payload = {
+                "url": target_url,
+                "source": "google",
+                "geo_location": country
+            }
+            print(f"[DEBUG] Using geo_location: {country}")
+
+            # İnsani bekleme: spacing per geo, not a fixed sleep per request
+            await self.politeness.wait(target_url, f"oxylabs:{country}")
+            print(f"[DEBUG] Scraping {label}, try {retry + 1}: {target_url}")
+
+            if self.rate_limiter:
+                await self.rate_limiter.acquire("oxylabs")
+            with timed(UPSTREAM_SECONDS, upstream="oxylabs"):
+                resp = await client.post(self.endpoint, json=payload)
+            if self.rate_limiter:
+                await self.rate_limiter.observe("oxylabs", resp.status_code, resp.headers)
+            resp.raise_for_status()
+            data = resp.json()
+
+            try:
+                html = data["results"][0]["content"]
+            except (KeyError, IndexError):
+                print(f"[WARN] No HTML content for {label}.")
+                await self._report(country, FAILED)
+                return None
+
+            if "recaptcha" in html.lower():
+                await self._report(country, BURNED)
+                retry += 1
+                wait = self.backoff_factor ** retry
+                # The burned geo sits out; the retry goes through the next one right away
+                print(f"[WARN] CAPTCHA detected via {country}, backing it off for {wait:.1f}s...")
+                await self.politeness.back_off(target_url, f"oxylabs:{country}", wait)
+                continue
+            await self._report(country, OK)
+            return html
+        return None
+
+    async def _pick_geo(self, retry: int, tried: list[str]) -> str:
+        if self.proxy_pool is None:
+            return self.geo_countries[retry % len(self.geo_countries)]
+        return await self.proxy_pool.pick(exclude=tried)
+
+    async def _report(self, country: str, outcome: str):
+        if self.proxy_pool is not None:
+            await self.proxy_pool.record(country, outcome)
 
-        return publications
@@ -1,8 +1,11 @@
 import re
 import os
 import random
-from playwright.async_api import async_playwright
+from typing import Optional
 from .base import BaseScholarScraper
+from .browser_pool import BrowserPool, get_browser_pool
+from common.politeness import Politeness
+from common.proxy_pool import BURNED, OK, ProxyPool
 from dotenv import load_dotenv
 
 # Decodo Residential Proxy bilgileri
@@ -21,6 +24,18 @@ USER_AGENTS = [
 ]
 
 class PlaywrightScraper(BaseScholarScraper):
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        politeness: Optional[Politeness] = None,
+    ):
+        # Browser process is shared and outlives the scrape; only a page is opened per author
+        self.pool = pool or get_browser_pool()
+        # Picks the Decodo port by recent success rate; random port without it
+        self.proxy_pool = proxy_pool
+        # Spacing between page loads per proxy port (or direct), shared with the other scrapers
+        self.politeness = politeness or Politeness()
 
     async def fetch_publications(self, author_name: str, max_pages: int = 2, lang: str = "en"):
         # 1) Önce doğrudan dene
@@ -36,35 +51,26 @@ class PlaywrightScraper(BaseScholarScraper):
     async def _run_scrape(self, author_name: str, max_pages: int, lang: str, use_proxy: bool):
         publications = []
 
-        async with async_playwright() as p:
-            # launch args
-            launch_args = {
-                "headless": False,
-                "slow_mo":  100
-            }
-
-            if use_proxy:
+        proxy = None
+        port = None
+        blocked = False
+        if use_proxy:
+            if self.proxy_pool:
+                port = int(await self.proxy_pool.pick())
+            else:
                 # Rastgele bir port seç
                 port = random.choice(DECO_PORTS)
-                print(f"[INFO] Using proxy → {DECO_HOST}:{port}")
-                launch_args["proxy"] = {
-                    "server":   f"http://{DECO_HOST}:{port}",
-                    "username": DECO_USER,
-                    "password": DECO_PASS
-                }
-
-            browser = await p.chromium.launch(**launch_args)
-            page    = await browser.new_page()
-
-            # Rastgele UA ve viewport
-            ua = random.choice(USER_AGENTS)
-            await page.set_extra_http_headers({
-                "User-Agent":      ua,
-                "Accept-Language": "en-US,en;q=0.9"
-            })
-            w,h = random.choice([(1280,800),(1366,768),(1440,900)])
-            await page.set_viewport_size({"width": w, "height": h})
+            print(f"[INFO] Using proxy → {DECO_HOST}:{port}")
+            proxy = {
+                "server":   f"http://{DECO_HOST}:{port}",
+                "username": DECO_USER,
+                "password": DECO_PASS
+            }
 
+        # Rastgele UA; viewport is fixed per pooled context
+        ua = random.choice(USER_AGENTS)
+        identity = f"decodo:{port}" if port is not None else "direct"
+        async with self.pool.page(ua, proxy=proxy) as page:
             for idx in range(max_pages):
                 start = idx * 10
                 url   = (
@@ -72,6 +78,8 @@ class PlaywrightScraper(BaseScholarScraper):
                     f"&q={author_name.replace(' ','+')}&hl={lang}&as_sdt=0,5"
                 )
                 print(f"[DEBUG] ({'proxy' if use_proxy else 'direct'}) goto {url}")
+                # Sayfalar arası insani bekleme
+                await self.politeness.wait(url, identity)
 
                 # Navigate DOMContentLoaded
                 try:
@@ -99,6 +107,7 @@ class PlaywrightScraper(BaseScholarScraper):
                 if "detected unusual traffic" in html.lower():
                     print("[WARNING] blocked by CAPTCHA or rate limit")
                     publications = []
+                    blocked = True
                     break
 
                 # Sonuçları çek
@@ -135,9 +144,7 @@ class PlaywrightScraper(BaseScholarScraper):
                         "citations": cit
                     })
 
-                # Sayfalar arası insani bekleme
-                await page.wait_for_timeout(random.uniform(1000,3000))
-
-            await browser.close()
-
+        # An empty result without a CAPTCHA says nothing about the port
+        if port is not None and self.proxy_pool and (blocked or publications):
+            await self.proxy_pool.record(str(port), BURNED if blocked else OK)
         return publications
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple
+
+import redis.asyncio as aioredis
+
+from common.codec import Codec, default_codec
+from common.lanes import now_ms
+from common.metrics import redis_op
+from .scholar_html import profile_id
+
+logger = logging.getLogger("scholar-scraper.cache")
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def cache_key(author: str) -> str:
+    """Profile id if the author is one, else the name without case, accents or punctuation."""
+    user_id = profile_id(author)
+    if user_id:
+        return f"profile:{user_id}"
+    name = unicodedata.normalize("NFKD", author)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).lower()
+    return "author:" + " ".join(re.sub(r"[^\w\s]", " ", name).split())
+
+
+@dataclass
+class CachedScrape:
+    publications: List[dict]
+    fetched_at: int   # epoch ms
+    status: str       # fresh | stale | miss
+
+    @property
+    def age_s(self) -> int:
+        return max(0, (now_ms() - self.fetched_at) // 1000)
+
+
+@dataclass
+class StreamedScrape:
+    batches: AsyncIterator[List[dict]]   # a hit is a single batch
+    fetched_at: int
+    status: str
+
+    @property
+    def age_s(self) -> int:
+        return max(0, (now_ms() - self.fetched_at) // 1000)
+
+
+async def single_batch(publications: List[dict]) -> AsyncIterator[List[dict]]:
+    if publications:
+        yield publications
+
+
+class ScrapeCache:
+    """
+    Parsed publication lists per author in Redis, shared by all scraper
+    replicas. Entries younger than `fresh_ttl` are served as they are;
+    up to `stale_ttl` later they are still served at once while one
+    replica re-scrapes in the background (stale-while-revalidate). After
+    that Redis drops them and the next scan scrapes in the foreground.
+    """
+
+    def __init__(self, url: str, fresh_ttl: int, stale_ttl: int, codec: Optional[Codec] = None):
+        self._url = url
+        self._redis = None
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.codec = codec or default_codec()
+        self._refreshing: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.fresh_ttl > 0
+
+    async def _client(self):
+        if not self._redis:
+            self._redis = aioredis.from_url(self._url, decode_responses=False)
+        return self._redis
+
+    @redis_op
+    async def get_scrape(self, author: str) -> Optional[Tuple[List[dict], int]]:
+        raw = await (await self._client()).get(f"scholar:cache:{cache_key(author)}")
+        if not raw:
+            return None
+        entry = self.codec.unpack(raw)
+        return entry["publications"], entry["fetched_at"]
+
+    @redis_op
+    async def put_scrape(self, author: str, publications: List[dict]) -> int:
+        fetched_at = now_ms()
+        entry = {"author": author, "fetched_at": fetched_at, "publications": publications}
+        await (await self._client()).set(
+            f"scholar:cache:{cache_key(author)}", self.codec.pack(entry),
+            ex=self.fresh_ttl + self.stale_ttl,
+        )
+        return fetched_at
+
+    @redis_op
+    async def _claim_refresh(self, author: str) -> bool:
+        # One background refresh per author across all replicas; the lock outlives a slow scrape
+        return bool(await (await self._client()).set(
+            f"scholar:cache:{cache_key(author)}:refreshing", b"1", nx=True, ex=600,
+        ))
+
+    async def _release_refresh(self, author: str):
+        await (await self._client()).delete(f"scholar:cache:{cache_key(author)}:refreshing")
+
+    async def fetch(self, author: str, scrape: Callable[[str], Awaitable[List[dict]]]) -> CachedScrape:
+        """Cached publications for `author`, scraping in the foreground only on a miss."""
+        if not self.enabled:
+            return CachedScrape(await scrape(author), now_ms(), MISS)
+
+        hit = await self._lookup(author, scrape)
+        if hit is not None:
+            return hit
+        publications = await scrape(author)
+        fetched_at = await self._store(author, publications)
+        return CachedScrape(publications, fetched_at, MISS)
+
+    async def stream(
+        self,
+        author: str,
+        scrape_pages: Callable[[str], AsyncIterator[List[dict]]],
+        scrape: Callable[[str], Awaitable[List[dict]]],
+    ) -> StreamedScrape:
+        """
+        Like fetch, for callers that hand publications on as they arrive: a
+        hit is one batch (stale ones still refreshed in the background with
+        `scrape`); a miss streams `scrape_pages` and caches the whole list
+        once the stream has run to its end.
+        """
+        if self.enabled:
+            hit = await self._lookup(author, scrape)
+            if hit is not None:
+                return StreamedScrape(single_batch(hit.publications), hit.fetched_at, hit.status)
+        return StreamedScrape(self._stream_and_store(author, scrape_pages), now_ms(), MISS)
+
+    async def _stream_and_store(
+        self, author: str, scrape_pages: Callable[[str], AsyncIterator[List[dict]]]
+    ) -> AsyncIterator[List[dict]]:
+        publications: List[dict] = []
+        async for batch in scrape_pages(author):
+            publications.extend(batch)
+            yield batch
+        if self.enabled:
+            await self._store(author, publications)
+
+    async def _lookup(self, author: str, scrape: Callable[[str], Awaitable[List[dict]]]) -> Optional[CachedScrape]:
+        """A fresh or stale entry (starting its background refresh), None on a miss."""
+        try:
+            cached = await self.get_scrape(author)
+        except Exception as e:
+            logger.warning("Scrape cache read failed for '%s': %s", author, e)
+            cached = None
+
+        if cached is None:
+            return None
+
+        publications, fetched_at = cached
+        if now_ms() - fetched_at < self.fresh_ttl * 1000:
+            return CachedScrape(publications, fetched_at, FRESH)
+
+        try:
+            claimed = await self._claim_refresh(author)
+        except Exception as e:
+            logger.warning("Scrape cache refresh lock failed for '%s': %s", author, e)
+            claimed = False
+        if claimed:
+            task = asyncio.create_task(self._refresh(author, scrape))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+        return CachedScrape(publications, fetched_at, STALE)
+
+    async def _store(self, author: str, publications: List[dict]) -> int:
+        # Empty results are often a block or a CAPTCHA, not a real answer; don't pin them
+        if not publications:
+            return now_ms()
+        try:
+            return await self.put_scrape(author, publications)
+        except Exception as e:
+            logger.warning("Scrape cache write failed for '%s': %s", author, e)
+            return now_ms()
+
+    async def _refresh(self, author: str, scrape: Callable[[str], Awaitable[List[dict]]]):
+        try:
+            publications = await scrape(author)
+            await self._store(author, publications)
+            logger.info("Refreshed cached scrape for '%s' (%d papers)", author, len(publications))
+        except Exception as e:
+            logger.warning("Background refresh for '%s' failed, keeping the stale entry: %s", author, e)
+        finally:
+            try:
+                await self._release_refresh(author)
+            except Exception:
+                pass
+
+    async def drain(self, timeout: float = 60.0):
+        """Let in-flight background refreshes finish (on shutdown)."""
+        if self._refreshing:
+            await asyncio.wait(self._refreshing, timeout=timeout)
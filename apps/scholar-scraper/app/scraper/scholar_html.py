@@ -0,0 +1,133 @@
+"""
+Google Scholar result pages → publication dicts.
+
+One lxml parse per page and XPath expressions compiled once at import;
+each matches what the CSS selectors of the BeautifulSoup version did
+(`div.gs_ri`, `tr.gsc_a_tr`, ...), so the dicts come out the same.
+"""
+import re
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from lxml import etree, html as lxml_html
+
+SCHOLAR_BASE = "https://scholar.google.com"
+# Profile ids are 12 characters ending in "AAAAJ", e.g. "qc6CJjYAAAAJ"
+_PROFILE_ID = re.compile(r"^[\w-]{7}AAAAJ$")
+_YEAR = re.compile(r"\b(20\d{2}|19\d{2})\b")
+_NUMBER = re.compile(r"\d+")
+
+
+def _cls(name: str) -> str:
+    """XPath predicate for CSS `.name`."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# Keyword search results
+_RESULTS = etree.XPath(f"//div[{_cls('gs_ri')}]")
+_TITLE = etree.XPath(f"(.//h3[{_cls('gs_rt')}])[1]")
+_PDF_LINK = etree.XPath(f"(.//div[{_cls('gs_or_ggsm')}]//a)[1]")
+_BYLINE = etree.XPath(f"(.//div[{_cls('gs_a')}])[1]")
+_FOOTER_LINKS = etree.XPath(f".//div[{_cls('gs_fl')}]//a")
+
+# Author search and profile pages
+_AUTHOR_HIT = etree.XPath(
+    f"(//div[{_cls('gsc_1usr')}]//h3[{_cls('gs_ai_name')}]//a"
+    f" | //div[{_cls('gsc_1usr')}]//a[{_cls('gs_ai_pho')}])[1]"
+)
+_PROFILE_ROWS = etree.XPath(f"//tr[{_cls('gsc_a_tr')}]")
+_ROW_TITLE = etree.XPath(f"(.//a[{_cls('gsc_a_at')}])[1]")
+_ROW_YEAR = etree.XPath(f"(.//td[{_cls('gsc_a_y')}]//span)[1]")
+_ROW_CITES = etree.XPath(f"(.//a[{_cls('gsc_a_ac')}])[1]")
+
+
+def _parse(html: str):
+    return lxml_html.document_fromstring(html) if html.strip() else None
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _stripped_text(el) -> str:
+    # Same as BeautifulSoup's get_text(strip=True): each text piece stripped, no separator
+    return "".join(piece.strip() for piece in el.itertext())
+
+
+def _citation_count(text: str) -> int | None:
+    m = _NUMBER.search(text)
+    return int(m.group(0)) if m else None
+
+
+def profile_id(author: str) -> str | None:
+    """The user id when `author` is a Scholar profile URL or a bare profile id."""
+    author = author.strip()
+    if "user=" in author:
+        ids = parse_qs(urlparse(author).query).get("user")
+        return ids[0] if ids else None
+    if _PROFILE_ID.match(author):
+        return author
+    return None
+
+
+def parse_search_page(html: str) -> list[dict]:
+    root = _parse(html)
+    publications = []
+    for it in _RESULTS(root) if root is not None else ():
+        title_el = _first(_TITLE, it)
+        title = _stripped_text(title_el) if title_el is not None else "Unknown"
+        pdf_el = _first(_PDF_LINK, it)
+        link = pdf_el.get("href") if pdf_el is not None else None
+
+        year = None
+        meta = _first(_BYLINE, it)
+        if meta is not None:
+            m = _YEAR.search(meta.text_content())
+            if m:
+                year = int(m.group(0))
+
+        citations = None
+        for a in _FOOTER_LINKS(it):
+            txt = a.text_content().lower()
+            if "cited" in txt or "alıntı" in txt:
+                citations = _citation_count(txt)
+                break
+
+        publications.append({
+            "title": title,
+            "year": year,
+            "link": link,
+            "citations": citations
+        })
+    if not publications:
+        print("[INFO] No items found on this page, ending pagination.")
+    return publications
+
+
+def parse_profile_search(html: str) -> str | None:
+    """User id of the first hit on a citations?view_op=search_authors page."""
+    root = _parse(html)
+    anchor = _first(_AUTHOR_HIT, root) if root is not None else None
+    if anchor is None or anchor.get("href") is None:
+        return None
+    return profile_id(anchor.get("href"))
+
+
+def parse_profile_page(html: str) -> list[dict]:
+    root = _parse(html)
+    publications = []
+    for row in _PROFILE_ROWS(root) if root is not None else ():
+        title_el = _first(_ROW_TITLE, row)
+        if title_el is None:
+            continue
+        href = title_el.get("href") or title_el.get("data-href")
+        year_el = _first(_ROW_YEAR, row)
+        year_txt = _stripped_text(year_el) if year_el is not None else ""
+        cites_el = _first(_ROW_CITES, row)
+        publications.append({
+            "title": _stripped_text(title_el) or "Unknown",
+            "year": int(year_txt) if year_txt.isdigit() else None,
+            "link": urljoin(SCHOLAR_BASE, href) if href else None,
+            "citations": _citation_count(cites_el.text_content()) if cites_el is not None else None,
+        })
+    return publications
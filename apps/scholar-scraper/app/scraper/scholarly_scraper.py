@@ -1,10 +1,36 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from scholarly import scholarly
 from .base import BaseScholarScraper
 
+# scholarly is blocking (requests + sleeps); it runs here, never on the event loop.
+# The pool size is also how many scholarly scrapes hit Scholar at once.
+_executor: ThreadPoolExecutor | None = None
+
+
+def _pool(max_workers: int) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scholarly")
+    return _executor
+
+
 class ScholarlyScraper(BaseScholarScraper):
+    def __init__(self, max_threads: int = 4):
+        self.max_threads = max_threads
+
     async def fetch_publications(self, author_name: str):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool(self.max_threads), self._fetch_blocking, author_name)
+
+    def _fetch_blocking(self, author_name: str):
         search_query = scholarly.search_author(author_name)
-        author = next(search_query)
+        # Not next(search_query): a StopIteration can't cross run_in_executor
+        # (asyncio turns it into a TypeError and the awaiting task never resumes)
+        author = next(search_query, None)
+        if author is None:
+            # No Scholar profile; the router moves on to the next backend
+            return []
         filled_author = scholarly.fill(author, sections=["publications"])
         
         publications = []
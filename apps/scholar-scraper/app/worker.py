@@ -6,65 +6,166 @@ import redis.asyncio as aioredis
 from datetime import datetime
 from aio_pika import IncomingMessage
 
-from common.messaging import RabbitPublisher, RabbitConsumer
+from common.messaging import RabbitPublisher, RabbitConsumer, PoisonMessage
 from common.job_store import JobStore
+from common.lanes import LaneScheduler, INTERACTIVE, lane_priority, now_ms
+from common.metrics import start_metrics_server
+from common.tracing import setup_tracing
 from app.config import settings
-from app.scraper.fetch_router import fetch_publications
+from app.scraper.browser_pool import close_browser_pool
+from app.scraper.fetch_router import scrape_cache, stream_cached
 
 logger = logging.getLogger("scholar-scraper")
 job_store = JobStore(settings.REDIS_URL)
+lane_scheduler = LaneScheduler(settings.REDIS_URL)
 
 publisher = RabbitPublisher(settings.RABBITMQ_URL)
-consumer  = RabbitConsumer(settings.RABBITMQ_URL)
+consumer  = RabbitConsumer(settings.RABBITMQ_URL, job_store=job_store)
+
+class ArticleStream:
+    """
+    Hands scraped publications to doi-resolver while the scrape is still
+    running, one message per article. `index` numbers the articles across
+    the whole scrape and `seq` the batches; the job's last message carries
+    end_of_stream and the total.
+
+    Stages count articles against article_total, which only exists once
+    the stream is sealed. The newest article is therefore always held back
+    and published after the seal, so no stage can finish the job early.
+    """
+
+    def __init__(self, job_id: str, author: str, batch_size: int = 1, lane: str = INTERACTIVE):
+        self.job_id = job_id
+        self.author = author
+        self.lane = lane
+        self.batch_size = max(1, batch_size)
+        self.published = 0
+        self.seq = 0
+        self._held: list = []
+
+    @property
+    def count(self) -> int:
+        """Articles so far, published or held back."""
+        return self.published + len(self._held)
+
+    async def add(self, publications: list):
+        self._held.extend(publications)
+        if len(self._held) - 1 >= self.batch_size:
+            batch, self._held = self._held[:-1], self._held[-1:]
+            await self._publish(batch)
+
+    async def seal(self) -> int:
+        total = self.count
+        if total:
+            await job_store.set_article_total(self.job_id, total)
+            batch, self._held = self._held, []
+            await self._publish(batch, total=total)
+        return total
+
+    async def _publish(self, articles: list, total: int | None = None):
+        if not self.published:
+            # Fan out one message per article; downstream stages count them back in
+            await job_store.set_field(self.job_id, "author", self.author)
+            await job_store.start_branches(self.job_id)
+        messages = [
+            {
+                "job_id": self.job_id,
+                "author": self.author,
+                "index": self.published + offset,
+                "seq": self.seq,
+                "lane": self.lane,
+                "article": article
+            }
+            for offset, article in enumerate(articles)
+        ]
+        if total is not None:
+            messages[-1].update(end_of_stream=True, total=total)
+        await publisher.publish_batch("doi-resolve-requests", messages, priority=lane_priority(self.lane))
+        self.published += len(articles)
+        self.seq += 1
+        await job_store.add_published_articles(self.job_id, len(articles))
+        if total is None:
+            await job_store.set_field(self.job_id, "state", f"Scraping, {self.published} papers handed on.")
 
 async def handle_scrape(payload: dict):
     job_id = payload.get("job_id")
     author = payload.get("author")
     if not job_id or not author:
-        logger.error("Malformed payload, missing job_id or author")
-        return
+        raise PoisonMessage("Malformed payload, missing job_id or author")
 
     logger.info(f"[{job_id}] Scraping started for author '{author}'")
+    if payload.get("enqueued_at"):
+        # Queue wait per lane: gateway submit → first pickup (retries aren't counted again)
+        wait_ms = now_ms() - payload["enqueued_at"]
+        if await job_store.set_field_if_missing(job_id, "queue_wait_ms", str(wait_ms)):
+            await lane_scheduler.record_wait(payload.get("lane", INTERACTIVE), wait_ms)
     now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
     await job_store.set_field(job_id, "scraper_start_time", now_str)
     await job_store.set_field(job_id, "state", "Scraping started.")
 
+    lane = payload.get("lane", INTERACTIVE)
+    stream = ArticleStream(job_id, author, settings.STREAM_BATCH_SIZE, lane)
+    partial = False
     try:
-        publications = await fetch_publications(author)
+        scrape = await stream_cached(author, interactive=lane == INTERACTIVE)
+        async for batch in scrape.batches:
+            await stream.add(batch)
     except Exception as e:
-        logger.exception(f"[{job_id}] Scraper error: {e}")
-        await job_store.set_field(job_id, "state", "Scraper error.")
-        return
+        if not stream.published:
+            # Re-raised so the consumer retries the scrape after a backoff
+            logger.exception(f"[{job_id}] Scraper error: {e}")
+            await job_store.set_field(job_id, "state", "Scraper failed, retrying.")
+            raise
+        # The backend already resumed the missing pages as often as it may. Articles are
+        # downstream, and a consumer retry would scrape and publish them again.
+        logger.exception(f"[{job_id}] Scraper failed after {stream.published} papers and its resume retries, finishing the job with those: {e}")
+        partial = True
+
+    await job_store.set_field(job_id, "scrape_cache", scrape.status)
+    await job_store.set_field(job_id, "scrape_cache_age_s", str(scrape.age_s))
+    if scrape.status != "miss":
+        logger.info(f"[{job_id}] Served {scrape.status} cached scrape for '{author}' ({scrape.age_s}s old)")
 
-    if not publications:
+    if not stream.count:
         logger.info(f"[{job_id}] Scraper found no results")
         await job_store.set_field(job_id, "state", "Scraper found no results.")
         return
     else:
-        logger.info(f"[{job_id}] Scraper completed successfully ({len(publications)} papers)")
+        logger.info(f"[{job_id}] Scraper completed successfully ({stream.count} papers)")
         now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
         await job_store.set_field(job_id, "scraper_end_time", now_str)
-        await job_store.set_field(job_id, "state", "Scraper completed successfully.")
+        await job_store.set_field(
+            job_id, "state", "Scraper stopped early, continuing with partial results." if partial
+            else "Scraper completed successfully."
+        )
 
-    doi_request = {
-        "job_id": job_id,
-        "author": author,
-        "results": publications
-    }
+    total = await stream.seal()
+    logger.info(f"[{job_id}] Published {total} DOI-resolve requests in {stream.seq} batches")
 
-    await publisher.publish("doi-resolve-requests", doi_request)
-    logger.info(f"[{job_id}] Published DOI-resolve request")
+async def handle_give_up(payload: dict):
+    job_id = payload.get("job_id")
+    if job_id:
+        await job_store.set_field(job_id, "state", "Scraper error.")
 
 async def main():
+    start_metrics_server(settings.METRICS_PORT)
+    setup_tracing("scholar-scraper")
     # start consuming scrape_requests
     await consumer.consume(
         queue_name="scrape_requests",
         on_message=handle_scrape,
-        prefetch_count=1
+        prefetch_count=settings.PREFETCH_COUNT,
+        concurrency=settings.CONCURRENCY,
+        max_retries=settings.MAX_RETRIES,
+        on_give_up=handle_give_up
     )
     logger.info("Scholar-scraper worker running, waiting for messages...")
-    # keep the worker alive
-    await asyncio.Future()
+    # keep the worker alive until SIGTERM, then drain in-flight scrapes
+    try:
+        await consumer.run_until_stopped()
+    finally:
+        await scrape_cache.drain()
+        await close_browser_pool()
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
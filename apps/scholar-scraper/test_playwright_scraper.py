@@ -5,7 +5,10 @@ async def main():
     scraper = PlaywrightScraper()
     author_name = "Tacha Serif"  # Scholar profili olmayan biri
     print(f"Fetching publications for: {author_name}")
-    results = await scraper.fetch_publications(author_name, max_pages=3)
+    try:
+        results = await scraper.fetch_publications(author_name, max_pages=3)
+    finally:
+        await scraper.pool.close()
     
     print(f"Total publications found: {len(results)}")
     for i, pub in enumerate(results, 1):
@@ -0,0 +1,14 @@
+import asyncio
+
+from app.scraper import scholarly_scraper
+from app.scraper.scholarly_scraper import ScholarlyScraper
+
+
+def test_author_without_profile_returns_empty(monkeypatch):
+    # search_author yields nothing for an author without a Scholar profile
+    monkeypatch.setattr(scholarly_scraper.scholarly, "search_author", lambda name: iter(()))
+
+    async def fetch():
+        return await asyncio.wait_for(ScholarlyScraper(max_threads=1).fetch_publications("Nobody Atall"), 5)
+
+    assert asyncio.run(fetch()) == []
@@ -14,5 +14,21 @@ class Settings:
     OUTPUT_QUEUE: str = os.getenv("OUTPUT_QUEUE", "ai-detection-requests")
     OUTPUT_QUEUE_2: str = os.getenv("OUTPUT_QUEUE_2", "plagiarism-detection-requests")
     PREFETCH_COUNT: int = int(os.getenv("PREFETCH_COUNT", "5"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", os.getenv("PREFETCH_COUNT", "5")))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    # Threads parsing PDFs (pdfplumber + normalizer) next to the CONCURRENCY handlers
+    PDF_PARSE_THREADS: int = int(os.getenv("PDF_PARSE_THREADS", "2"))
+    # Oxylabs geo locations for publisher pages, picked by recent success rate; a CAPTCHA
+    # cools a geo down for PROXY_COOLDOWN_S, doubling per CAPTCHA in a row up to the max
+    OXYLABS_GEOS: str = os.getenv("OXYLABS_GEOS", "US,DE,GB,FR,CA")
+    PROXY_HALF_LIFE_S: int = int(os.getenv("PROXY_HALF_LIFE_S", "1800"))
+    PROXY_COOLDOWN_S: int = int(os.getenv("PROXY_COOLDOWN_S", "120"))
+    PROXY_MAX_COOLDOWN_S: int = int(os.getenv("PROXY_MAX_COOLDOWN_S", "3600"))
+    # Seconds between requests to one domain through one identity (proxy geo/port or
+    # direct), "*" for any other domain, stretched by up to POLITENESS_JITTER at random
+    POLITENESS_SPACING: str = os.getenv("POLITENESS_SPACING", "scholar.google.com=2,*=1")
+    POLITENESS_JITTER: float = float(os.getenv("POLITENESS_JITTER", "0.5"))
+    # Prometheus /metrics served from a background thread; 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9100"))
 
 settings = Settings()
@@ -1,13 +1,50 @@
+import asyncio
 import io
 import logging
-import re
-from typing import Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 import pdfplumber
-from bs4 import BeautifulSoup
 
+from common.metrics import PDF_PARSE_SECONDS, timed
+from common.politeness import Politeness
+from common.rate_limit import RateLimiter
+from common.resilience import upstream
+from landing import find_pdf_link
+from normalizer import iter_paragraphs
 from oxylabs_scraper import OxylabsScraper
+from structure import build_document
+
+# pdfplumber and the normalizer are CPU-bound; they run here so the event loop keeps
+# serving the other in-flight articles, downloads and the broker heartbeat. The pool
+# size caps how many PDFs are parsed at once.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _pool(max_workers: int) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-parse")
+    return _executor
+
+
+def parse_pdf(pdf_bytes: bytes) -> Tuple[str, Dict[str, Any]]:
+    """Normalized text plus its section/page map (see structure.py); blocking."""
+    text_chunks: List[str] = []
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        title = (pdf.metadata or {}).get("Title")
+        for page in pdf.pages:
+            text = page.extract_text(
+                x_tolerance=1,
+                y_tolerance=1,
+                layout=True,
+            )
+            # Keep empty pages so page numbers in the document stay right
+            text_chunks.append(text or "")
+    title = title.strip() if isinstance(title, str) and title.strip() else None
+    return build_document(iter_paragraphs(text_chunks), title=title)
 
 
 class Extractor:
@@ -18,6 +55,9 @@ class Extractor:
         crossref_api_url: str,
         crossref_mailto: str,
         scraper: Optional[OxylabsScraper] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        politeness: Optional[Politeness] = None,
+        parse_threads: int = 2,
     ):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.unpaywall_api_url = unpaywall_api_url.rstrip("/")
@@ -37,10 +77,23 @@ class Extractor:
             },
         )
         self.scraper = scraper
-
-    async def resolve_oa_urls(self, doi: str) -> Dict[str, Optional[str]]:
+        self.rate_limiter = rate_limiter
+        # Spacing of direct fetches per publisher domain; none without it
+        self.politeness = politeness
+        self.parse_threads = parse_threads
+
+    async def _limited_get(self, bucket: str, url: str, **kwargs) -> httpx.Response:
+        acquire = (lambda: self.rate_limiter.acquire(bucket)) if self.rate_limiter else None
+        resp = await upstream(bucket).call(lambda: self._client.get(url, **kwargs), acquire=acquire)
+        if self.rate_limiter:
+            await self.rate_limiter.observe(bucket, resp.status_code, resp.headers)
+        return resp
+
+    async def resolve_oa_urls(
+        self, doi: str, crossref_links: Optional[List[str]] = None, crossref_pdf_url: Optional[str] = None
+    ) -> Dict[str, Optional[str]]:
         url = f"{self.unpaywall_api_url}/{doi}"
-        resp = await self._client.get(url, params={"email": self.unpaywall_email})
+        resp = await self._limited_get("unpaywall", url, params={"email": self.unpaywall_email})
         resp.raise_for_status()
         data = resp.json()
         best = data.get("best_oa_location") or {}
@@ -52,8 +105,12 @@ class Extractor:
         if html_url:
             return {"pdf": None, "html": html_url}
 
+        # doi-resolver already captured the Crossref links; only fetch on a miss
+        if crossref_links is not None:
+            return {"pdf": crossref_pdf_url, "html": None}
+
         cr_url = f"{self.crossref_api_url}/{doi}"
-        resp2 = await self._client.get(cr_url, params={"mailto": self.crossref_mailto})
+        resp2 = await self._limited_get("crossref", cr_url, params={"mailto": self.crossref_mailto})
         resp2.raise_for_status()
         cr_msg = resp2.json().get("message", {})
         for link in cr_msg.get("link", []):
@@ -62,60 +119,59 @@ class Extractor:
 
         return {"pdf": None, "html": None}
 
-    async def extract_pdf_text(self, pdf_bytes: bytes) -> str:
-        text_chunks: List[str] = []
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text(
-                    x_tolerance=1,
-                    y_tolerance=1,
-                    layout=True,
-                )
-                if text:
-                    text_chunks.append(text)
-        raw = "\n".join(text_chunks)
-
-        # 1) Decode double-escaped unicode (e.g. "\\u00e2\\u0080\\u0094")
-        raw = raw.encode("utf-8", "surrogatepass").decode("unicode_escape", "ignore")
-        # 2) Attempt to fix mojibake from latin1->utf-8
-        try:
-            raw = raw.encode("latin1", "ignore").decode("utf-8", "ignore")
-        except Exception:
-            pass
+    async def extract_pdf_document(self, pdf_bytes: bytes) -> Tuple[str, Dict[str, Any]]:
+        """Normalized text plus its section/page map, parsed off the event loop."""
+        loop = asyncio.get_running_loop()
+        with timed(PDF_PARSE_SECONDS):
+            return await loop.run_in_executor(_pool(self.parse_threads), parse_pdf, pdf_bytes)
 
-        return self._normalize_text(raw)
+    async def _polite(self, url: str):
+        if self.politeness:
+            await self.politeness.wait(url)
 
     async def _extract_from_landing(self, landing_url: str) -> Optional[str]:
         # Attempt direct landing fetch
+        await self._polite(landing_url)
         try:
             resp = await self._client.get(landing_url)
             resp.raise_for_status()
             html = resp.text
+            base_url = str(resp.url)
         except httpx.HTTPStatusError as e:
             self.logger.warning("Landing page fetch failed (%s), trying Oxylabs…", e)
             if not self.scraper:
                 return None
+            base_url = landing_url
             try:
                 html = await self.scraper.fetch_html(landing_url)
             except Exception as ex:
                 self.logger.warning("Oxylabs landing fetch failed: %s", ex)
                 return None
 
-        soup = BeautifulSoup(html, "lxml")
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if href.lower().endswith(".pdf"):
-                return href
-        return None
+        # citation_pdf_url first, then the first .pdf link; absolute, after redirects
+        return find_pdf_link(html, base_url=base_url)
 
-    async def get_text_for_doi(self, doi: str) -> Optional[str]:
+    async def get_document_for_doi(
+        self,
+        doi: str,
+        crossref_links: Optional[List[str]] = None,
+        crossref_pdf_url: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
         """
         Resolve PDF/HTML URLs for the given DOI, try to fetch a PDF from each candidate,
-        extract and normalize its text, and return it. Logs every step at INFO level.
+        extract and normalize its text, and return (text, document). Logs every step at INFO level.
+        If `timings` is given, milliseconds spent in lookup/download/parse are added to it.
         """
+        timings = timings if timings is not None else {}
+        for key in ("lookup_ms", "download_ms", "parse_ms"):
+            timings.setdefault(key, 0.0)
+        t0 = time.perf_counter()
+
         # 1) Resolve OA locations
-        urls = await self.resolve_oa_urls(doi)
+        urls = await self.resolve_oa_urls(doi, crossref_links, crossref_pdf_url)
         self.logger.info("Resolved URLs for %s → %r", doi, urls)
+        timings["lookup_ms"] += (time.perf_counter() - t0) * 1000
 
         # 2) Build candidate list: direct PDF first, then landing HTML
         candidates: List[str] = []
@@ -124,7 +180,9 @@ class Extractor:
         if urls.get("html"):
             candidates.append(urls["html"])
             # try to scrape PDF link from landing page
+            t0 = time.perf_counter()
             pdf_link = await self._extract_from_landing(urls["html"])
+            timings["download_ms"] += (time.perf_counter() - t0) * 1000
             if pdf_link:
                 self.logger.info("Found embedded PDF link on landing for %s → %s", doi, pdf_link)
                 candidates.insert(0, pdf_link)
@@ -137,8 +195,10 @@ class Extractor:
         # 3) Try each candidate
         for url in candidates:
             self.logger.info("Trying candidate for %s → %s", doi, url)
+            t0 = time.perf_counter()
             try:
-                # HEAD to check content-type
+                # HEAD to check content-type; one slot covers the HEAD + GET pair
+                await self._polite(url)
                 head = await self._client.head(url)
                 ctype = head.headers.get("content-type", "").lower()
                 self.logger.info("HEAD %s → %d, content-type=%s", url, head.status_code, ctype)
@@ -151,15 +211,21 @@ class Extractor:
                 resp = await self._client.get(url)
                 self.logger.info("GET %s → %d, %d bytes", url, resp.status_code, len(resp.content or b""))
                 resp.raise_for_status()
+                timings["download_ms"] += (time.perf_counter() - t0) * 1000
 
                 # Extract text
-                text = await self.extract_pdf_text(resp.content)
+                t0 = time.perf_counter()
+                text, document = await self.extract_pdf_document(resp.content)
+                timings["parse_ms"] += (time.perf_counter() - t0) * 1000
                 if not text:
                     self.logger.info("Empty text extracted from %s, continuing", url)
                     continue
 
-                self.logger.info("Extracted %d chars for DOI %s from %s", len(text), doi, url)
-                return text
+                self.logger.info(
+                    "Extracted %d chars, %d sections for DOI %s from %s",
+                    len(text), len(document["sections"]), doi, url,
+                )
+                return text, document
 
             except Exception as exc:
                 self.logger.info("PDF candidate %s failed: %s", url, exc)
@@ -167,19 +233,3 @@ class Extractor:
         # 4) If we reach here, all candidates failed
         self.logger.error("All PDF candidates failed for DOI %s", doi)
         return None
-
-    def _normalize_text(self, text: str) -> str:
-        # Normalize line breaks
-        text = text.replace('\r\n', '\n')
-        # Remove page numbers or isolated digits
-        text = re.sub(r'(?m)^\s*\d+\s*$', '', text)
-        # Collapse multiple empty lines to two
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        # Merge broken lines within paragraphs
-        text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
-        # Remove excessive spaces
-        text = re.sub(r' {2,}', ' ', text)
-        # Insert space between lowercase/digit ⇄ uppercase transitions
-        text = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', text)
-        # Strip leading/trailing whitespace
-        return text.strip()
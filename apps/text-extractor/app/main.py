@@ -3,6 +3,11 @@ import logging
 
 from common.messaging import RabbitConsumer, RabbitPublisher
 from common.job_store import JobStore
+from common.metrics import start_metrics_server
+from common.tracing import setup_tracing
+from common.politeness import Politeness, parse_spacing
+from common.proxy_pool import ProxyPool
+from common.rate_limit import RateLimiter
 
 from config import settings
 from oxylabs_scraper import OxylabsScraper
@@ -15,13 +20,31 @@ if __name__ == "__main__":
         format="%(asctime)s %(levelname)s %(name)s %(message)s",
     )
 
-    consumer = RabbitConsumer(settings.RABBITMQ_URL)
-    publisher = RabbitPublisher(settings.RABBITMQ_URL)
+    start_metrics_server(settings.METRICS_PORT)
+    setup_tracing("text-extractor")
+
     job_store = JobStore(settings.REDIS_URL)
+    consumer = RabbitConsumer(settings.RABBITMQ_URL, job_store=job_store)
+    publisher = RabbitPublisher(settings.RABBITMQ_URL)
+    rate_limiter = RateLimiter(settings.REDIS_URL)
+    politeness = Politeness(
+        settings.REDIS_URL, parse_spacing(settings.POLITENESS_SPACING), jitter=settings.POLITENESS_JITTER
+    )
 
+    geo_countries = [g.strip() for g in settings.OXYLABS_GEOS.split(",") if g.strip()]
     oxylabs_scraper = OxylabsScraper(
         max_retries=3,
         backoff_factor=2.0,
+        geo_countries=geo_countries,
+        rate_limiter=rate_limiter,
+        proxy_pool=ProxyPool(
+            settings.REDIS_URL, "oxylabs:publishers", geo_countries,
+            half_life_s=settings.PROXY_HALF_LIFE_S,
+            cooldown_s=settings.PROXY_COOLDOWN_S,
+            max_cooldown_s=settings.PROXY_MAX_COOLDOWN_S,
+        ),
+        politeness=politeness,
+        parse_threads=settings.PDF_PARSE_THREADS,
     )
 
     extractor = Extractor(
@@ -30,6 +53,8 @@ if __name__ == "__main__":
         crossref_api_url=settings.CROSSREF_API_URL,
         crossref_mailto=settings.CROSSREF_MAILTO,
         scraper= oxylabs_scraper,
+        rate_limiter=rate_limiter,
+        politeness=politeness,
     )
 
     service = TextExtractorService(
@@ -41,6 +66,8 @@ if __name__ == "__main__":
         output_queue=settings.OUTPUT_QUEUE,
         output_queue_2=settings.OUTPUT_QUEUE_2,
         prefetch_count=settings.PREFETCH_COUNT,
+        concurrency=settings.CONCURRENCY,
+        max_retries=settings.MAX_RETRIES,
     )
 
     asyncio.run(service.start())
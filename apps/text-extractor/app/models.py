@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class Article(BaseModel):
     title: str
@@ -9,10 +9,18 @@ class Article(BaseModel):
     doi: Optional[str]
     verified: bool
     open_access: bool
+    crossref_links: Optional[List[str]] = None
+    crossref_pdf_url: Optional[str] = None
+    license: Optional[str] = None
     text: Optional[str] = None
+    # Section/page spans into `text`, see structure.py
+    document: Optional[Dict[str, Any]] = None
 
 
-class Job(BaseModel):
+class ArticleTask(BaseModel):
     job_id: str
     author: str
-    results: List[Article]
+    index: int
+    article: Article
+    # "interactive"/"bulk"; sets the message priority of the analysis requests
+    lane: Optional[str] = None
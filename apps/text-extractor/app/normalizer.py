@@ -0,0 +1,222 @@
+"""
+Clean-up of pdfplumber page text, one page at a time.
+
+Page numbers and running headers/footers are dropped line by line, the
+page is repaired only when it needs it (literal \\uXXXX escapes,
+latin-1/cp1252 mojibake; plain ASCII pages skip all of it), ligatures and
+odd spaces are mapped, hyphenated line breaks are joined and wrapped lines
+are merged into paragraphs. Paragraphs are separated by a blank line,
+like the old regex chain produced, and a paragraph may continue across a
+page break. Only one page plus the finished paragraphs are held at a time.
+
+Lines that look like section headings ("2. Methods", "References") are
+kept as paragraphs of their own so structure.py can split the document.
+"""
+import re
+from collections import Counter
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+_ESCAPED = re.compile(r"\\u([0-9a-fA-F]{4})")
+
+# A UTF-8 lead byte shown as latin-1/cp1252 followed by continuation bytes,
+# e.g. "Ã©" (é) or "â€”" (—). Only these runs are re-decoded.
+_CP1252_CONT = "€‚ƒ„…†‡ˆ‰Š‹ŒŽ" \
+               "‘’“”•–—˜™š›œžŸ"
+_MOJIBAKE = re.compile(f"[Â-ô][\u0080-¿{_CP1252_CONT}]+")
+
+# Ligatures, soft hyphen and exotic spaces. A regex over the few affected
+# characters is much cheaper than str.translate on non-ASCII text.
+_CHAR_MAP = {
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl",
+    "\ufb05": "st", "\ufb06": "st",
+    "\u00ad": "",                                    # soft hyphen
+    "\u200b": "", "\ufeff": "",                      # zero-width space, BOM
+    "\u00a0": " ", "\u2002": " ", "\u2003": " ", "\u2009": " ", "\u202f": " ", "\u3000": " ",
+}
+_ODD_CHARS = re.compile(f"[{''.join(_CHAR_MAP)}]")
+
+# Lower→upper boundaries ("wordsRun" → "words Run") and space runs. Patterns
+# lead with the rarer character and check context with a lookbehind, which
+# lets the regex engine skip ahead instead of trying every position.
+_CAMEL = re.compile(r"([A-Z])(?<=[a-z0-9][A-Z])")
+_SPACES = re.compile(r"  +")
+_DIGITS = re.compile(r"\d+")
+# "exam-\nple" → "example"; only a letter-hyphen-newline-lowercase break is joined
+_HYPHEN_BREAK = re.compile(r"-\n(?<=[^\W\d_]-\n)(?=[a-zß-öø-ÿ])")
+_PARAGRAPH_BREAK = re.compile(r"\n\n+")
+
+# Optional "2.", "3.1" or "IV." numbering, then a well-known section name
+_HEADING = re.compile(
+    r"(?:(\d{1,2}(?:\.\d{1,2})*|[IVX]{1,4})\.?\s+)?"
+    r"(abstract|summary|introduction|background|related work|literature review|preliminaries|"
+    r"materials and methods|methods?|methodology|experiments?|experimental setup|evaluation|"
+    r"results(?: and discussion)?|discussion|conclusions?(?: and future work)?|future work|limitations|"
+    r"acknowledge?ments?|funding|references|bibliography|works cited|literature cited|"
+    r"appendix(?: [a-z])?|appendices|supplementary materials?)\s*[:.]?$",
+    re.IGNORECASE,
+)
+HEADING_MAX_LEN = 60
+# A line ending like this is cut mid-sentence: "... summarised in the cited", "such as,"
+_MID_SENTENCE = re.compile(r"(?:^|\s)[a-z]+,?$|[,(\-–—]$")
+SECTION_KINDS = {
+    "abstract": "abstract", "summary": "abstract",
+    "acknowledgment": "acknowledgements", "acknowledgement": "acknowledgements",
+    "acknowledgments": "acknowledgements", "acknowledgements": "acknowledgements", "funding": "acknowledgements",
+    "references": "references", "bibliography": "references", "works cited": "references",
+    "literature cited": "references",
+    "appendices": "appendix", "supplementary material": "appendix", "supplementary materials": "appendix",
+}
+
+HEADER_LINES = 2          # lines at the top and bottom of a page that may be running headers/footers
+HEADER_MIN_PAGES = 3
+HEADER_RATIO = 0.5        # ...if the same line (digits ignored) appears on at least half the pages
+
+
+def _unescape(match: "re.Match") -> str:
+    return chr(int(match.group(1), 16))
+
+
+def _redecode(match: "re.Match") -> str:
+    run = match.group(0)
+    try:
+        return run.encode("cp1252").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    try:
+        return run.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return run
+
+
+def repair_encoding(text: str) -> str:
+    """Undo literal \\uXXXX escapes and UTF-8-read-as-latin-1 mojibake; valid text is left alone."""
+    if "\\u" in text:
+        text = _ESCAPED.sub(_unescape, text)
+    if not text.isascii() and _MOJIBAKE.search(text):
+        text = _MOJIBAKE.sub(_redecode, text)
+    return text
+
+
+def _map_char(match: "re.Match") -> str:
+    return _CHAR_MAP[match.group(0)]
+
+
+def _join_lines(paragraph: str) -> str:
+    text = _CAMEL.sub(r" \1", paragraph.strip("\n").replace("\n", " "))
+    return _SPACES.sub(" ", text) if "  " in text else text
+
+
+def heading_kind(line: str) -> Optional[str]:
+    """Section kind ("abstract", "body", "references", ...) when `line` is a heading, else None."""
+    if len(line) > HEADING_MAX_LEN:
+        return None
+    match = _HEADING.match(line)
+    if not match:
+        return None
+    # Unnumbered, a heading is capitalized and has no full stop: "references."
+    # or "summary" is the end of a wrapped sentence
+    if not match.group(1) and (not line[0].isupper() or line.endswith(".")):
+        return None
+    name = match.group(2).lower()
+    return SECTION_KINDS.get(name) or ("appendix" if name.startswith("appendix") else "body")
+
+
+def _mark(line: str, previous: str, before: str) -> str:
+    """
+    `line` as it goes into the page text; `previous` is the line right
+    above it, `before` the last non-blank one ("" at the top of the page).
+    """
+    # Bare page numbers become blank lines, as before
+    if line.isdigit():
+        return ""
+    # A heading stands alone: blank line (or page top) above, not the tail of a sentence
+    if not previous and not _MID_SENTENCE.search(before) and heading_kind(line):
+        return f"\n{line}\n"
+    if line[:8] in ("Abstract", "ABSTRACT"):
+        # "Abstract—We propose ..." starts a paragraph even without a blank line before it
+        return f"\n{line}"
+    return line
+
+
+def _signature(line: str) -> str:
+    # Running heads usually differ only in the page number
+    return _DIGITS.sub("#", line)
+
+
+def repeated_edge_lines(pages: Sequence[str]) -> Set[str]:
+    """Signatures of lines that recur at the top/bottom of many pages."""
+    if len(pages) < HEADER_MIN_PAGES:
+        return set()
+    counts: Counter = Counter()
+    for page in pages:
+        content = [line.strip() for line in page.splitlines() if line.strip()]
+        edges = content[:HEADER_LINES] + content[-HEADER_LINES:]
+        counts.update({_signature(line) for line in edges})
+    threshold = max(HEADER_MIN_PAGES, HEADER_RATIO * len(pages))
+    return {sig for sig, n in counts.items() if n >= threshold}
+
+
+def _clean_page(page: str, running: Set[str]) -> str:
+    lines = [line.strip() for line in page.splitlines()]
+    if running:
+        content = [i for i, line in enumerate(lines) if line]
+        edges = {i for i in content[:HEADER_LINES] + content[-HEADER_LINES:] if _signature(lines[i]) in running}
+        # A page whose every line "repeats" (short documents, one-line pages)
+        # is content, not running heads; keep it whole
+        if any(i not in edges and not lines[i].isdigit() for i in content):
+            for i in edges:
+                lines[i] = ""
+    marked, previous, before = [], "", ""
+    for line in lines:
+        marked.append(_mark(line, previous, before))
+        previous = "" if line.isdigit() else line
+        before = previous or before
+    page = repair_encoding("\n".join(marked))
+    if not page.isascii():
+        page = _ODD_CHARS.sub(_map_char, page)
+    return page
+
+
+def _split_tail(chunk: str) -> Tuple[Optional[str], str]:
+    """(everything before the last line, last line) of an open paragraph; a trailing newline stays on the tail."""
+    cut = chunk.rfind("\n", 0, len(chunk) - 1)
+    return (chunk[:cut], chunk[cut + 1:]) if cut >= 0 else (None, chunk)
+
+
+def iter_paragraphs(pages: Sequence[str]) -> Iterator[Tuple[int, int, str]]:
+    """Yield (first page, last page, paragraph) in reading order."""
+    running = repeated_edge_lines(pages)
+    # The last paragraph of a page may run on onto the next one. Only its last
+    # line is carried into the next page's text (enough for hyphen joins and
+    # paragraph breaks); the rest waits in `held` and is joined once, so a
+    # paragraph spanning many pages isn't copied and re-scanned per page.
+    held: List[str] = []
+    tail, carry_page = "", 0
+    for page_no, page in enumerate(pages):
+        text = f"{tail}\n{_clean_page(page, running)}"
+        if "-\n" in text:
+            text = _HYPHEN_BREAK.sub("", text)
+        chunks = _PARAGRAPH_BREAK.split(text)
+        head, tail = _split_tail(chunks.pop())
+        for chunk in chunks:
+            if held:
+                held.append(chunk)
+                chunk, held = "\n".join(held), []
+            if chunk.strip():
+                yield carry_page, page_no, _join_lines(chunk)
+            carry_page = page_no
+        if head is not None:
+            held.append(head)
+    held.append(tail)
+    carry = "\n".join(held)
+    if carry.strip():
+        yield carry_page, max(len(pages) - 1, 0), _join_lines(carry)
+
+
+def normalize_pages(pages: Iterable[str]) -> str:
+    return "\n\n".join(paragraph for _, _, paragraph in iter_paragraphs(list(pages)))
+
+
+def normalize_text(text: str) -> str:
+    """Single-string entry point (pages separated by form feeds, if any)."""
+    return normalize_pages(text.split("\f"))
@@ -1,18 +1,22 @@
 import os
-import random
 import asyncio
 import logging
 from typing import List, Optional
 
 import httpx
 
+from common.metrics import UPSTREAM_SECONDS, timed
+from common.politeness import Politeness
+from common.proxy_pool import BURNED, FAILED, OK, ProxyPool
+from common.rate_limit import RateLimiter
+
 
 class OxylabsScraper:
     """
     Oxylabs Realtime Scraper ile:
-    - İnsan davranışını taklit eden gecikmeler
+    - İnsan davranışını taklit eden gecikmeler (hedef domain + geo başına, Politeness)
     - CAPTCHA tespiti ve retry
-    - Coğrafi lokasyon rotasyonu
+    - Coğrafi lokasyon rotasyonu (proxy_pool varsa başarı oranına göre)
     Endpoint: POST https://realtime.oxylabs.io/v1/queries
     """
 
@@ -21,6 +25,9 @@ class OxylabsScraper:
         max_retries: int = 3,
         backoff_factor: float = 2.0,
         geo_countries: Optional[List[str]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        politeness: Optional[Politeness] = None,
     ):
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -29,10 +36,13 @@ class OxylabsScraper:
         if not self.username or not self.password:
             raise RuntimeError("OXY_USERNAME or OXY_PASSWORD env vars are not set")
 
-        self.endpoint = "https://realtime.oxylabs.io/v1/queries"
+        self.endpoint = os.getenv("OXYLABS_ENDPOINT", "https://realtime.oxylabs.io/v1/queries")
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
         self.geo_countries = geo_countries or ["US", "DE", "GB", "FR", "CA"]
+        self.rate_limiter = rate_limiter
+        self.proxy_pool = proxy_pool
+        self.politeness = politeness or Politeness()
 
         self.headers = {
             "User-Agent": (
@@ -51,18 +61,25 @@ class OxylabsScraper:
             follow_redirects=True,
         ) as client:
 
+            tried: List[str] = []
             for attempt in range(1, self.max_retries + 1):
-                geo = self.geo_countries[(attempt - 1) % len(self.geo_countries)]
+                geo = await self._pick_geo(attempt, tried)
+                tried.append(geo)
                 payload = {
                     "url": url,
                     "source": "text-extractor",
                     "geo_location": geo,
                 }
 
-                await asyncio.sleep(random.uniform(1, 3))
+                await self.politeness.wait(url, f"oxylabs:{geo}")
                 self.logger.debug(f"[Oxylabs] Attempt {attempt} for {url} (geo={geo})")
 
-                resp = await client.post(self.endpoint, json=payload)
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire("oxylabs")
+                with timed(UPSTREAM_SECONDS, upstream="oxylabs"):
+                    resp = await client.post(self.endpoint, json=payload)
+                if self.rate_limiter:
+                    await self.rate_limiter.observe("oxylabs", resp.status_code, resp.headers)
                 try:
                     resp.raise_for_status()
                 except httpx.HTTPStatusError as e:
@@ -74,14 +91,27 @@ class OxylabsScraper:
                 html = data.get("results", [{}])[0].get("content")
                 if not html:
                     self.logger.warning("[Oxylabs] Empty content, retrying...")
-                    await asyncio.sleep(self.backoff_factor ** attempt)
+                    await self._report(geo, FAILED)
+                    await self.politeness.back_off(url, f"oxylabs:{geo}", self.backoff_factor ** attempt)
                     continue
 
                 if "recaptcha" in html.lower():
-                    self.logger.warning("[Oxylabs] CAPTCHA detected, retrying...")
-                    await asyncio.sleep(self.backoff_factor ** attempt)
+                    self.logger.warning("[Oxylabs] CAPTCHA detected (geo=%s), retrying...", geo)
+                    await self._report(geo, BURNED)
+                    # Only this geo sits out; the next attempt goes through another one
+                    await self.politeness.back_off(url, f"oxylabs:{geo}", self.backoff_factor ** attempt)
                     continue
 
+                await self._report(geo, OK)
                 return html
 
         raise RuntimeError(f"Oxylabs failed to fetch HTML for {url}")
+
+    async def _pick_geo(self, attempt: int, tried: List[str]) -> str:
+        if self.proxy_pool is None:
+            return self.geo_countries[(attempt - 1) % len(self.geo_countries)]
+        return await self.proxy_pool.pick(exclude=tried)
+
+    async def _report(self, geo: str, outcome: str):
+        if self.proxy_pool is not None:
+            await self.proxy_pool.record(geo, outcome)
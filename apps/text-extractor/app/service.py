@@ -1,13 +1,14 @@
 import asyncio
 import logging
-import json
+import httpx
 from datetime import datetime
 from typing import Any
 
-from common.messaging import RabbitConsumer, RabbitPublisher
+from common.messaging import RabbitConsumer, RabbitPublisher, PoisonMessage
 from common.job_store import JobStore
+from common.lanes import lane_priority
 
-from models import Job, Article
+from models import ArticleTask
 from extractor import Extractor
 
 class TextExtractorService:
@@ -21,6 +22,8 @@ class TextExtractorService:
         output_queue: str,
         output_queue_2: str,
         prefetch_count: int = 1,
+        concurrency: int = 1,
+        max_retries: int = 5,
     ):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.consumer = consumer
@@ -31,53 +34,87 @@ class TextExtractorService:
         self.output_queue = output_queue
         self.output_queue_2 = output_queue_2
         self.prefetch_count = prefetch_count
+        self.concurrency = concurrency
+        self.max_retries = max_retries
 
     async def start(self) -> None:
         await self.consumer.connect()
         await self.publisher.connect()
         await self.consumer.consume(
-            self.input_queue, self._on_message, prefetch_count=self.prefetch_count
+            self.input_queue, self._on_message,
+            prefetch_count=self.prefetch_count, concurrency=self.concurrency,
+            max_retries=self.max_retries, on_give_up=self._on_give_up
         )
         self.logger.info("TextExtractorService started, waiting for messages…")
-        await asyncio.Event().wait()
+        await self.consumer.run_until_stopped()
 
     async def _on_message(self, payload: dict) -> None:
         try:
-            job = Job.parse_obj(payload)
+            task = ArticleTask.parse_obj(payload)
         except Exception as e:
-            self.logger.error("Invalid payload: %s", e)
-            return
+            raise PoisonMessage(f"Invalid payload: {e}") from e
 
+        job_id, art = task.job_id, task.article
         now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
-        await self.job_store.set_field(job.job_id, "text_extractor_start_time", now_str)
-        await self.job_store.set_field(job.job_id, "state", "Extract service started.")
-        self.logger.info("Processing job %s", job.job_id)
-
-        for art in job.results:
-            if not (art.doi and art.verified and art.open_access):
-                continue
+        if await self.job_store.set_field_if_missing(job_id, "text_extractor_start_time", now_str):
+            await self.job_store.set_field(job_id, "state", "Extract service started.")
+        self.logger.info("Processing job %s article %d", job_id, task.index)
 
+        if art.doi and art.verified and art.open_access:
+            # Transient Unpaywall/Crossref errors propagate so the consumer retries with backoff
+            timings: dict = {}
             try:
-                text = await self.extractor.get_text_for_doi(art.doi)
-                art.text = text
-                self.logger.info("Extracted text for DOI %s", art.doi)
-                self.logger.info(
-                    "─── Extracted full text for DOI %s ───\n%s\n────────────────────────────",
-                    art.doi,
-                    text or "<empty>",
+                extracted = await self.extractor.get_document_for_doi(
+                    art.doi, art.crossref_links, art.crossref_pdf_url, timings=timings
                 )
-            except Exception as ex:
-                self.logger.exception("Error extracting DOI %s: %s", art.doi, ex)
+            except httpx.HTTPStatusError as ex:
+                code = ex.response.status_code
+                if code >= 500 or code == 429:
+                    raise
+                self.logger.warning("No OA record for DOI %s (%d), skipping extraction", art.doi, code)
+                extracted = None
+            text, document = extracted or (None, None)
+            art.text, art.document = text, document
+            await self.job_store.record_timing(
+                job_id, self.input_queue, "extract", index=task.index,
+                outcome="text" if text else "no_text", **timings
+            )
+            self.logger.info("Extracted text for DOI %s", art.doi)
+            self.logger.info(
+                "─── Extracted full text for DOI %s ───\n%s\n────────────────────────────",
+                art.doi,
+                text or "<empty>",
+            )
+
+        await self._publish_article(task)
 
+    async def _on_give_up(self, payload: dict) -> None:
+        # Out of retries: hand the article on without text so the job can still finish
         try:
-            #await self.publisher.publish(self.output_queue, job.dict())
-            await self.job_store.set_field(job.job_id, "job_data", json.dumps(job.dict()))
-            await self.publisher.publish(self.output_queue, {"job_id": job.job_id})
-            await self.publisher.publish(self.output_queue_2, {"job_id": job.job_id})
-            now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
-            await self.job_store.set_field(job.job_id, "text_extractor_end_time", now_str)
-            await self.job_store.set_field(job.job_id, "state", "Extract service finished successfully.")
-            self.logger.info("Job %s done, published to %s", job.job_id, self.output_queue)
+            task = ArticleTask.parse_obj(payload)
+        except Exception:
+            return
+        self.logger.error("Giving up on text for job %s article %d (DOI %s)", task.job_id, task.index, task.article.doi)
+        task.article.text = None
+        task.article.document = None
+        try:
+            await self._publish_article(task)
         except Exception as ex:
-            self.logger.exception("Publish failed for job %s: %s", job.job_id, ex)
-            await self.job_store.set_field(job.job_id, "state", "Extract service error.")
+            self.logger.exception("Publish failed for job %s article %d: %s", task.job_id, task.index, ex)
+            await self.job_store.set_field(task.job_id, "state", "Extract service error.")
+
+    async def _publish_article(self, task: ArticleTask) -> None:
+        job_id = task.job_id
+        await self.job_store.set_article(job_id, task.index, task.article.dict())
+        message = {"job_id": job_id, "index": task.index, "lane": task.lane}
+        priority = lane_priority(task.lane)
+        await asyncio.gather(
+            self.publisher.publish(self.output_queue, message, priority=priority),
+            self.publisher.publish(self.output_queue_2, message, priority=priority),
+        )
+
+        if await self.job_store.mark_article_done(job_id, "text_extractor", task.index):
+            now_str = datetime.now().strftime("%d-%m-%Y - %H:%M:%S")
+            await self.job_store.set_field(job_id, "text_extractor_end_time", now_str)
+            await self.job_store.set_field(job_id, "state", "Extract service finished successfully.")
+            self.logger.info("Job %s done, all articles published to %s", job_id, self.output_queue)
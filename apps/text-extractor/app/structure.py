@@ -0,0 +1,99 @@
+"""
+Structured view of an extracted paper.
+
+The normalized text is stored once (Article.text); the document only
+holds character spans into it, so it stays small next to the text:
+
+    {
+        "title": "On the scalability of ...",
+        "sections": [
+            {"heading": "Abstract", "kind": "abstract", "span": [120, 980], "pages": [0, 0]},
+            {"heading": "1. Introduction", "kind": "body", "span": [997, 5120], "pages": [0, 1]},
+            {"heading": "References", "kind": "references", "span": [40210, 47800], "pages": [9, 10]},
+        ],
+        "pages": [[0, 3900], [3902, 7750], ...],           # span of each page, null if empty
+        "reference_count": 42,
+    }
+
+Section kinds are front (anything before the first heading), abstract,
+body, acknowledgements, references and appendix; common/document.py
+slices the parts a consumer asks for back out of the text.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from normalizer import heading_kind
+
+TITLE_MAX_LEN = 250
+# Shorter "Abstract ..." paragraphs are more likely a title ("Abstract algebra for ...")
+ABSTRACT_MIN_LEN = 100
+# "Abstract—We propose ..." / "ABSTRACT: ..." run into the first paragraph
+_INLINE_ABSTRACT = re.compile(r"(abstract|summary)\s*(?:[:.—–-]\s*|\s+)", re.IGNORECASE)
+# "[12] Author ..." or "12. Author ..." at the start of a reference
+_REFERENCE_START = re.compile(r"(?:^|(?<=\s))(?:\[\d{1,3}\]|\d{1,3}\.)\s+(?=[A-Z])")
+
+
+def _count_references(text: str) -> int:
+    return len(_REFERENCE_START.findall(text))
+
+
+def build_document(
+    paragraphs: Iterable[Tuple[int, int, str]], title: Optional[str] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Join (first page, last page, paragraph) into the article text and its
+    section map. `title` (e.g. from the PDF metadata) wins over the guess
+    from the first paragraph.
+    """
+    parts: List[str] = []
+    pages: Dict[int, List[int]] = {}
+    sections: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    offset = 0
+
+    for first, last, paragraph in paragraphs:
+        start, end = offset, offset + len(paragraph)
+        parts.append(paragraph)
+        offset = end + 2
+        for page in (first, last):
+            pages.setdefault(page, [start, end])[1] = end
+
+        kind = heading_kind(paragraph)
+        if kind:
+            current = {"heading": paragraph, "kind": kind, "span": [offset, offset], "pages": [first, last]}
+            sections.append(current)
+            continue
+
+        if current is None or current["kind"] == "front":
+            inline = _INLINE_ABSTRACT.match(paragraph)
+            if inline and len(paragraph) >= ABSTRACT_MIN_LEN:
+                current = {
+                    "heading": inline.group(1), "kind": "abstract",
+                    "span": [start + inline.end(), end], "pages": [first, last],
+                }
+                sections.append(current)
+                continue
+        if current is None:
+            if title is None and first == 0 and len(paragraph) <= TITLE_MAX_LEN and not paragraph.endswith("."):
+                title = paragraph
+            current = {"heading": None, "kind": "front", "span": [start, end], "pages": [first, last]}
+            sections.append(current)
+            continue
+
+        if current["span"][0] == current["span"][1]:
+            current["span"][0] = start
+            current["pages"][0] = first
+        current["span"][1] = end
+        current["pages"][1] = last
+
+    text = "\n\n".join(parts)
+    # Pages without any text (scans, blank pages) get null
+    page_spans = [pages.get(n) for n in range(max(pages) + 1)] if pages else []
+    refs = [s for s in sections if s["kind"] == "references"]
+    document = {
+        "title": title,
+        "sections": [s for s in sections if s["span"][1] > s["span"][0]],
+        "pages": page_spans,
+        "reference_count": sum(_count_references(text[s["span"][0]:s["span"][1]]) for s in refs),
+    }
+    return text, document
@@ -0,0 +1,153 @@
+import os
+import sys
+
+import pytest
+
+# The service's modules are top-level inside app/, as the Dockerfile copies them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from normalizer import heading_kind, iter_paragraphs, repair_encoding  # noqa: E402
+from structure import build_document  # noqa: E402
+
+
+@pytest.mark.parametrize("line,kind", [
+    ("Abstract", "abstract"),
+    ("ABSTRACT", "abstract"),
+    ("1. Introduction", "body"),
+    ("2.1 Methods", "body"),
+    ("IV. Results and Discussion", "body"),
+    ("3 experiments", "body"),
+    ("References", "references"),
+    ("Acknowledgements:", "acknowledgements"),
+    ("Appendix A", "appendix"),
+    # the end of a hard-wrapped sentence, not a heading
+    ("references.", None),
+    ("experiments.", None),
+    ("summary", None),
+    ("References.", None),
+    ("Results of the first experiment", None),
+])
+def test_heading_kind(line, kind):
+    assert heading_kind(line) == kind
+
+
+def paragraphs(*pages):
+    return [text for _, _, text in iter_paragraphs(list(pages))]
+
+
+def test_hyphenated_line_break_is_joined():
+    assert paragraphs("An exam-\nple of wrapping.") == ["An example of wrapping."]
+
+
+def test_hyphen_before_a_capital_or_digit_is_kept():
+    assert paragraphs("A well-\nKnown case, pages 2-\n3.") == ["A well- Known case, pages 2- 3."]
+
+
+def test_hyphenated_break_across_pages():
+    assert paragraphs("The exam-", "ple continues.") == ["The example continues."]
+
+
+def test_ligatures_and_odd_spaces_are_mapped():
+    assert paragraphs("\ufb01nd the e\ufb00ect,\u00a0co\u00adoperate") == ["find the effect, cooperate"]
+
+
+def test_mojibake_is_repaired():
+    assert repair_encoding("caf\u00c3\u00a9 \u00e2\u20ac\u201d done") == "caf\u00e9 \u2014 done"
+    assert repair_encoding("caf\\u00e9") == "caf\u00e9"
+
+
+@pytest.mark.parametrize("text", ["caf\u00e9 \u2014 na\u00efve Z\u00fcrich \u00b11 \u201cquoted\u201d", "plain ascii"])
+def test_valid_text_is_left_alone(text):
+    assert repair_encoding(text) == text
+
+
+def test_running_headers_and_page_numbers_are_dropped():
+    pages = [
+        f"Journal of Things 12 ({i})\n{word} opens this page.\n{word} closes it.\n\n{i + 1}"
+        for i, word in enumerate(["Alpha", "Beta", "Gamma", "Delta"])
+    ]
+    assert paragraphs(*pages) == [
+        "Alpha opens this page. Alpha closes it.",
+        "Beta opens this page. Beta closes it.",
+        "Gamma opens this page. Gamma closes it.",
+        "Delta opens this page. Delta closes it.",
+    ]
+
+
+def test_short_document_where_every_line_repeats_keeps_its_text():
+    assert paragraphs("One line.", "One line.", "One line.") == ["One line. One line. One line."]
+    assert paragraphs("Page 1\n1", "Page 2\n2", "Page 3\n3") == ["Page 1", "Page 2", "Page 3"]
+
+
+def test_wrapped_section_word_is_not_a_heading():
+    page = (
+        "Earlier approaches are summarised in the cited\n"
+        "references.\n"
+        "Our method improves on them."
+    )
+    assert paragraphs(page) == [
+        "Earlier approaches are summarised in the cited references. Our method improves on them."
+    ]
+
+
+def test_section_word_after_a_blank_line_ending_mid_sentence():
+    page = "Earlier approaches are summarised in the cited\n\nReferences\nOur method improves on them."
+    assert "References" not in paragraphs(page)
+
+
+def test_standalone_headings_get_their_own_paragraph():
+    page = (
+        "A Study of Things\n"
+        "\n"
+        "Abstract\n"
+        "We study things.\n"
+        "\n"
+        "1. Introduction\n"
+        "Things matter.\n"
+    )
+    assert paragraphs(page) == [
+        "A Study of Things", "Abstract", "We study things.", "1. Introduction", "Things matter.",
+    ]
+
+
+def test_heading_at_the_top_of_a_page():
+    assert paragraphs("Results end here.", "References\n[1] A. Author. A paper.") == [
+        "Results end here.", "References", "[1] A. Author. A paper.",
+    ]
+
+
+def test_build_document_spans():
+    pages = [
+        "A Study of Things\n\nAbstract\nWe study things.\n\n1. Introduction\nThings matter.",
+        "More on things.\n\nReferences\n[1] A. Author. A paper.\n[2] B. Author. Another.",
+    ]
+    text, document = build_document(iter_paragraphs(pages))
+
+    def section(kind):
+        return next(s for s in document["sections"] if s["kind"] == kind)
+
+    assert document["title"] == "A Study of Things"
+    assert [s["kind"] for s in document["sections"]] == ["front", "abstract", "body", "references"]
+    assert text[slice(*section("abstract")["span"])] == "We study things."
+    body = section("body")
+    assert body["heading"] == "1. Introduction"
+    # the paragraph runs on across the page break
+    assert text[slice(*body["span"])] == "Things matter. More on things."
+    assert body["pages"] == [0, 1]
+    assert text[slice(*section("references")["span"])].startswith("[1] A. Author.")
+    assert document["reference_count"] == 2
+    for start, end in document["pages"]:
+        assert text[start:end]
+    assert document["pages"][1][1] == len(text)
+
+
+def test_wrapped_section_word_keeps_the_body():
+    pages = [
+        "1. Introduction\n"
+        "Earlier approaches are summarised in the cited\n"
+        "references.\n"
+        "Our method improves on them."
+    ]
+    text, document = build_document(iter_paragraphs(pages))
+    assert [s["kind"] for s in document["sections"]] == ["body"]
+    assert text[slice(*document["sections"][0]["span"])].endswith("Our method improves on them.")
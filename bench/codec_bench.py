@@ -0,0 +1,103 @@
+"""
+Compare payload codecs on the shapes that actually cross the pipeline.
+
+    PYTHONPATH=. python bench/codec_bench.py [--text-kb 200] [--repeat 200]
+
+For each stage payload it prints encoded size and encode/decode time per
+codec. Codecs whose optional dependency isn't installed are skipped.
+"""
+import argparse
+import random
+import string
+import time
+
+from common.codec import Codec, msgpack, orjson, zstandard
+
+
+def fake_text(kb: int) -> str:
+    rnd = random.Random(42)
+    words = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(2, 10))) for _ in range(2000)]
+    out, size = [], 0
+    while size < kb * 1024:
+        w = rnd.choice(words)
+        out.append(w)
+        size += len(w) + 1
+    return " ".join(out)
+
+
+def fake_article(idx: int, text: str | None = None) -> dict:
+    return {
+        "title": f"A study of things number {idx}",
+        "year": 2020,
+        "link": f"https://example.org/paper/{idx}.pdf",
+        "citations": idx * 3,
+        "doi": f"10.1234/example.{idx}",
+        "verified": True,
+        "open_access": True,
+        "crossref_links": [f"https://example.org/full/{idx}", f"https://example.org/pdf/{idx}"],
+        "crossref_pdf_url": f"https://example.org/pdf/{idx}",
+        "license": "http://creativecommons.org/licenses/by/4.0/",
+        "text": text,
+    }
+
+
+def stage_payloads(text_kb: int) -> dict:
+    text = fake_text(text_kb)
+    return {
+        "doi-resolve message": {"job_id": "x" * 32, "author": "Jane Doe", "index": 7, "article": fake_article(7)},
+        "analysis message": {"job_id": "x" * 32, "index": 7},
+        "article blob (Redis)": fake_article(7, text),
+        "legacy job_data (50 articles)": {
+            "job_id": "x" * 32,
+            "author": "Jane Doe",
+            "results": [fake_article(i, text) for i in range(50)],
+        },
+    }
+
+
+def codecs() -> dict:
+    out = {"json": Codec("json")}
+    if orjson is not None:
+        out["orjson"] = Codec("orjson")
+    if msgpack is not None:
+        out["msgpack"] = Codec("msgpack")
+    if zstandard is not None:
+        base = "orjson" if orjson is not None else "json"
+        out[f"{base}+zstd"] = Codec(base, compress_threshold=1024)
+        if msgpack is not None:
+            out["msgpack+zstd"] = Codec("msgpack", compress_threshold=1024)
+    return out
+
+
+def bench(codec: Codec, payload: dict, repeat: int) -> tuple[int, float, float]:
+    body, content_type, encoding = codec.encode(payload)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        codec.encode(payload)
+    t1 = time.perf_counter()
+    for _ in range(repeat):
+        codec.decode(body, content_type, encoding)
+    t2 = time.perf_counter()
+    return len(body), (t1 - t0) / repeat * 1e3, (t2 - t1) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--text-kb", type=int, default=200, help="size of each article's extracted text")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    available = codecs()
+    for stage, payload in stage_payloads(args.text_kb).items():
+        print(f"\n{stage}")
+        print(f"  {'codec':<14}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+        baseline = None
+        for name, codec in available.items():
+            size, enc_ms, dec_ms = bench(codec, payload, args.repeat)
+            baseline = baseline or size
+            saved = 100 * (1 - size / baseline)
+            print(f"  {name:<14}{size:>12,}{enc_ms:>12.3f}{dec_ms:>12.3f}   ({saved:.0f}% smaller than json)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Local stand-ins for every external service the pipeline calls: Crossref,
+Unpaywall, Oxylabs (Google Scholar result pages), Writer, Winston and the
+publisher sites that host the PDFs. Responses are deterministic, so the
+DOI resolver verifies every match and the extractor finds a PDF for every
+open-access article.
+
+    PYTHONPATH=. python bench/fake_upstreams.py --port 8900 \\
+        --latency crossref=80:40,winston=1500 --errors unpaywall=0.05:503
+
+Latency is "mean_ms[:jitter_ms]" per upstream, errors "rate[:status]".
+Point the services at it with the environment printed on startup.
+"""
+import argparse
+import asyncio
+import hashlib
+import html
+import json
+import logging
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from aiohttp import web
+
+from bench.fixtures import load_pdf_dir, pdf_corpus
+
+logger = logging.getLogger("bench.fake_upstreams")
+
+UPSTREAMS = ("crossref", "unpaywall", "oxylabs", "writer", "winston", "publisher")
+
+
+@dataclass
+class Fault:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+
+def parse_faults(latency: str = "", errors: str = "") -> Dict[str, Fault]:
+    """Parse "crossref=80:40,winston=1500" and "unpaywall=0.05:503" into per-upstream faults."""
+    faults = {name: Fault() for name in UPSTREAMS}
+    for part in filter(None, (p.strip() for p in latency.split(","))):
+        name, _, value = part.partition("=")
+        mean, _, jitter = value.partition(":")
+        faults[name.strip()].latency_ms = float(mean)
+        faults[name.strip()].jitter_ms = float(jitter or 0)
+    for part in filter(None, (p.strip() for p in errors.split(","))):
+        name, _, value = part.partition("=")
+        rate, _, status = value.partition(":")
+        faults[name.strip()].error_rate = float(rate)
+        faults[name.strip()].error_status = int(status or 503)
+    return faults
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+class FakeUpstreams:
+    def __init__(
+        self,
+        base_url: str,
+        faults: Optional[Dict[str, Fault]] = None,
+        corpus: Optional[Dict[str, bytes]] = None,
+        pages_per_author: int = 2,
+        oa_ratio: float = 0.8,
+        seed: int = 1,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.faults = faults or parse_faults()
+        self.corpus = corpus or pdf_corpus()
+        self.corpus_names = sorted(self.corpus)
+        self.pages_per_author = pages_per_author
+        self.oa_ratio = oa_ratio
+        self.rnd = random.Random(seed)
+        self.requests: Dict[str, int] = {name: 0 for name in UPSTREAMS}
+        self.injected_errors: Dict[str, int] = {name: 0 for name in UPSTREAMS}
+
+    def env(self) -> Dict[str, str]:
+        """Service settings that route every external call here."""
+        return {
+            "CROSSREF_API_URL": f"{self.base_url}/crossref/works",
+            "UNPAYWALL_API_URL": f"{self.base_url}/unpaywall",
+            "OXYLABS_ENDPOINT": f"{self.base_url}/oxylabs/v1/queries",
+            "WRITER_API_URL": f"{self.base_url}/writer",
+            "WINSTON_API_URL": f"{self.base_url}/winston",
+            "OXY_USERNAME": "bench",
+            "OXY_PASSWORD": "bench",
+            "WRITER_API_KEY": "bench",
+            "WINSTON_API_KEY": "bench",
+            "CROSSREF_MAILTO": "bench@example.org",
+            "UNPAYWALL_EMAIL": "bench@example.org",
+            "SCRAPER_SOURCE": "oxylabs",
+            # This host stands in for every publisher; Scholar keeps its real spacing
+            "POLITENESS_SPACING": f"scholar.google.com=2,{urlparse(self.base_url).hostname}=0,*=1",
+        }
+
+    # -- fault injection ---------------------------------------------------
+
+    def _upstream_middleware(self):
+        @web.middleware
+        async def middleware(request: web.Request, handler):
+            name = request.path.strip("/").split("/", 1)[0]
+            if name == "pdf":
+                name = "publisher"
+            fault = self.faults.get(name)
+            if fault is None:
+                return await handler(request)
+            self.requests[name] += 1
+            if fault.latency_ms or fault.jitter_ms:
+                delay = max(0.0, self.rnd.gauss(fault.latency_ms, fault.jitter_ms / 2))
+                await asyncio.sleep(delay / 1000)
+            if fault.error_rate and self.rnd.random() < fault.error_rate:
+                self.injected_errors[name] += 1
+                headers = {"Retry-After": "1"} if fault.error_status in (429, 503) else None
+                return web.Response(status=fault.error_status, text="injected error", headers=headers)
+            return await handler(request)
+        return middleware
+
+    # -- deterministic records ---------------------------------------------
+
+    def doi_for(self, title: str) -> str:
+        return f"10.5555/bench.{_digest(title)[:12]}"
+
+    def pdf_url(self, doi: str) -> str:
+        name = self.corpus_names[int(_digest(doi), 16) % len(self.corpus_names)]
+        return f"{self.base_url}/pdf/{name}.pdf"
+
+    def is_oa(self, doi: str) -> bool:
+        return int(_digest("oa", doi), 16) % 1000 < self.oa_ratio * 1000
+
+    def work(self, title: str, author: str) -> dict:
+        doi = self.doi_for(title)
+        given, _, family = author.rpartition(" ")
+        return {
+            "DOI": doi,
+            "title": [title],
+            "author": [{"given": given, "family": family}, {"given": "Co", "family": "Author"}],
+            "link": [{"URL": self.pdf_url(doi), "content-type": "application/pdf"}],
+            "license": [{"URL": "http://creativecommons.org/licenses/by/4.0/"}],
+            "is-referenced-by-count": int(_digest("cites", doi), 16) % 500,
+        }
+
+    def titles(self, author: str, page: int):
+        for i in range(10):
+            n = page * 10 + i
+            yield n, f"On the scalability of pipeline stage {n} by {author}"
+
+    # -- handlers -----------------------------------------------------------
+
+    async def crossref_search(self, request: web.Request):
+        title = request.query.get("query.bibliographic", "")
+        author = request.query.get("query.author", "")
+        return web.json_response({"message": {"items": [self.work(title, author)] if title else []}})
+
+    async def crossref_work(self, request: web.Request):
+        doi = request.match_info["doi"]
+        # Title isn't recoverable from the DOI; the links are what callers need
+        return web.json_response({"message": {
+            "DOI": doi,
+            "link": [{"URL": self.pdf_url(doi), "content-type": "application/pdf"}],
+        }})
+
+    async def unpaywall(self, request: web.Request):
+        doi = request.match_info["doi"]
+        oa = self.is_oa(doi)
+        best = {"url_for_pdf": self.pdf_url(doi), "url": f"{self.base_url}/landing/{doi}"} if oa else None
+        return web.json_response({"doi": doi, "is_oa": oa, "best_oa_location": best})
+
+    async def oxylabs(self, request: web.Request):
+        body = await request.json()
+        target = urlparse(body.get("url", ""))
+        query = parse_qs(target.query)
+        if target.path == "/citations":
+            return web.json_response({"results": [{"content": self.profile_html(query), "status_code": 200}]})
+        author = query.get("q", [""])[0].replace("+", " ")
+        page = int(query.get("start", ["0"])[0]) // 10
+        items = []
+        if page < self.pages_per_author:
+            for n, title in self.titles(author, page):
+                items.append(
+                    f'<div class="gs_r"><div class="gs_ri">'
+                    f'<h3 class="gs_rt"><a href="#">{html.escape(title)}</a></h3>'
+                    f'<div class="gs_a">{html.escape(author)} - Journal of Benchmarks, {2000 + n % 25}</div>'
+                    f'<div class="gs_fl"><a href="#">Cited by {n * 7 % 300}</a></div>'
+                    f"</div></div>"
+                )
+        content = f"<html><body>{''.join(items)}</body></html>"
+        return web.json_response({"results": [{"content": content, "status_code": 200}]})
+
+    def profile_html(self, query: Dict[str, list]) -> str:
+        """Author search hit (SCHOLAR_MODE=auto) or one citations?user= page of the profile."""
+        if query.get("view_op") == ["search_authors"]:
+            author = query.get("mauthors", [""])[0]
+            user = f"{_digest(author)[:7]}AAAAJ"
+            return (f'<div class="gsc_1usr"><h3 class="gs_ai_name">'
+                    f'<a href="/citations?hl=en&amp;user={user}">{html.escape(author)}</a></h3></div>')
+        user = query.get("user", [""])[0]
+        start = int(query.get("cstart", ["0"])[0])
+        size = int(query.get("pagesize", ["20"])[0])
+        total = self.pages_per_author * 10
+        rows = []
+        for n in range(start, min(total, start + size)):
+            title = f"On the scalability of pipeline stage {n} by profile {user}"
+            rows.append(
+                f'<tr class="gsc_a_tr"><td class="gsc_a_t">'
+                f'<a class="gsc_a_at" href="/citations?view_op=view_citation&amp;user={user}&amp;n={n}">'
+                f'{html.escape(title)}</a></td>'
+                f'<td class="gsc_a_c"><a class="gsc_a_ac">{n * 7 % 300}</a></td>'
+                f'<td class="gsc_a_y"><span class="gsc_a_h">{2000 + n % 25}</span></td></tr>'
+            )
+        return f"<html><body><table>{''.join(rows)}</table></body></html>"
+
+    async def pdf(self, request: web.Request):
+        data = self.corpus.get(request.match_info["name"])
+        if data is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=data, content_type="application/pdf")
+
+    async def landing(self, request: web.Request):
+        doi = request.match_info["doi"]
+        return web.Response(
+            text=f'<html><body><a href="{self.pdf_url(doi)}">Download PDF</a></body></html>',
+            content_type="text/html",
+        )
+
+    async def writer(self, request: web.Request):
+        body = await request.json()
+        score = int(_digest(body.get("input", "")[:200]), 16) % 100 / 100
+        return web.json_response({"label": "fake" if score > 0.7 else "real", "score": score})
+
+    async def winston(self, request: web.Request):
+        body = await request.json()
+        score = int(_digest(body.get("text", "")), 16) % 30
+        return web.json_response({
+            "status": 200,
+            "result": {"score": score, "sourceCounts": 0, "textWordCounts": len(body.get("text", "").split())},
+            "sources": [],
+            "credits_used": 1,
+        })
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._upstream_middleware()], client_max_size=8 * 1024 * 1024)
+        app.router.add_get("/crossref/works", self.crossref_search)
+        app.router.add_get("/crossref/works/{doi:.+}", self.crossref_work)
+        app.router.add_get("/unpaywall/{doi:.+}", self.unpaywall)
+        app.router.add_post("/oxylabs/v1/queries", self.oxylabs)
+        app.router.add_get("/pdf/{name}.pdf", self.pdf)
+        app.router.add_get("/landing/{doi:.+}", self.landing)
+        app.router.add_post("/writer", self.writer)
+        app.router.add_post("/winston", self.winston)
+        return app
+
+
+async def start(upstreams: FakeUpstreams, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(upstreams.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Fake upstreams listening on %s", upstreams.base_url)
+    return runner
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="", help='per upstream "mean_ms[:jitter_ms]", e.g. crossref=80:40')
+    parser.add_argument("--errors", default="", help='per upstream "rate[:status]", e.g. winston=0.05:503')
+    parser.add_argument("--pages-per-author", type=int, default=2, help="Scholar result pages (10 articles each)")
+    parser.add_argument("--oa-ratio", type=float, default=0.8)
+    parser.add_argument("--pdf-dir", default=None, help="serve real PDFs from this directory instead")
+    parser.add_argument("--pdf-count", type=int, default=20)
+
+
+def from_args(args, base_url: str) -> FakeUpstreams:
+    corpus = load_pdf_dir(args.pdf_dir) if args.pdf_dir else pdf_corpus(args.pdf_count)
+    return FakeUpstreams(
+        base_url,
+        faults=parse_faults(args.latency, args.errors),
+        corpus=corpus,
+        pages_per_author=args.pages_per_author,
+        oa_ratio=args.oa_ratio,
+    )
+
+
+async def serve_forever(args):
+    upstreams = from_args(args, f"http://{args.advertise or args.host}:{args.port}")
+    await start(upstreams, args.host, args.port)
+    print(json.dumps(upstreams.env(), indent=2))
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Crossref/Unpaywall/Oxylabs/Writer/Winston")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--advertise", default=None, help="host name the services should use (default --host)")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
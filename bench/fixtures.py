@@ -0,0 +1,245 @@
+"""
+Deterministic fixture corpus for the benchmarks: fake article text, small
+but valid text PDFs and publisher / Scholar HTML pages, generated on the
+fly so no binaries live in git.
+
+    PYTHONPATH=. python bench/fixtures.py --out /tmp/pdfs --count 20
+    PYTHONPATH=. python bench/fixtures.py --out /tmp/html --html
+
+writes the corpus to disk (e.g. to inspect it or to reuse it elsewhere);
+the fake upstream server builds the same corpus in memory.
+"""
+import argparse
+import html
+import os
+import random
+import string
+import textwrap
+from typing import Dict, List
+
+# Page counts of the generated PDFs; short notes up to long papers
+PAGE_MIX = (1, 2, 4, 8, 12, 20, 30)
+
+
+def fake_words(rnd: random.Random, vocab_size: int = 3000) -> List[str]:
+    return ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(2, 11))) for _ in range(vocab_size)]
+
+
+def fake_text(size_bytes: int, seed: int = 42) -> str:
+    """Paragraphs of pseudo-English of roughly `size_bytes` characters."""
+    rnd = random.Random(seed)
+    words = fake_words(rnd)
+    out, size, sentence = [], 0, 0
+    while size < size_bytes:
+        w = rnd.choice(words)
+        if sentence == 0:
+            w = w.capitalize()
+        sentence += 1
+        if sentence > rnd.randint(8, 20):
+            w += "."
+            sentence = 0
+        out.append(w)
+        size += len(w) + 1
+        if sentence == 0 and rnd.random() < 0.15:
+            out.append("\n\n")
+    return " ".join(out)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(text: str, lines_per_page: int = 60, width: int = 95) -> bytes:
+    """Minimal PDF 1.4 with one Helvetica text object per page."""
+    lines: List[str] = []
+    for para in text.split("\n\n"):
+        lines.extend(textwrap.wrap(para.strip(), width) or [""])
+        lines.append("")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for pid, page_lines in zip(page_ids, pages):
+        body = "BT /F1 9 Tf 11 TL 40 800 Td\n" + "\n".join(
+            f"({_pdf_escape(line)}) Tj T*" for line in page_lines
+        ) + "\nET"
+        stream = body.encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + obj + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def pdf_corpus(count: int = 20, seed: int = 7) -> Dict[str, bytes]:
+    """{name: pdf bytes}; page counts cycle through PAGE_MIX (~3.5 KB of text per page)."""
+    corpus = {}
+    for i in range(count):
+        pages = PAGE_MIX[i % len(PAGE_MIX)]
+        corpus[f"paper-{i:03d}"] = make_pdf(fake_text(pages * 3500, seed=seed + i))
+    return corpus
+
+
+def load_pdf_dir(path: str) -> Dict[str, bytes]:
+    """Use a directory of real PDFs instead of the generated corpus."""
+    corpus = {}
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(".pdf"):
+            with open(os.path.join(path, name), "rb") as f:
+                corpus[name[:-4]] = f.read()
+    return corpus
+
+
+# Where a landing page names its PDF: <head> meta, a body link near the end, or nowhere
+LANDING_KINDS = ("meta", "anchor", "none")
+
+
+def landing_html(size_bytes: int, pdf: str = "meta", seed: int = 11) -> str:
+    """
+    A publisher landing page of roughly `size_bytes`: Highwire-style <meta>
+    tags, inline script, navigation, the abstract and a long reference list
+    full of (non-PDF) links. `pdf` is one of LANDING_KINDS.
+    """
+    rnd = random.Random(seed)
+    words = fake_words(rnd, 800)
+    doi = f"10.{1000 + seed}/bench.{seed:05d}"
+    head = [
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">',
+        f"<title>{' '.join(rnd.choices(words, k=9)).capitalize()}</title>",
+        f'<meta name="citation_title" content="{" ".join(rnd.choices(words, k=9))}">',
+        f'<meta name="citation_doi" content="{doi}">',
+    ]
+    head += [f'<meta name="citation_author" content="{rnd.choice(words).capitalize()}">' for _ in range(8)]
+    if pdf == "meta":
+        head.append(f'<meta name="citation_pdf_url" content="https://publisher.example/doi/pdf/{doi}.pdf">')
+    head.append(f"<script>window.dataLayer = [{','.join(repr(w) for w in rnd.choices(words, k=200))}];</script>")
+    head.append('<link rel="stylesheet" href="/static/site.css"></head><body>')
+
+    body = ['<nav><ul>' + "".join(f'<li><a href="/topic/{w}">{w}</a></li>' for w in rnd.choices(words, k=60)) + "</ul></nav>"]
+    body.append(f'<main><article><h1>{" ".join(rnd.choices(words, k=9))}</h1><section class="abstract"><p>')
+    body.append(html.escape(fake_text(3000, seed=seed)) + "</p></section>")
+    size = sum(map(len, head)) + sum(map(len, body))
+    n = 0
+    body.append('<section class="references"><ol>')
+    while size < size_bytes:
+        n += 1
+        ref = (
+            f'<li id="ref-{n}"><span class="authors">{" ".join(rnd.choices(words, k=4))}</span> '
+            f'<cite>{" ".join(rnd.choices(words, k=10))}</cite> '
+            f'<a href="https://doi.org/10.{rnd.randint(1000, 9999)}/{rnd.choice(words)}.{n}">doi</a> '
+            f'<a href="/servlet/linkout?suffix=r{n}&amp;dbid=16">Crossref</a></li>'
+        )
+        body.append(ref)
+        size += len(ref)
+    body.append("</ol></section></article></main>")
+    if pdf == "anchor":
+        body.append(f'<aside><a class="pdf-download" href="/doi/pdf/{doi}.pdf">Download PDF</a></aside>')
+    body.append("<footer>" + "".join(f'<a href="/about/{w}">{w}</a>' for w in rnd.choices(words, k=40)) + "</footer>")
+    return "".join(head + body) + "</body></html>"
+
+
+def scholar_search_html(results: int = 10, seed: int = 13) -> str:
+    """A Google Scholar keyword search result page with the classes the scrapers read."""
+    rnd = random.Random(seed)
+    words = fake_words(rnd, 500)
+    items = []
+    for n in range(results):
+        title = " ".join(rnd.choices(words, k=rnd.randint(6, 14))).capitalize()
+        pdf = (f'<div class="gs_ggs gs_fl"><div class="gs_ggsd"><div class="gs_or_ggsm">'
+               f'<a href="https://arxiv.example/pdf/{n}.pdf"><span class="gs_ctg2">[PDF]</span> arxiv.example</a>'
+               f"</div></div></div>") if n % 3 else ""
+        items.append(
+            f'<div class="gs_r gs_or gs_scl" data-cid="c{n}" data-rp="{n}"><div class="gs_ri">{pdf}'
+            f'<h3 class="gs_rt"><span class="gs_ctc"><span class="gs_ct1">[HTML]</span></span> '
+            f'<a href="https://publisher.example/{n}">{html.escape(title)}</a></h3>'
+            f'<div class="gs_a">{" ".join(rnd.choices(words, k=3))} - Journal of {rnd.choice(words)}, {1990 + n % 34} - publisher.example</div>'
+            f'<div class="gs_rs">{html.escape(fake_text(300, seed=seed + n))}</div>'
+            f'<div class="gs_fl gs_flb"><a href="javascript:void(0)" class="gs_or_sav"><span>Save</span></a> '
+            f'<a href="javascript:void(0)" class="gs_or_cit">Cite</a> '
+            f'<a href="/scholar?cites={n}">Cited by {rnd.randint(0, 900)}</a> '
+            f'<a href="/scholar?q=related:{n}">Related articles</a></div></div></div>'
+        )
+    chrome = "".join(f'<a class="gs_btnPR" href="/scholar?start={i * 10}">{i + 1}</a>' for i in range(10))
+    return (f'<!doctype html><html><head><title>Scholar</title><script>{"var x=1;" * 400}</script></head>'
+            f'<body><div id="gs_top"><div id="gs_res_ccl_mid">{"".join(items)}</div>'
+            f'<div id="gs_n">{chrome}</div></div></body></html>')
+
+
+def scholar_profile_html(rows: int = 100, seed: int = 17) -> str:
+    """One citations?user= page of an author profile with `rows` articles."""
+    rnd = random.Random(seed)
+    words = fake_words(rnd, 500)
+    trs = []
+    for n in range(rows):
+        title = " ".join(rnd.choices(words, k=rnd.randint(6, 14))).capitalize()
+        trs.append(
+            f'<tr class="gsc_a_tr"><td class="gsc_a_t">'
+            f'<a href="javascript:void(0)" data-href="/citations?view_op=view_citation&amp;user=benchAAAAJ&amp;citation_for_view=benchAAAAJ:{n}" '
+            f'class="gsc_a_at">{html.escape(title)}</a>'
+            f'<div class="gs_gray">{" ".join(rnd.choices(words, k=4))}</div><div class="gs_gray">Journal {n}</div></td>'
+            f'<td class="gsc_a_c"><a href="/scholar?cites={n}" class="gsc_a_ac gs_ibl">{rnd.randint(0, 900)}</a></td>'
+            f'<td class="gsc_a_y"><span class="gsc_a_h gsc_a_hc gs_ibl">{1990 + n % 34}</span></td></tr>'
+        )
+    return (f'<!doctype html><html><head><title>Profile</title><script>{"var y=2;" * 400}</script></head>'
+            f'<body><table id="gsc_a_t"><tbody id="gsc_a_b">{"".join(trs)}</tbody></table></body></html>')
+
+
+def html_corpus() -> Dict[str, str]:
+    """{name: page} with landing pages of each kind at 50 KB, 500 KB and 2 MB plus Scholar pages."""
+    corpus = {}
+    for kind in LANDING_KINDS:
+        for label, size in (("50KB", 50 * 1024), ("500KB", 500 * 1024), ("2MB", 2 * 1024 * 1024)):
+            corpus[f"landing-{kind}-{label}"] = landing_html(size, pdf=kind)
+    corpus["scholar-search"] = scholar_search_html()
+    corpus["scholar-profile"] = scholar_profile_html()
+    return corpus
+
+
+def load_html_dir(path: str) -> Dict[str, str]:
+    """Saved pages (*.html) to benchmark next to the generated ones."""
+    corpus = {}
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(path, name), encoding="utf-8", errors="replace") as f:
+                corpus[name.rsplit(".", 1)[0]] = f.read()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the generated PDF (or HTML) corpus to disk")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--html", action="store_true", help="write the HTML pages instead of PDFs")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.html:
+        for name, page in html_corpus().items():
+            with open(os.path.join(args.out, f"{name}.html"), "w", encoding="utf-8") as f:
+                f.write(page)
+            print(f"{name}.html  {len(page):>9,} chars")
+        return
+    for name, data in pdf_corpus(args.count).items():
+        with open(os.path.join(args.out, f"{name}.pdf"), "wb") as f:
+            f.write(data)
+        print(f"{name}.pdf  {len(data):>9,} bytes")
+
+
+if __name__ == "__main__":
+    main()
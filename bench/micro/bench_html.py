@@ -0,0 +1,123 @@
+"""
+HTML parsing: PDF link discovery on publisher landing pages (50 KB to
+2 MB) and Scholar result pages, lxml pull parser / compiled XPath against
+the BeautifulSoup code they replaced. Saved pages in BENCH_HTML_DIR
+(*.html) run next to the generated ones.
+"""
+import os
+import re
+from urllib.parse import urljoin
+
+import pytest
+from bs4 import BeautifulSoup
+
+from bench.fixtures import html_corpus, load_html_dir
+from conftest import load_app_module
+
+landing = load_app_module("text-extractor/app", "landing")
+scholar_html = load_app_module("scholar-scraper", "app.scraper.scholar_html")
+
+PAGES = html_corpus()
+if os.getenv("BENCH_HTML_DIR"):
+    PAGES.update({f"saved-{k}": v for k, v in load_html_dir(os.environ["BENCH_HTML_DIR"]).items()})
+LANDING = sorted(name for name in PAGES if not name.startswith("scholar-"))
+
+
+# -- the BeautifulSoup versions, kept as the baseline ----------------------
+
+def legacy_find_pdf_link(html: str):
+    soup = BeautifulSoup(html, "lxml")
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if href.lower().endswith(".pdf"):
+            return href
+    return None
+
+
+def legacy_parse_search_page(html: str) -> list:
+    soup = BeautifulSoup(html, "lxml")
+    publications = []
+    for it in soup.select("div.gs_ri"):
+        title_el = it.select_one("h3.gs_rt")
+        title = title_el.get_text(strip=True) if title_el else "Unknown"
+        pdf_el = it.select_one("div.gs_or_ggsm a")
+        link = pdf_el["href"] if pdf_el and pdf_el.has_attr("href") else None
+        year = None
+        meta = it.select_one("div.gs_a")
+        if meta:
+            m = re.search(r"\b(20\d{2}|19\d{2})\b", meta.get_text())
+            if m:
+                year = int(m.group(0))
+        citations = None
+        for a in it.select("div.gs_fl a"):
+            txt = a.get_text()
+            if "cited" in txt.lower() or "alıntı" in txt.lower():
+                m = re.search(r"\d+", txt)
+                citations = int(m.group(0)) if m else None
+                break
+        publications.append({"title": title, "year": year, "link": link, "citations": citations})
+    return publications
+
+
+def legacy_parse_profile_page(html: str) -> list:
+    soup = BeautifulSoup(html, "lxml")
+    publications = []
+    for row in soup.select("tr.gsc_a_tr"):
+        title_el = row.select_one("a.gsc_a_at")
+        if not title_el:
+            continue
+        href = title_el.get("href") or title_el.get("data-href")
+        year_el = row.select_one("td.gsc_a_y span")
+        year_txt = year_el.get_text(strip=True) if year_el else ""
+        cites_el = row.select_one("a.gsc_a_ac")
+        m = re.search(r"\d+", cites_el.get_text()) if cites_el else None
+        publications.append({
+            "title": title_el.get_text(strip=True) or "Unknown",
+            "year": int(year_txt) if year_txt.isdigit() else None,
+            "link": urljoin(scholar_html.SCHOLAR_BASE, href) if href else None,
+            "citations": int(m.group(0)) if m else None,
+        })
+    return publications
+
+
+# -- landing pages ----------------------------------------------------------
+
+@pytest.mark.parametrize("page", LANDING)
+def bench_legacy_find_pdf_link(benchmark, record_memory, page):
+    html = PAGES[page]
+    record_memory(legacy_find_pdf_link, html)
+    benchmark.pedantic(legacy_find_pdf_link, (html,), rounds=5 if len(html) > 1_000_000 else 20)
+
+
+@pytest.mark.parametrize("page", LANDING)
+def bench_find_pdf_link(benchmark, record_memory, page):
+    html = PAGES[page]
+    record_memory(landing.find_pdf_link, html)
+    link = benchmark.pedantic(landing.find_pdf_link, (html,), rounds=5 if len(html) > 1_000_000 else 20)
+    if page.startswith("landing-none"):
+        assert link is None
+    elif page.startswith("landing-"):
+        assert link and link.endswith(".pdf")
+
+
+# -- Scholar pages ----------------------------------------------------------
+
+SCHOLAR = [
+    ("search", legacy_parse_search_page, scholar_html.parse_search_page),
+    ("profile", legacy_parse_profile_page, scholar_html.parse_profile_page),
+]
+
+
+@pytest.mark.parametrize("kind,legacy,_", SCHOLAR, ids=[k for k, _, _ in SCHOLAR])
+def bench_legacy_parse_scholar(benchmark, record_memory, kind, legacy, _):
+    html = PAGES[f"scholar-{kind}"]
+    record_memory(legacy, html)
+    benchmark(legacy, html)
+
+
+@pytest.mark.parametrize("kind,legacy,parse", SCHOLAR, ids=[k for k, _, _ in SCHOLAR])
+def bench_parse_scholar(benchmark, record_memory, kind, legacy, parse):
+    html = PAGES[f"scholar-{kind}"]
+    record_memory(parse, html)
+    rows = benchmark(parse, html)
+    assert rows == legacy(html)
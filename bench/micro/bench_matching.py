@@ -0,0 +1,44 @@
+"""DOI resolver title/author matching against Crossref candidates."""
+import random
+
+import pytest
+
+from bench.fixtures import fake_words
+from conftest import bare, load_app_module
+
+doi_service = load_app_module("doi-resolver", "app.service")
+
+
+def crossref_items(n_items: int, n_authors: int, title: str, author: str, seed: int = 5):
+    """Candidates with long author lists (consortium papers); the real author sits last."""
+    rnd = random.Random(seed)
+    words = fake_words(rnd, 500)
+    items = []
+    for i in range(n_items):
+        authors = [
+            {"given": rnd.choice(words).capitalize(), "family": rnd.choice(words).capitalize()}
+            for _ in range(n_authors - 1)
+        ]
+        given, _, family = author.rpartition(" ")
+        authors.append({"given": given, "family": family})
+        cand_title = title if i == n_items - 1 else " ".join(rnd.choices(words, k=10))
+        items.append({"DOI": f"10.5555/{i}", "title": [cand_title], "author": authors})
+    return items
+
+
+TITLE = "Scalable detection of machine generated text in scholarly publications"
+AUTHOR = "Ayşe Yılmaz-Demir"
+
+
+def bench_normalize(benchmark):
+    svc = bare(doi_service.DoiResolverService)
+    benchmark(svc.normalize, TITLE * 4)
+
+
+@pytest.mark.parametrize("n_authors", [10, 100, 1000])
+def bench_match_candidates(benchmark, record_memory, n_authors):
+    svc = bare(doi_service.DoiResolverService)
+    items = crossref_items(5, n_authors, TITLE, AUTHOR)
+    record_memory(svc.match_candidates, "bench", TITLE, AUTHOR, items)
+    item, verified = benchmark(svc.match_candidates, "bench", TITLE, AUTHOR, items)
+    assert verified and item["DOI"] == "10.5555/4"
@@ -0,0 +1,19 @@
+"""pdfplumber text extraction on generated papers of 1, 8 and 30 pages."""
+import pytest
+
+from bench.fixtures import PAGE_MIX, pdf_corpus
+from conftest import load_app_module
+
+extractor = load_app_module("text-extractor/app", "extractor")
+
+CORPUS = pdf_corpus(len(PAGE_MIX))
+PAGES = {PAGE_MIX[i]: name for i, name in enumerate(sorted(CORPUS))}
+
+
+@pytest.mark.parametrize("pages", [1, 8, 30])
+def bench_extract_pdf_document(benchmark, record_memory, pages):
+    # The blocking parse the extractor runs on its thread pool
+    pdf = CORPUS[PAGES[pages]]
+    record_memory(extractor.parse_pdf, pdf)
+    text, _ = benchmark.pedantic(extractor.parse_pdf, (pdf,), rounds=5 if pages > 8 else 20, iterations=1)
+    assert text
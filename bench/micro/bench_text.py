@@ -0,0 +1,67 @@
+"""Text clean-up on the extractor → analyzer path, from 10 KB to 2 MB of text."""
+import re
+
+import pytest
+
+from conftest import TEXT_SIZES, bare, load_app_module, pdf_like_text
+
+normalizer = load_app_module("text-extractor/app", "normalizer")
+plagiarism = load_app_module("plagiarism-checker/app", "service")
+
+
+def legacy_clean(text: str) -> str:
+    """The regex chain extract_pdf_text used before normalizer.py, kept as the baseline."""
+    text = text.encode("utf-8", "surrogatepass").decode("unicode_escape", "ignore")
+    text = text.encode("latin1", "ignore").decode("utf-8", "ignore")
+    text = text.replace("\r\n", "\n")
+    text = re.sub(r"(?m)^\s*\d+\s*$", "", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = re.sub(r" {2,}", " ", text)
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    return text.strip()
+
+
+@pytest.fixture(scope="module")
+def raw_text(text_size):
+    return pdf_like_text(TEXT_SIZES[text_size])
+
+
+@pytest.fixture(scope="module")
+def raw_pages(raw_text):
+    # pdfplumber hands over one string per page; ~60 lines each
+    lines = raw_text.split("\r\n")
+    return ["\n".join(lines[i:i + 60]) for i in range(0, len(lines), 60)]
+
+
+@pytest.fixture(scope="module")
+def unbroken_pages(raw_text):
+    # No blank or page-number lines: one paragraph runs on across every page
+    lines = [line for line in raw_text.split("\r\n") if line.strip() and not line.isdigit()]
+    return ["\n".join(lines[i:i + 60]) for i in range(0, len(lines), 60)]
+
+
+def bench_legacy_clean(benchmark, record_memory, raw_text):
+    record_memory(legacy_clean, raw_text)
+    benchmark(legacy_clean, raw_text)
+
+
+def bench_normalize_pages(benchmark, record_memory, raw_pages):
+    record_memory(normalizer.normalize_pages, raw_pages)
+    benchmark(normalizer.normalize_pages, raw_pages)
+
+
+def bench_normalize_unbroken_pages(benchmark, record_memory, unbroken_pages):
+    record_memory(normalizer.normalize_pages, unbroken_pages)
+    benchmark(normalizer.normalize_pages, unbroken_pages)
+
+
+def bench_repair_encoding(benchmark, record_memory, raw_text):
+    record_memory(normalizer.repair_encoding, raw_text)
+    benchmark(normalizer.repair_encoding, raw_text)
+
+
+def bench_extract_snippet(benchmark, record_memory, raw_text):
+    svc = bare(plagiarism.PlagiarismCheckerService)
+    record_memory(svc._extract_snippet, raw_text, 30)
+    benchmark(svc._extract_snippet, raw_text, 30)
@@ -0,0 +1,86 @@
+"""
+Shared setup for the CPU micro-benchmarks.
+
+    pip install -r bench/requirements.txt pytest-benchmark
+    PYTHONPATH=. pytest bench/micro --benchmark-autosave          # record a baseline
+    PYTHONPATH=. pytest bench/micro --benchmark-compare --benchmark-compare-fail=median:10%
+
+Service modules are loaded straight from apps/ the way each service's
+Dockerfile lays them out. Every benchmark also records the peak Python
+allocation of one call (tracemalloc) in extra_info["peak_kib"], which
+shows up in the saved JSON next to the timings.
+"""
+import importlib
+import os
+import sys
+import textwrap
+import tracemalloc
+
+import pytest
+
+from bench.fixtures import fake_text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 10 KB (abstract-sized) up to 2 MB (a long thesis)
+TEXT_SIZES = {"10KB": 10 * 1024, "100KB": 100 * 1024, "500KB": 500 * 1024, "2MB": 2 * 1024 * 1024}
+
+# Module names several services use for their own files
+_GENERIC = ("config", "service", "main", "models", "app", "app.config", "app.service")
+
+
+def load_app_module(app_dir: str, module: str):
+    """Import `module` with apps/<app_dir> first on sys.path, without leaking its generic names."""
+    path = os.path.join(ROOT, "apps", app_dir)
+    for name in _GENERIC:
+        sys.modules.pop(name, None)
+    sys.path.insert(0, path)
+    try:
+        return importlib.import_module(module)
+    finally:
+        sys.path.remove(path)
+        for name in _GENERIC:
+            sys.modules.pop(name, None)
+
+
+def bare(cls):
+    """Instance without running __init__ (no clients, no connections); enough for the pure helpers."""
+    return object.__new__(cls)
+
+
+def pdf_like_text(size: int, seed: int = 3) -> str:
+    """
+    Text shaped like pdfplumber output: hard-wrapped lines, page-number
+    lines, blank-line runs, double spaces and the odd escaped sequence.
+    """
+    words = fake_text(size, seed=seed).replace("\n\n", " ")
+    lines = textwrap.wrap(words, 90)
+    out = []
+    for i, line in enumerate(lines, start=1):
+        if i % 7 == 0:
+            line = line.replace(" ", "  ", 3)
+        if i % 23 == 0:
+            line += " \\u00e2\\u0080\\u0094 see"
+        out.append(line)
+        if i % 55 == 0:
+            out.extend(["", str(i // 55), "", ""])
+    return "\r\n".join(out)
+
+
+@pytest.fixture(params=list(TEXT_SIZES), scope="module")
+def text_size(request):
+    return request.param
+
+
+@pytest.fixture
+def record_memory(benchmark):
+    """record_memory(fn, *args): run once under tracemalloc and attach the peak to the benchmark."""
+    def run(fn, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_kib"] = round(peak / 1024, 1)
+    return run
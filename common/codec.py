@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("common.codec")
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/x-msgpack"
+ZSTD_ENCODING = "zstd"
+
+# Non-JSON or compressed Redis blobs carry a 3-byte header: marker, codec
+# id, compression id. Anything without the marker is plain JSON.
+_BLOB_MARKER = b"\x01"
+_BLOB_CODEC_IDS = {JSON_CONTENT_TYPE: b"j", MSGPACK_CONTENT_TYPE: b"m"}
+_BLOB_CONTENT_TYPES = {v: k for k, v in _BLOB_CODEC_IDS.items()}
+_BLOB_PLAIN = b"-"
+_BLOB_ZSTD = b"z"
+
+
+class Codec:
+    """
+    Serializes inter-service payloads. Messages are tagged with
+    content_type/content_encoding so producers and consumers running
+    different codecs can coexist during a rolling upgrade: every Codec
+    decodes all formats, only the encoding side follows PAYLOAD_CODEC.
+    """
+
+    def __init__(self, name: str = "json", compress_threshold: int = 0, compress_level: int = 3):
+        if name == "orjson" and orjson is None:
+            logger.warning("orjson is not installed, falling back to stdlib json")
+            name = "json"
+        if name == "msgpack" and msgpack is None:
+            raise RuntimeError("PAYLOAD_CODEC=msgpack but msgpack is not installed")
+        if compress_threshold and zstandard is None:
+            logger.warning("zstandard is not installed, payload compression disabled")
+            compress_threshold = 0
+
+        self.name = name
+        self.content_type = MSGPACK_CONTENT_TYPE if name == "msgpack" else JSON_CONTENT_TYPE
+        self.compress_threshold = compress_threshold
+        self._compressor = zstandard.ZstdCompressor(level=compress_level) if compress_threshold else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def _dumps(self, obj: Any) -> bytes:
+        if self.name == "msgpack":
+            return msgpack.packb(obj, use_bin_type=True)
+        if self.name == "orjson":
+            return orjson.dumps(obj)
+        return json.dumps(obj).encode()
+
+    def _loads(self, data: bytes, content_type: Optional[str]) -> Any:
+        if content_type == MSGPACK_CONTENT_TYPE:
+            if msgpack is None:
+                raise RuntimeError("Received a msgpack payload but msgpack is not installed")
+            return msgpack.unpackb(data, raw=False)
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data.decode("utf-8"))
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            raise RuntimeError("Received a zstd payload but zstandard is not installed")
+        return self._decompressor.decompress(data)
+
+    def encode(self, obj: Any) -> Tuple[bytes, str, Optional[str]]:
+        """Return (body, content_type, content_encoding) for a message."""
+        body = self._dumps(obj)
+        if self._compressor is not None and len(body) >= self.compress_threshold:
+            return self._compressor.compress(body), self.content_type, ZSTD_ENCODING
+        return body, self.content_type, None
+
+    def decode(self, body: bytes, content_type: Optional[str] = None, content_encoding: Optional[str] = None) -> Any:
+        if content_encoding == ZSTD_ENCODING:
+            body = self._decompress(body)
+        return self._loads(body, content_type)
+
+    def pack(self, obj: Any) -> bytes:
+        """Encode a value for Redis, with a header describing how to read it back."""
+        body, content_type, encoding = self.encode(obj)
+        if content_type == JSON_CONTENT_TYPE and encoding is None:
+            # Plain JSON stays readable by services that predate the codec layer
+            return body
+        compression = _BLOB_ZSTD if encoding == ZSTD_ENCODING else _BLOB_PLAIN
+        return _BLOB_MARKER + _BLOB_CODEC_IDS[content_type] + compression + body
+
+    def unpack(self, data: bytes) -> Any:
+        if data[:1] != _BLOB_MARKER:
+            return self._loads(data, JSON_CONTENT_TYPE)
+        content_type = _BLOB_CONTENT_TYPES[data[1:2]]
+        encoding = ZSTD_ENCODING if data[2:3] == _BLOB_ZSTD else None
+        return self.decode(data[3:], content_type, encoding)
+
+
+_default: Optional[Codec] = None
+
+
+def default_codec() -> Codec:
+    """
+    Process-wide codec configured from the environment:
+    PAYLOAD_CODEC (json | orjson | msgpack, default orjson) and
+    PAYLOAD_COMPRESS_THRESHOLD (bytes, 0 disables zstd). The defaults stay
+    wire-compatible with plain JSON; switch to msgpack or compression only
+    once every service runs a codec-aware build.
+    """
+    global _default
+    if _default is None:
+        _default = Codec(
+            name=os.getenv("PAYLOAD_CODEC", "orjson"),
+            compress_threshold=int(os.getenv("PAYLOAD_COMPRESS_THRESHOLD", "0")),
+        )
+    return _default
@@ -0,0 +1,81 @@
+"""
+Move messages parked in a dead-letter queue back onto their work queue.
+
+    python -m common.dlq_replay doi-resolve-requests [--limit 100] [--dry-run]
+
+The retry counter is reset so replayed messages get the full retry budget
+again; the last error is kept in the headers for reference.
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from aio_pika import connect_robust, Message, DeliveryMode
+
+from common.lanes import now_ms
+from common.messaging import (
+    RETRY_COUNT_HEADER, LAST_ERROR_HEADER, PUBLISHED_AT_HEADER, QUEUE_ARGUMENTS, dead_letter_queue
+)
+
+logger = logging.getLogger("common.dlq_replay")
+
+
+async def replay(url: str, queue_name: str, limit: int | None = None, dry_run: bool = False) -> int:
+    conn = await connect_robust(url)
+    async with conn:
+        chan = await conn.channel()
+        dlq = await chan.declare_queue(dead_letter_queue(queue_name), durable=True)
+        await chan.declare_queue(queue_name, durable=True, arguments=QUEUE_ARGUMENTS.get(queue_name))
+
+        moved = 0
+        while limit is None or moved < limit:
+            msg = await dlq.get(no_ack=False, fail=False)
+            if msg is None:
+                break
+
+            headers = dict(msg.headers or {})
+            logger.info(
+                "%s message %s (last error: %s)",
+                "Would replay" if dry_run else "Replaying",
+                msg.message_id or moved, headers.get(LAST_ERROR_HEADER)
+            )
+            if dry_run:
+                # Left unacked: everything goes back to the DLQ when the connection closes
+                moved += 1
+                continue
+
+            headers.pop(RETRY_COUNT_HEADER, None)
+            headers[PUBLISHED_AT_HEADER] = now_ms()
+            await chan.default_exchange.publish(
+                Message(
+                    body=msg.body,
+                    delivery_mode=DeliveryMode.PERSISTENT,
+                    content_type=msg.content_type,
+                    content_encoding=msg.content_encoding,
+                    priority=msg.priority,
+                    headers=headers
+                ),
+                routing_key=queue_name
+            )
+            await msg.ack()
+            moved += 1
+
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dead-lettered messages")
+    parser.add_argument("queue", help="work queue whose .dlq should be replayed")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--url", default=os.getenv("RABBITMQ_URL", ""))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    moved = asyncio.run(replay(args.url, args.queue, args.limit, args.dry_run))
+    logger.info("%d message(s) %s", moved, "would be replayed" if args.dry_run else "replayed")
+
+
+if __name__ == "__main__":
+    main()
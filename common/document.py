@@ -0,0 +1,47 @@
+"""
+Read side of the structured article text written by text-extractor.
+
+An extracted article carries its normalized `text` and a `document` of
+section spans into it (kinds: front, abstract, body, acknowledgements,
+references, appendix). Consumers ask for the kinds they need instead of
+shipping the whole paper to an external API.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+SECTION_KINDS = ("front", "abstract", "body", "acknowledgements", "references", "appendix")
+BODY_KINDS = ("abstract", "body")
+
+
+def parse_kinds(spec: str, default: Tuple[str, ...] = BODY_KINDS) -> Tuple[str, ...]:
+    """"abstract,body" → ("abstract", "body"); unknown names are dropped, "all" keeps everything."""
+    names = [n.strip().lower() for n in spec.split(",") if n.strip()]
+    if "all" in names:
+        return SECTION_KINDS
+    kinds = tuple(n for n in names if n in SECTION_KINDS)
+    return kinds or default
+
+
+def select_text(article: Dict[str, Any], kinds: Iterable[str] = BODY_KINDS) -> Optional[str]:
+    """
+    The article text restricted to `kinds`. Falls back to the full text for
+    articles extracted before documents existed, or when nothing of the
+    requested kinds was recognised.
+    """
+    text = article.get("text")
+    document = article.get("document")
+    if not text or not document or not document.get("sections"):
+        return text
+    wanted = set(kinds)
+    parts = _slices(text, document["sections"], wanted)
+    if not parts and "body" in wanted:
+        # No body headings recognised (only e.g. "References"): the unheaded front part is the body
+        parts = _slices(text, document["sections"], {"front"})
+    return "\n\n".join(parts) if parts else text
+
+
+def _slices(text: str, sections, kinds) -> list:
+    return [
+        text[section["span"][0]:section["span"][1]]
+        for section in sections
+        if section.get("kind") in kinds and section["span"][1] > section["span"][0]
+    ]
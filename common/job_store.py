@@ -1,13 +1,62 @@
+import json
 import logging
 import redis.asyncio as aioredis
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, Iterable, List
+
+from common.codec import Codec, default_codec
+from common.lanes import now_ms
+from common.metrics import redis_op
 
 logger = logging.getLogger("common.job_store")
 
+# Analysis stages that run in parallel on the same extracted text.
+ANALYSIS_BRANCHES = ("ai_analyzer", "plagiarism_checker")
+
+# SREM + SCARD in one step so exactly one branch sees the pending set drain.
+_FINISH_BRANCH_LUA = """
+redis.call('SREM', KEYS[1], ARGV[1])
+return redis.call('SCARD', KEYS[1])
+"""
+
+# Record an article as done for a stage. Returns 1 only to the call that
+# completes the stage; redelivered articles are not counted twice. While
+# the scraper still streams there is no article_total and nothing completes.
+_ARTICLE_DONE_LUA = """
+local added = redis.call('SADD', KEYS[1], ARGV[1])
+local total = tonumber(redis.call('GET', KEYS[2]) or '-1')
+if added == 1 and redis.call('SCARD', KEYS[1]) == total then
+    return 1
+end
+return 0
+"""
+
+# Per-job timeline stream cap and how many recent samples feed the
+# cross-job percentiles for each (stage, measurement).
+TIMELINE_MAXLEN = 5000
+TIMING_SAMPLES = 1000
+
+
+def _percentiles(samples: List[int]) -> Dict[str, int]:
+    samples = sorted(samples)
+
+    def pct(p: float) -> int:
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    return {
+        "samples": len(samples),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": samples[-1],
+    }
+
+
 class JobStore:
-    def __init__(self, url: str):
+    def __init__(self, url: str, codec: Optional[Codec] = None):
         self._url = url
         self._redis = None
+        self._redis_bin = None
+        self.codec = codec or default_codec()
 
     async def _client(self):
         if not self._redis:
@@ -15,15 +64,31 @@ class JobStore:
             logger.info("Connected to Redis for JobStore")
         return self._redis
 
+    async def _bin_client(self):
+        # Article and result blobs go through the codec and may be binary
+        if not self._redis_bin:
+            self._redis_bin = aioredis.from_url(self._url, decode_responses=False)
+        return self._redis_bin
+
     def _make_key(self, job_id: str, field: str) -> str:
         return f"job:{job_id}:{field}"
 
+    @redis_op
     async def set_field(self, job_id: str, field: str, value: str):
         r = await self._client()
         key = self._make_key(job_id, field)
         await r.set(key, value)
         logger.debug("SET %s = %r", key, value)
 
+    @redis_op
+    async def set_field_if_missing(self, job_id: str, field: str, value: str) -> bool:
+        r = await self._client()
+        key = self._make_key(job_id, field)
+        created = await r.set(key, value, nx=True)
+        logger.debug("SETNX %s = %r → %s", key, value, bool(created))
+        return bool(created)
+
+    @redis_op
     async def get_field(self, job_id: str, field: str) -> Optional[str]:
         r = await self._client()
         key = self._make_key(job_id, field)
@@ -31,12 +96,14 @@ class JobStore:
         logger.debug("GET %s → %r", key, val)
         return val
 
+    @redis_op
     async def delete_field(self, job_id: str, field: str):
         r = await self._client()
         key = self._make_key(job_id, field)
         await r.delete(key)
         logger.debug("DEL %s", key)
 
+    @redis_op
     async def get_all_fields(self, job_id: str) -> Dict[str, str]:
         r = await self._client()
         pattern = f"job:{job_id}:*"
@@ -52,3 +119,174 @@ class JobStore:
                     results[field] = v
         logger.debug("SCAN %s → %r", pattern, results)
         return results
+
+    @redis_op
+    async def start_branches(self, job_id: str, branches: Iterable[str] = ANALYSIS_BRANCHES):
+        r = await self._client()
+        key = self._make_key(job_id, "pending_branches")
+        async with r.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.sadd(key, *branches)
+            await pipe.execute()
+        logger.debug("SADD %s %r", key, list(branches))
+
+    @redis_op
+    async def finish_branch(self, job_id: str, branch: str) -> bool:
+        """
+        Mark a branch as done. Returns True for the branch that finishes last,
+        which is then responsible for marking the whole job complete.
+        """
+        r = await self._client()
+        key = self._make_key(job_id, "pending_branches")
+        remaining = await r.eval(_FINISH_BRANCH_LUA, 1, key, branch)
+        logger.debug("SREM %s %s → %d remaining", key, branch, remaining)
+        return int(remaining) == 0
+
+    @redis_op
+    async def set_article_result(self, job_id: str, branch: str, article_id: str, result: Dict[str, Any]):
+        r = await self._bin_client()
+        key = self._make_key(job_id, f"{branch}_results")
+        await r.hset(key, article_id, self.codec.pack(result))
+        logger.debug("HSET %s %s", key, article_id)
+
+    @redis_op
+    async def get_article_results(self, job_id: str, branch: str) -> Dict[str, Dict[str, Any]]:
+        r = await self._bin_client()
+        key = self._make_key(job_id, f"{branch}_results")
+        raw = await r.hgetall(key)
+        return {article_id.decode(): self.codec.unpack(val) for article_id, val in raw.items()}
+
+    async def set_article_total(self, job_id: str, total: int):
+        """
+        Seal the job's article stream. Stages can only complete once this is
+        set, so the scraper sets it before publishing its last article.
+        """
+        await self.set_field(job_id, "article_total", str(total))
+
+    @redis_op
+    async def add_published_articles(self, job_id: str, count: int) -> int:
+        """Running count of articles handed on by a streaming scrape (before the total is known)."""
+        r = await self._client()
+        return int(await r.incrby(self._make_key(job_id, "articles_published"), count))
+
+    @redis_op
+    async def mark_article_done(self, job_id: str, stage: str, index: int) -> bool:
+        """
+        Job-level aggregator: count an article as finished for `stage`.
+        Returns True once every article of the job has passed the stage.
+        """
+        r = await self._client()
+        done_key = self._make_key(job_id, f"{stage}_done")
+        total_key = self._make_key(job_id, "article_total")
+        completed = await r.eval(_ARTICLE_DONE_LUA, 2, done_key, total_key, str(index))
+        logger.debug("SADD %s %d → stage complete=%s", done_key, index, bool(completed))
+        return bool(completed)
+
+    @redis_op
+    async def set_article(self, job_id: str, index: int, article: Dict[str, Any]):
+        r = await self._bin_client()
+        key = self._make_key(job_id, "articles")
+        await r.hset(key, str(index), self.codec.pack(article))
+        logger.debug("HSET %s %d", key, index)
+
+    @redis_op
+    async def get_article(self, job_id: str, index: int) -> Optional[Dict[str, Any]]:
+        r = await self._bin_client()
+        key = self._make_key(job_id, "articles")
+        raw = await r.hget(key, str(index))
+        return self.codec.unpack(raw) if raw else None
+
+    @redis_op
+    async def get_job_data(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Assemble job_data from the per-article records (or the legacy
+        whole-job blob) and overlay the results every analysis branch has
+        written so far. Articles are keyed by their index in the scrape.
+        """
+        raw = await self.get_field(job_id, "job_data")
+        if raw:
+            data = json.loads(raw)
+            results = data.get("results")
+            if not isinstance(results, list):
+                return data
+            by_id = {str(idx): article for idx, article in enumerate(results)}
+        else:
+            r = await self._bin_client()
+            articles = await r.hgetall(self._make_key(job_id, "articles"))
+            if not articles:
+                return None
+            by_id = {article_id.decode(): self.codec.unpack(val) for article_id, val in articles.items()}
+            data = {
+                "job_id": job_id,
+                "author": await self.get_field(job_id, "author"),
+                "results": [by_id[k] for k in sorted(by_id, key=int)],
+            }
+            # Set by scholar-scraper: "fresh"/"stale" when the scrape came from its cache
+            cache_status = await self.get_field(job_id, "scrape_cache")
+            if cache_status:
+                age = await self.get_field(job_id, "scrape_cache_age_s")
+                data["scrape_cache"] = {"status": cache_status, "age_s": int(age) if age else None}
+
+        for branch in ANALYSIS_BRANCHES:
+            for article_id, fields in (await self.get_article_results(job_id, branch)).items():
+                if article_id in by_id:
+                    by_id[article_id].update(fields)
+        return data
+
+    @redis_op
+    async def record_timing(
+        self,
+        job_id: str,
+        stage: str,
+        event: str,
+        index: Optional[int] = None,
+        ts: Optional[int] = None,
+        outcome: Optional[str] = None,
+        **durations_ms: Optional[float],
+    ):
+        """
+        Append one entry to the job's timeline stream (job:{id}:timeline).
+        `ts` is the epoch-ms start of the event (defaults to now); keyword
+        durations such as wait_ms=, ms=, download_ms= are stored on the entry
+        and also feed the rolling per-stage samples behind `timing_stats`.
+        """
+        fields = {"stage": stage, "event": event, "ts": ts if ts is not None else now_ms()}
+        if index is not None:
+            fields["index"] = index
+        if outcome:
+            fields["outcome"] = outcome
+        durations = {name: int(value) for name, value in durations_ms.items() if value is not None}
+        fields.update(durations)
+
+        r = await self._client()
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.xadd(self._make_key(job_id, "timeline"), fields, maxlen=TIMELINE_MAXLEN, approximate=True)
+            for name, value in durations.items():
+                series = f"{stage}:{event}:{name}"
+                pipe.sadd("timings:series", series)
+                pipe.lpush(f"timings:{series}", value)
+                pipe.ltrim(f"timings:{series}", 0, TIMING_SAMPLES - 1)
+            await pipe.execute()
+
+    @redis_op
+    async def get_timeline(self, job_id: str) -> List[Dict[str, Any]]:
+        r = await self._client()
+        entries = await r.xrange(self._make_key(job_id, "timeline"))
+        timeline = []
+        for _, fields in entries:
+            entry: Dict[str, Any] = {}
+            for key, value in fields.items():
+                entry[key] = int(value) if key in ("ts", "index") or key.endswith("_ms") else value
+            timeline.append(entry)
+        return timeline
+
+    @redis_op
+    async def timing_stats(self) -> Dict[str, Dict[str, int]]:
+        """p50/p95/p99/max over the most recent samples of every stage measurement."""
+        r = await self._client()
+        stats = {}
+        for series in sorted(await r.smembers("timings:series")):
+            samples = [int(v) for v in await r.lrange(f"timings:{series}", 0, -1)]
+            if samples:
+                stats[series] = _percentiles(samples)
+        return stats
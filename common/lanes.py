@@ -0,0 +1,124 @@
+import json
+import logging
+import time
+import redis.asyncio as aioredis
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("common.lanes")
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# RabbitMQ message priorities per lane (see messaging.QUEUE_ARGUMENTS)
+LANE_PRIORITIES = {INTERACTIVE: 9, BULK: 1}
+
+_WAIT_SAMPLES = 1000
+
+# Append a job to its tenant's queue and put the tenant into the rotation
+# if it isn't there yet.
+_ENQUEUE_LUA = """
+redis.call('RPUSH', KEYS[1], ARGV[2])
+if redis.call('SADD', KEYS[3], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+# Rotate to the next tenant and pop one of its jobs; tenants with nothing
+# left drop out of the rotation in the same step.
+_NEXT_LUA = """
+local tenant = redis.call('RPOPLPUSH', KEYS[1], KEYS[1])
+if not tenant then
+    return nil
+end
+local queue = ARGV[1] .. tenant
+local job = redis.call('LPOP', queue)
+if redis.call('LLEN', queue) == 0 then
+    redis.call('LREM', KEYS[1], 0, tenant)
+    redis.call('SREM', KEYS[2], tenant)
+end
+if not job then
+    return nil
+end
+return {tenant, job}
+"""
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def lane_priority(lane: Optional[str]) -> int:
+    """Message priority for a job's lane, at every stage; no lane means interactive."""
+    return LANE_PRIORITIES.get(lane or INTERACTIVE, LANE_PRIORITIES[INTERACTIVE])
+
+
+class LaneScheduler:
+    """
+    Fair-share holding area for bulk scans. Each tenant gets its own Redis
+    list and the dispatcher takes one job per tenant in turn, so a large
+    roster from one submitter can't starve the others. Interactive scans
+    skip this and go straight to the broker at a higher priority.
+    """
+
+    def __init__(self, url: str):
+        self._url = url
+        self._redis: Optional[aioredis.Redis] = None
+
+    async def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(self._url, encoding="utf-8", decode_responses=True)
+            logger.info("Connected to Redis for LaneScheduler")
+        return self._redis
+
+    def _tenant_queue(self, tenant: str) -> str:
+        return f"lane:{BULK}:tenant:{tenant}"
+
+    async def enqueue_bulk(self, tenant: str, payload: Dict[str, Any]) -> int:
+        r = await self._client()
+        return await r.eval(
+            _ENQUEUE_LUA, 3,
+            self._tenant_queue(tenant), f"lane:{BULK}:rotation", f"lane:{BULK}:tenants",
+            tenant, json.dumps(payload)
+        )
+
+    async def next_bulk(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        r = await self._client()
+        res = await r.eval(
+            _NEXT_LUA, 2,
+            f"lane:{BULK}:rotation", f"lane:{BULK}:tenants",
+            self._tenant_queue("")
+        )
+        if not res:
+            return None
+        tenant, raw = res
+        return tenant, json.loads(raw)
+
+    async def pending_bulk(self) -> Dict[str, int]:
+        r = await self._client()
+        tenants = await r.smembers(f"lane:{BULK}:tenants")
+        return {t: await r.llen(self._tenant_queue(t)) for t in tenants}
+
+    async def record_wait(self, lane: str, wait_ms: int):
+        r = await self._client()
+        key = f"lane:{lane}:waits"
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.lpush(key, wait_ms)
+            pipe.ltrim(key, 0, _WAIT_SAMPLES - 1)
+            await pipe.execute()
+
+    async def wait_stats(self, lane: str) -> Dict[str, Any]:
+        r = await self._client()
+        samples = sorted(int(v) for v in await r.lrange(f"lane:{lane}:waits", 0, -1))
+        if not samples:
+            return {"samples": 0}
+
+        def pct(p: float) -> int:
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "samples": len(samples),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": samples[-1],
+        }
@@ -1,39 +1,174 @@
-import json
+import asyncio
 import logging
+import signal
+import time
+from dataclasses import dataclass
 from aio_pika import connect_robust, Message, DeliveryMode, IncomingMessage
-from typing import Callable, Awaitable
+from aio_pika.abc import AbstractChannel
+from aio_pika.pool import Pool
+from typing import Callable, Awaitable, Dict, Iterable, Optional, Set, Tuple
+
+from common.codec import Codec, default_codec
+from common.lanes import now_ms
+from common.metrics import MESSAGES_TOTAL, RABBIT_SECONDS, STAGE_SECONDS, timed
+from common.tracing import inject, mark_error, set_attributes, span
 
 logger = logging.getLogger("common.messaging")
 
+RETRY_COUNT_HEADER = "x-retry-count"
+LAST_ERROR_HEADER = "x-last-error"
+# Epoch ms at which the message became available to consumers (for queue-wait timing)
+PUBLISHED_AT_HEADER = "x-published-at"
+
+MAX_PRIORITY = 10
+
+# Queues declared with extra arguments. Publishers and consumers must
+# declare a queue identically, so both look it up here. Every stage's queue
+# is a priority queue: a job keeps its lane's priority (lanes.lane_priority)
+# through the per-article fan-out, so bulk articles can't queue ahead of
+# interactive ones anywhere in the pipeline.
+QUEUE_ARGUMENTS: Dict[str, dict] = {
+    name: {"x-max-priority": MAX_PRIORITY}
+    for name in (
+        "scrape_requests",
+        "doi-resolve-requests",
+        "text-extract-requests",
+        "ai-detection-requests",
+        "plagiarism-detection-requests",
+    )
+}
+
+DEFAULT_MAX_RETRIES = 5
+RETRY_BASE_DELAY_MS = 2000
+RETRY_MAX_DELAY_MS = 5 * 60 * 1000
+
+
+class PoisonMessage(Exception):
+    """Raised by a handler for messages that can never succeed; skips retries."""
+
+
+def retry_delay_ms(attempt: int) -> int:
+    return min(RETRY_BASE_DELAY_MS * 2 ** attempt, RETRY_MAX_DELAY_MS)
+
+
+def dead_letter_queue(queue_name: str) -> str:
+    return f"{queue_name}.dlq"
+
+
+def _retry_queue(queue_name: str, delay_ms: int) -> Tuple[str, dict]:
+    # Messages sit in the delay queue until their TTL expires and are then
+    # dead-lettered straight back onto the work queue.
+    return f"{queue_name}.retry.{delay_ms}", {
+        "x-message-ttl": delay_ms,
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": queue_name,
+    }
+
+
+@dataclass
+class _Subscription:
+    queue_name: str
+    callback: Callable[[dict], Awaitable[None]]
+    on_give_up: Optional[Callable[[dict], Awaitable[None]]]
+    max_retries: int
+    semaphore: asyncio.Semaphore
+
 class RabbitPublisher:
-    def __init__(self, url: str):
+    def __init__(self, url: str, pool_size: int = 4, codec: Optional[Codec] = None):
         self.url = url
+        self.pool_size = pool_size
+        self.codec = codec or default_codec()
         self._conn = None
-        self._chan = None
+        self._channels: Optional[Pool] = None
+        # Queues already declared on this connection. Declaring is idempotent and
+        # per connection, so any pooled channel can skip a queue another one declared.
+        self._declared: Set[str] = set()
+        self._lock = asyncio.Lock()
 
     async def connect(self):
-        if self._conn is None:
-            self._conn = await connect_robust(self.url)
-            self._chan = await self._conn.channel()
+        async with self._lock:
+            if self._conn is None:
+                self._conn = await connect_robust(self.url)
+                self._channels = Pool(self._open_channel, max_size=self.pool_size)
 
-    async def declare_queue(self, name: str):
-        await self._chan.declare_queue(name, durable=True)
+    async def _open_channel(self) -> AbstractChannel:
+        # Confirm mode: every publish resolves once the broker has the message
+        return await self._conn.channel(publisher_confirms=True)
 
-    async def publish(self, queue: str, payload: dict):
-        await self.connect()
-        await self.declare_queue(queue)
-        msg = Message(
-            body=json.dumps(payload).encode(),
+    async def declare_queue(self, channel: AbstractChannel, name: str, arguments: Optional[dict] = None):
+        if name not in self._declared:
+            await channel.declare_queue(name, durable=True, arguments=arguments or QUEUE_ARGUMENTS.get(name))
+            self._declared.add(name)
+
+    def _message(self, payload: dict, priority: Optional[int] = None) -> Message:
+        body, content_type, content_encoding = self.codec.encode(payload)
+        return Message(
+            body=body,
             delivery_mode=DeliveryMode.PERSISTENT,
-            content_type="application/json"
+            content_type=content_type,
+            content_encoding=content_encoding,
+            priority=priority,
+            headers=inject({PUBLISHED_AT_HEADER: now_ms()})
         )
-        await self._chan.default_exchange.publish(msg, routing_key=queue)
+
+    async def publish(self, queue: str, payload: dict, priority: Optional[int] = None):
+        await self.publish_batch(queue, [payload], priority=priority)
+
+    async def publish_batch(self, queue: str, payloads: Iterable[dict], priority: Optional[int] = None):
+        """
+        Publish all payloads on one pooled channel and wait for their
+        confirms together instead of one round trip per message.
+        """
+        payloads = list(payloads)
+        await self.connect()
+        async with self._channels.acquire() as chan:
+            await self.declare_queue(chan, queue)
+            job_id = payloads[0].get("job_id") if payloads else None
+            with span(f"publish {queue}", kind="producer", queue=queue, job_id=job_id, messages=len(payloads)), \
+                    timed(RABBIT_SECONDS, op="publish", queue=queue):
+                # Messages are built inside the span so each carries its context
+                await asyncio.gather(*(
+                    chan.default_exchange.publish(self._message(payload, priority), routing_key=queue)
+                    for payload in payloads
+                ))
+
+    async def republish(self, queue: str, message: Message, arguments: Optional[dict] = None):
+        """Publish an already built message (a retry or a dead letter) and wait for its confirm."""
+        await self.connect()
+        async with self._channels.acquire() as chan:
+            await self.declare_queue(chan, queue, arguments)
+            with timed(RABBIT_SECONDS, op="publish", queue=queue):
+                await chan.default_exchange.publish(message, routing_key=queue)
+
+    async def queue_depth(self, queue: str) -> int:
+        """Number of ready messages waiting in `queue`."""
+        await self.connect()
+        async with self._channels.acquire() as chan:
+            declared = await chan.declare_queue(queue, durable=True, arguments=QUEUE_ARGUMENTS.get(queue))
+            return declared.declaration_result.message_count
+
+    async def close(self):
+        if self._channels is not None:
+            await self._channels.close()
+            self._channels = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        self._declared.clear()
 
 class RabbitConsumer:
-    def __init__(self, url: str):
+    def __init__(self, url: str, codec: Optional[Codec] = None, job_store=None):
         self.url = url
+        self.codec = codec or default_codec()
+        # Optional JobStore: when set, every handled message is added to its job's timeline
+        self.job_store = job_store
         self._conn = None
         self._chan = None
+        self._consumers = []
+        self._inflight: Set[asyncio.Task] = set()
+        # Retries and dead letters go out with publisher confirms; the original
+        # is only acked once the broker has taken its replacement
+        self._publisher = RabbitPublisher(url, pool_size=2, codec=self.codec)
 
     async def connect(self):
         if not self._conn:
@@ -46,15 +181,164 @@ class RabbitConsumer:
         queue_name: str,
         on_message: Callable[[dict], Awaitable[None]],
         *,
-        prefetch_count: int = 1
+        prefetch_count: int = 1,
+        concurrency: Optional[int] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        on_give_up: Optional[Callable[[dict], Awaitable[None]]] = None
     ):
+        """
+        Start consuming `queue_name`. Up to `concurrency` handlers run at once
+        (defaults to `prefetch_count`); each message is acked on its own as
+        soon as its handler finishes.
+
+        A handler that raises is retried through `<queue>.retry.<ms>` delay
+        queues with exponential backoff. After `max_retries` attempts, or
+        straight away for PoisonMessage and undecodable bodies, the message
+        is parked in `<queue>.dlq` and `on_give_up` is called so the job can
+        move on without it.
+        """
         await self.connect()
         await self._chan.set_qos(prefetch_count=prefetch_count)
-        queue = await self._chan.declare_queue(queue_name, durable=True)
-        await queue.consume(lambda msg: self._handle(msg, on_message))
-
-    async def _handle(self, msg: IncomingMessage, callback: Callable[[dict], Awaitable[None]]):
-        # Mesajı process() bloğu içinde ack/nack yönetimi ile ele al
-        async with msg.process(ignore_processed=True):
-            payload = json.loads(msg.body.decode("utf-8"))
-            await callback(payload)
\ No newline at end of file
+        queue = await self._chan.declare_queue(queue_name, durable=True, arguments=QUEUE_ARGUMENTS.get(queue_name))
+        sub = _Subscription(
+            queue_name=queue_name,
+            callback=on_message,
+            on_give_up=on_give_up,
+            max_retries=max_retries,
+            semaphore=asyncio.Semaphore(concurrency or prefetch_count),
+        )
+        tag = await queue.consume(lambda msg: self._dispatch(msg, sub))
+        self._consumers.append((queue, tag))
+        logger.info(
+            "Consuming %s (prefetch=%d, concurrency=%d, max_retries=%d)",
+            queue_name, prefetch_count, concurrency or prefetch_count, max_retries
+        )
+
+    async def _dispatch(self, msg: IncomingMessage, sub: "_Subscription"):
+        task = asyncio.create_task(self._handle(msg, sub))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _handle(self, msg: IncomingMessage, sub: "_Subscription"):
+        headers = msg.headers or {}
+        async with sub.semaphore:
+            with span(
+                f"process {sub.queue_name}", headers=headers, kind="consumer",
+                queue=sub.queue_name, attempt=int(headers.get(RETRY_COUNT_HEADER, 0))
+            ):
+                payload = None
+                outcome = "ack"
+                start = time.perf_counter()
+                started_at = now_ms()
+                try:
+                    payload = self.codec.decode(msg.body, msg.content_type, msg.content_encoding)
+                    if isinstance(payload, dict):
+                        set_attributes(job_id=payload.get("job_id"), index=payload.get("index"))
+                    await sub.callback(payload)
+                except Exception as exc:
+                    mark_error(f"{type(exc).__name__}: {exc}")
+                    try:
+                        outcome = await self._retry_or_dead_letter(msg, sub, payload, exc)
+                    except Exception:
+                        logger.exception("Could not reroute failed message from %s; requeueing", sub.queue_name)
+                        await msg.nack(requeue=True)
+                        outcome = "requeue"
+                finally:
+                    STAGE_SECONDS.labels(stage=sub.queue_name, outcome=outcome).observe(time.perf_counter() - start)
+                    MESSAGES_TOTAL.labels(stage=sub.queue_name, outcome=outcome).inc()
+                    set_attributes(outcome=outcome)
+                if outcome != "requeue":
+                    await msg.ack()
+                await self._record_timing(
+                    sub.queue_name, payload, headers, started_at, (time.perf_counter() - start) * 1000, outcome
+                )
+
+    async def _record_timing(
+        self, stage: str, payload: Optional[dict], headers: dict, started_at: int, processing_ms: float, outcome: str
+    ):
+        if self.job_store is None or not isinstance(payload, dict) or not payload.get("job_id"):
+            return
+        published_at = headers.get(PUBLISHED_AT_HEADER)
+        try:
+            await self.job_store.record_timing(
+                payload["job_id"], stage, "process",
+                index=payload.get("index"), ts=started_at, outcome=outcome,
+                wait_ms=max(0, started_at - int(published_at)) if published_at else None,
+                processing_ms=processing_ms,
+            )
+        except Exception as e:
+            logger.warning("Could not record timing for %s: %s", stage, e)
+
+    async def _retry_or_dead_letter(self, msg: IncomingMessage, sub: "_Subscription", payload: Optional[dict], exc: Exception) -> str:
+        headers = dict(msg.headers or {})
+        attempt = int(headers.get(RETRY_COUNT_HEADER, 0))
+        poison = payload is None or isinstance(exc, PoisonMessage)
+        give_up = poison or attempt >= sub.max_retries
+        headers[LAST_ERROR_HEADER] = f"{type(exc).__name__}: {exc}"[:500]
+
+        if not give_up:
+            delay_ms = retry_delay_ms(attempt)
+            headers[RETRY_COUNT_HEADER] = attempt + 1
+            # Queue wait on the retry excludes the backoff itself
+            headers[PUBLISHED_AT_HEADER] = now_ms() + delay_ms
+            target, arguments = _retry_queue(sub.queue_name, delay_ms)
+            logger.warning(
+                "Handler for %s failed (attempt %d/%d), retrying in %dms: %s",
+                sub.queue_name, attempt + 1, sub.max_retries, delay_ms, exc
+            )
+        else:
+            target, arguments = dead_letter_queue(sub.queue_name), None
+            logger.error(
+                "Giving up on message from %s after %d attempt(s), moved to %s: %s",
+                sub.queue_name, attempt + 1, target, exc
+            )
+
+        await self._publisher.republish(
+            target,
+            Message(
+                body=msg.body,
+                delivery_mode=DeliveryMode.PERSISTENT,
+                content_type=msg.content_type,
+                content_encoding=msg.content_encoding,
+                priority=msg.priority,
+                headers=headers
+            ),
+            arguments
+        )
+
+        if give_up and sub.on_give_up and payload is not None:
+            try:
+                await sub.on_give_up(payload)
+            except Exception:
+                logger.exception("on_give_up hook failed for %s", sub.queue_name)
+        return "dead" if give_up else "retry"
+
+    async def close(self, timeout: float = 30.0):
+        """Stop taking new deliveries, let in-flight handlers finish, then disconnect."""
+        for queue, tag in self._consumers:
+            try:
+                await queue.cancel(tag)
+            except Exception:
+                logger.warning("Failed to cancel consumer %s", tag)
+        self._consumers.clear()
+
+        if self._inflight:
+            logger.info("Draining %d in-flight message(s)...", len(self._inflight))
+            _, pending = await asyncio.wait(set(self._inflight), timeout=timeout)
+            if pending:
+                # Unacked messages go back to the queue once the connection closes
+                logger.warning("%d handler(s) still running after %.0fs; they will be redelivered", len(pending), timeout)
+
+        await self._publisher.close()
+        if self._conn:
+            await self._conn.close()
+            self._conn = None
+
+    async def run_until_stopped(self):
+        """Block until SIGTERM/SIGINT, then shut down gracefully."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+        await self.close()
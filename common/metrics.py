@@ -0,0 +1,112 @@
+import asyncio
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Tuple
+
+try:
+    import prometheus_client as prom
+except ImportError:  # metrics become no-ops
+    prom = None
+
+logger = logging.getLogger("common.metrics")
+
+# Upstream APIs and whole stages can take minutes (Oxylabs, Winston)
+SLOW_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args, **kwargs):
+        pass
+
+    def inc(self, *args, **kwargs):
+        pass
+
+
+def _histogram(name: str, doc: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+    if prom is None:
+        return _NoopMetric()
+    return prom.Histogram(name, doc, labels, buckets=buckets)
+
+
+def _counter(name: str, doc: str, labels: Tuple[str, ...]):
+    if prom is None:
+        return _NoopMetric()
+    return prom.Counter(name, doc, labels)
+
+
+STAGE_SECONDS = _histogram(
+    "acarelia_stage_seconds", "Time spent handling one message, per input queue",
+    ("stage", "outcome"), SLOW_BUCKETS
+)
+MESSAGES_TOTAL = _counter(
+    "acarelia_messages_total", "Messages handled per input queue (ack, retry, dead)",
+    ("stage", "outcome")
+)
+UPSTREAM_SECONDS = _histogram(
+    "acarelia_upstream_seconds", "External API call latency (crossref, unpaywall, oxylabs, writer, winston)",
+    ("upstream", "outcome"), SLOW_BUCKETS
+)
+PDF_PARSE_SECONDS = _histogram(
+    "acarelia_pdf_parse_seconds", "PDF text extraction time",
+    ("outcome",), SLOW_BUCKETS
+)
+REDIS_SECONDS = _histogram(
+    "acarelia_redis_seconds", "JobStore operation latency",
+    ("op", "outcome"), FAST_BUCKETS
+)
+PROXY_OUTCOMES = _counter(
+    "acarelia_proxy_outcomes_total", "Scrapes per proxy pool endpoint (geo, port) by outcome (ok, failed, burned)",
+    ("pool", "endpoint", "outcome")
+)
+RABBIT_SECONDS = _histogram(
+    "acarelia_rabbitmq_seconds", "RabbitMQ publish latency (confirmed)",
+    ("op", "queue", "outcome"), FAST_BUCKETS
+)
+
+
+@contextmanager
+def timed(metric, **labels):
+    """Observe the block's duration on `metric`, labelled outcome=ok|error|cancelled."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        metric.labels(outcome=outcome, **labels).observe(time.perf_counter() - start)
+
+
+def redis_op(fn):
+    """Time an async JobStore method under op=<method name>."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with timed(REDIS_SECONDS, op=fn.__name__):
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+def start_metrics_server(port: int):
+    """Serve /metrics from a background thread (workers have no HTTP server of their own)."""
+    if prom is None or not port:
+        logger.info("Metrics endpoint disabled")
+        return
+    prom.start_http_server(port)
+    logger.info("Serving Prometheus metrics on :%d/metrics", port)
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, for mounting in a web app."""
+    if prom is None:
+        return b"", "text/plain; charset=utf-8"
+    return prom.generate_latest(), prom.CONTENT_TYPE_LATEST
@@ -1,9 +1,18 @@
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class ScrapeRequest(BaseModel):
     job_id: str
     author: str
+    lane: str = "interactive"
+    tenant: str = "anonymous"
+    enqueued_at: Optional[int] = None
+
+class BatchScanRequest(BaseModel):
+    authors: List[str]
+
+class BatchJobResponse(BaseModel):
+    job_ids: List[str]
 
 class JobResponse(BaseModel):
     job_id: str
@@ -23,3 +32,20 @@ class PlagiarismCheckStatusResponse(BaseModel):
 class JobDataResponse(BaseModel):
     job_id: str
     job_data: Dict[str, Any]
+
+class LaneStatsResponse(BaseModel):
+    broker_depth: int
+    lanes: Dict[str, Dict[str, Any]]
+
+class TimelineResponse(BaseModel):
+    job_id: str
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
+    total_ms: Optional[int] = None
+    queue_wait_ms: int = 0
+    processing_ms: int = 0
+    stages: Dict[str, Dict[str, Any]]
+    events: List[Dict[str, Any]]
+
+class TimingStatsResponse(BaseModel):
+    series: Dict[str, Dict[str, int]]
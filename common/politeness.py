@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger("common.politeness")
+
+# Seconds between two requests to one domain from one identity; "*" is the
+# default. Override with POLITENESS_SPACING="scholar.google.com=3,*=1".
+DEFAULT_SPACING = "scholar.google.com=2,*=1"
+
+# Reserve the next slot for a (domain, identity) and push the one after it
+# out by the spacing. Callers reserve without holding anything, so N callers
+# get N evenly spaced slots. Returns the milliseconds until this caller's slot.
+_RESERVE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local next_at = tonumber(redis.call('GET', KEYS[1]) or '0')
+local slot = math.max(now, next_at)
+local after = slot + tonumber(ARGV[1])
+redis.call('SET', KEYS[1], after, 'PX', math.ceil(after - now) + 1000)
+return slot - now
+"""
+
+# Push the next slot out to now + ARGV[1] ms, never pull it in.
+_BACK_OFF_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+if until_ms > tonumber(redis.call('GET', KEYS[1]) or '0') then
+    redis.call('SET', KEYS[1], until_ms, 'PX', tonumber(ARGV[1]) + 1000)
+end
+return 0
+"""
+
+
+def parse_spacing(spec: str) -> Dict[str, float]:
+    """"scholar.google.com=2,*=1" → {"scholar.google.com": 2.0, "*": 1.0}"""
+    spacing = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        domain, _, seconds = part.partition("=")
+        spacing[domain.strip().lower()] = float(seconds)
+    return spacing
+
+
+def domain_of(target: str) -> str:
+    """Host of a URL, or `target` itself when it already is one."""
+    return (urlparse(target).hostname or target).lower() if "://" in target else target.lower()
+
+
+class Politeness:
+    """
+    Per-target request spacing for scrapers. Requests to the same domain
+    through the same identity (a proxy geo or port, or "direct") are at
+    least `spacing` seconds apart, stretched by up to `jitter` of it at
+    random; requests to other domains or through other identities don't
+    wait on each other. Slots live in Redis so every replica keeps the same
+    distance; without Redis (or when it fails) they are kept per process.
+
+    `back_off` keeps an identity off a domain for a while (after a CAPTCHA
+    or an error) without holding up the caller, which can retry elsewhere.
+    """
+
+    def __init__(self, url: Optional[str] = None, spacing: Optional[Dict[str, float]] = None, jitter: float = 0.5):
+        self._url = url
+        self._redis: Optional[aioredis.Redis] = None
+        self.spacing = spacing if spacing is not None else parse_spacing(DEFAULT_SPACING)
+        self.jitter = jitter
+        # Fallback slots: key → monotonic time of the next free slot
+        self._local: Dict[str, float] = {}
+
+    async def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(self._url, encoding="utf-8", decode_responses=True)
+        return self._redis
+
+    def spacing_for(self, domain: str) -> float:
+        # "sub.example.org" falls back to "example.org", then to "*"
+        parts = domain.split(".")
+        for i in range(len(parts) - 1):
+            seconds = self.spacing.get(".".join(parts[i:]))
+            if seconds is not None:
+                return seconds
+        return self.spacing.get("*", 0.0)
+
+    async def wait(self, target: str, identity: str = "direct") -> float:
+        """Sleep until `identity` may send the next request to `target` (URL or domain); returns the wait."""
+        domain = domain_of(target)
+        spacing = self.spacing_for(domain)
+        if spacing <= 0:
+            return 0.0
+        key = f"polite:{domain}:{identity}"
+        gap_ms = int(spacing * random.uniform(1, 1 + self.jitter) * 1000)
+        wait_ms = None
+        if self._url:
+            try:
+                wait_ms = int(await (await self._client()).eval(_RESERVE_LUA, 1, key, gap_ms))
+            except Exception as e:
+                logger.warning("Politeness slots unavailable, spacing per process: %s", e)
+        if wait_ms is None:
+            now = time.monotonic()
+            slot = max(now, self._local.get(key, 0.0))
+            self._local[key] = slot + gap_ms / 1000
+            wait_ms = int((slot - now) * 1000)
+        if wait_ms > 0:
+            logger.debug("Politeness %s via %s: waiting %.2fs", domain, identity, wait_ms / 1000)
+            await asyncio.sleep(wait_ms / 1000)
+        return wait_ms / 1000
+
+    async def back_off(self, target: str, identity: str, seconds: float):
+        """No request to `target` through `identity` for `seconds` (from any replica)."""
+        key = f"polite:{domain_of(target)}:{identity}"
+        if self._url:
+            try:
+                await (await self._client()).eval(_BACK_OFF_LUA, 1, key, int(seconds * 1000))
+                return
+            except Exception as e:
+                logger.warning("Politeness back-off not shared: %s", e)
+        self._local[key] = max(self._local.get(key, 0.0), time.monotonic() + seconds)
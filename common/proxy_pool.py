@@ -0,0 +1,147 @@
+import logging
+import random
+from typing import Dict, Iterable, List, Optional
+
+import redis.asyncio as aioredis
+
+from common.metrics import PROXY_OUTCOMES, redis_op
+
+logger = logging.getLogger("common.proxy_pool")
+
+OK = "ok"            # got the page
+FAILED = "failed"    # error or empty answer, not necessarily the endpoint's fault
+BURNED = "burned"    # CAPTCHA / block page: the endpoint is cooled down
+
+# One hash per endpoint, updated atomically on the Redis clock. Counts decay
+# with a half-life so an endpoint that was burned an hour ago can win again;
+# every CAPTCHA in a row doubles the cooldown, a success resets it.
+# Returns the cooldown in ms (0 if none was started).
+_RECORD_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local v = redis.call('HMGET', KEYS[1], 's', 'f', 'ts', 'burns')
+local ts = tonumber(v[3]) or now
+local decay = math.pow(0.5, math.max(0, now - ts) / tonumber(ARGV[2]))
+local s = (tonumber(v[1]) or 0) * decay
+local f = (tonumber(v[2]) or 0) * decay
+local burns = tonumber(v[4]) or 0
+local cooldown = 0
+if ARGV[1] == 'ok' then
+    s = s + 1
+    burns = 0
+else
+    f = f + 1
+    if ARGV[1] == 'burned' then
+        burns = burns + 1
+        cooldown = math.min(tonumber(ARGV[3]) * math.pow(2, burns - 1), tonumber(ARGV[4]))
+        redis.call('HSET', KEYS[1], 'until', now + cooldown)
+    end
+end
+redis.call('HSET', KEYS[1], 's', tostring(s), 'f', tostring(f), 'ts', now, 'burns', burns)
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return cooldown
+"""
+
+
+class ProxyPool:
+    """
+    Success-rate based rotation over interchangeable proxy endpoints (Oxylabs
+    geo locations, residential proxy ports), shared by every replica through
+    Redis and kept across restarts.
+
+    `pick` draws each endpoint's success rate from Beta(successes + 1,
+    failures + 1) over exponentially decayed counts and takes the best draw
+    (Thompson sampling): endpoints that currently get through are used most,
+    the others are still probed now and then. Endpoints cooling down after a
+    CAPTCHA are skipped until every endpoint is. Redis trouble never fails a
+    scrape; `pick` then falls back to a random endpoint.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        endpoints: Iterable[str],
+        half_life_s: int = 1800,
+        cooldown_s: int = 120,
+        max_cooldown_s: int = 3600,
+        ttl_s: int = 7 * 24 * 3600,
+    ):
+        self._url = url
+        self._redis: Optional[aioredis.Redis] = None
+        self.name = name
+        self.endpoints: List[str] = [str(e) for e in endpoints]
+        if not self.endpoints:
+            raise ValueError(f"Proxy pool {name} has no endpoints")
+        self.half_life_s = half_life_s
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.ttl_s = ttl_s
+
+    async def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(self._url, encoding="utf-8", decode_responses=True)
+        return self._redis
+
+    def _key(self, endpoint: str) -> str:
+        return f"proxypool:{self.name}:{endpoint}"
+
+    @redis_op
+    async def snapshot(self) -> Dict[str, dict]:
+        """endpoint → {"successes", "failures" (decayed to now), "cooldown_s"}"""
+        async with (await self._client()).pipeline(transaction=False) as pipe:
+            pipe.time()
+            for endpoint in self.endpoints:
+                pipe.hmget(self._key(endpoint), "s", "f", "ts", "until")
+            raw = await pipe.execute()
+        seconds, micros = raw[0]
+        now = int(seconds) * 1000 + int(micros) // 1000
+        out = {}
+        for endpoint, (s, f, ts, until) in zip(self.endpoints, raw[1:]):
+            decay = 0.5 ** (max(0, now - float(ts)) / (self.half_life_s * 1000)) if ts else 1.0
+            out[endpoint] = {
+                "successes": float(s or 0) * decay,
+                "failures": float(f or 0) * decay,
+                "cooldown_s": max(0, float(until or 0) - now) / 1000,
+            }
+        return out
+
+    async def pick(self, exclude: Iterable[str] = ()) -> str:
+        """An endpoint for the next request; `exclude` holds the ones this request already tried."""
+        excluded = set(exclude)
+        candidates = [e for e in self.endpoints if e not in excluded] or self.endpoints
+        try:
+            stats = await self.snapshot()
+        except Exception as e:
+            logger.warning("Proxy pool %s state unavailable, picking at random: %s", self.name, e)
+            return random.choice(candidates)
+
+        ready = [e for e in candidates if not stats[e]["cooldown_s"]]
+        if not ready:
+            # Everything is cooling down: the one that comes back first
+            endpoint = min(candidates, key=lambda e: stats[e]["cooldown_s"])
+            logger.info("Proxy pool %s: all endpoints cooling down, using %s", self.name, endpoint)
+            return endpoint
+        return max(
+            ready,
+            key=lambda e: random.betavariate(stats[e]["successes"] + 1, stats[e]["failures"] + 1),
+        )
+
+    @redis_op
+    async def _record(self, endpoint: str, outcome: str) -> int:
+        return await (await self._client()).eval(
+            _RECORD_LUA, 1, self._key(endpoint),
+            outcome, self.half_life_s * 1000, self.cooldown_s * 1000,
+            self.max_cooldown_s * 1000, self.ttl_s,
+        )
+
+    async def record(self, endpoint: str, outcome: str):
+        """Feed back how a request through `endpoint` went (OK, FAILED or BURNED)."""
+        PROXY_OUTCOMES.labels(pool=self.name, endpoint=endpoint, outcome=outcome).inc()
+        try:
+            cooldown_ms = await self._record(str(endpoint), outcome)
+        except Exception as e:
+            logger.warning("Could not record proxy outcome %s for %s/%s: %s", outcome, self.name, endpoint, e)
+            return
+        if cooldown_ms:
+            logger.info("Proxy pool %s: %s burned, cooling down for %ds", self.name, endpoint, int(cooldown_ms) // 1000)
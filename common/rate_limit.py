@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import random
+import redis.asyncio as aioredis
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger("common.rate_limit")
+
+# Requests per period and burst per external provider. Override with
+# RATE_LIMITS="crossref=50/1:10,winston=2/1" (rate/period_seconds[:burst]).
+DEFAULT_LIMITS = {
+    "crossref":  "40/1:10",
+    "unpaywall": "10/1:5",
+    "oxylabs":   "5/1:2",
+    "writer":    "5/1:2",
+    "winston":   "2/1:1",
+}
+
+# GCRA: one "theoretical arrival time" per bucket, shared by every replica.
+# Uses the Redis clock so workers with skewed clocks still agree. Returns
+# the number of milliseconds to wait, 0 when the request may go now.
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local blocked_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked_until > now then
+    return blocked_until - now
+end
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then
+    tat = now
+end
+local allow_at = tat - tolerance
+if now < allow_at then
+    return math.ceil(allow_at - now)
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now) + 1000)
+return 0
+"""
+
+# Push the block deadline out, never pull it in.
+_BLOCK_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if until_ms > current then
+    redis.call('SET', KEYS[1], until_ms, 'PX', tonumber(ARGV[1]) + 1000)
+end
+return until_ms - now
+"""
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse "name=rate/period[:burst],..." into {name: (interval_ms, burst)}."""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        rate_period, _, burst = value.partition(":")
+        rate, _, period = rate_period.partition("/")
+        interval_ms = float(period or 1) * 1000 / float(rate)
+        limits[name.strip()] = (interval_ms, int(burst or 1))
+    return limits
+
+
+def retry_after_seconds(headers: Mapping[str, str], default: float) -> float:
+    """Read a Retry-After header (seconds or HTTP date), falling back to `default`."""
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    Distributed token bucket (GCRA) for external APIs. Every replica of
+    every service shares the same named buckets in Redis, so scaling out
+    workers raises throughput up to the provider quota and no further.
+    `acquire` waits for a slot instead of failing; `observe` turns a 429
+    into a shared pause for the whole bucket.
+    """
+
+    def __init__(self, url: str, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self._url = url
+        self._redis: Optional[aioredis.Redis] = None
+        if limits is None:
+            limits = parse_limits(",".join(f"{k}={v}" for k, v in DEFAULT_LIMITS.items()))
+            limits.update(parse_limits(os.getenv("RATE_LIMITS", "")))
+        self.limits = limits
+
+    async def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(self._url, encoding="utf-8", decode_responses=True)
+            logger.info("Connected to Redis for RateLimiter")
+        return self._redis
+
+    async def acquire(self, bucket: str, max_wait: Optional[float] = None):
+        """Wait until `bucket` has capacity. Unknown buckets are not limited."""
+        if bucket not in self.limits:
+            return
+        interval_ms, burst = self.limits[bucket]
+        tolerance_ms = interval_ms * (burst - 1)
+        r = await self._client()
+        waited = 0.0
+        while True:
+            wait_ms = await r.eval(
+                _GCRA_LUA, 2, f"ratelimit:{bucket}:tat", f"ratelimit:{bucket}:blocked",
+                interval_ms, tolerance_ms
+            )
+            if not wait_ms:
+                return
+            # Small jitter so waiting replicas don't all retry on the same tick
+            delay = int(wait_ms) / 1000 + random.uniform(0, interval_ms / 4000)
+            if max_wait is not None and waited + delay > max_wait:
+                raise TimeoutError(f"Rate limit for {bucket} not available within {max_wait}s")
+            logger.debug("Rate limit %s: waiting %.3fs", bucket, delay)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def block(self, bucket: str, seconds: float):
+        r = await self._client()
+        await r.eval(_BLOCK_LUA, 1, f"ratelimit:{bucket}:blocked", int(seconds * 1000))
+        logger.warning("Rate limit %s: upstream asked to back off, pausing all callers for %.1fs", bucket, seconds)
+
+    async def observe(self, bucket: str, status_code: int, headers: Mapping[str, str], default_backoff: float = 5.0):
+        """Feed a response back; 429/503 with Retry-After pause the bucket for every replica."""
+        if status_code == 429 or (status_code == 503 and ("retry-after" in headers or "Retry-After" in headers)):
+            await self.block(bucket, retry_after_seconds(headers, default_backoff))
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from common.metrics import UPSTREAM_SECONDS
+
+logger = logging.getLogger("common.resilience")
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """The upstream is failing; the call was rejected without being sent."""
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker over a sliding time window. Opens when at least
+    `min_calls` calls were seen in the window and `failure_ratio` of them
+    failed, rejects calls for `reset_timeout` seconds, then lets a single
+    probe through (half-open): success closes it, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_ratio: float = 0.5,
+        min_calls: int = 10,
+        window: float = 30.0,
+        reset_timeout: float = 15.0,
+    ):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+
+    def before_call(self):
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                raise CircuitOpen(f"{self.name} circuit is open")
+            self.state = HALF_OPEN
+            logger.info("Circuit %s half-open, sending a probe", self.name)
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpen(f"{self.name} circuit is half-open, probe in flight")
+            self._probe_in_flight = True
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+                logger.info("Circuit %s closed again", self.name)
+            else:
+                self._open(now)
+            return
+
+        self._outcomes.append((now, ok))
+        self._trim(now)
+        failures = sum(1 for _, success in self._outcomes if not success)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._open(now)
+
+    def release(self):
+        """The call was abandoned without an outcome; let another probe through."""
+        self._probe_in_flight = False
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        logger.warning("Circuit %s opened, failing fast for %.0fs", self.name, self.reset_timeout)
+
+
+class LatencyTracker:
+    """Recent call durations, used to pick the hedging delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _status(result) -> Optional[int]:
+    status = getattr(result, "status_code", None) or getattr(result, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def _retryable(result) -> bool:
+    """A 429 or 5xx response: the call went through but another attempt may still do better."""
+    status = _status(result)
+    return status is not None and (status == 429 or status >= 500)
+
+
+async def hedged(fn: Callable[[], Awaitable[T]], delay: float) -> T:
+    """
+    Start `fn`; if it hasn't finished after `delay` seconds start a second
+    attempt and return whichever succeeds first. An attempt that raised or
+    returned a 429/5xx response only wins if the other one fails too (the
+    last such response is returned, else the error raised). Only for
+    idempotent calls.
+    """
+    first = asyncio.create_task(fn())
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done and first.exception() is None and not _retryable(first.result()):
+        return first.result()
+
+    pending = {first, asyncio.create_task(fn())} - done
+    fallback: Optional[asyncio.Task] = first if done else None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and not _retryable(task.result()):
+                    return task.result()
+                # Prefer a response over an exception as the fallback
+                if fallback is None or fallback.exception() is not None or task.exception() is None:
+                    fallback = task
+        return fallback.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class Upstream:
+    """
+    Breaker + latency tracking (+ optional hedging) around calls to one
+    external service. Exceptions and responses with a 5xx status count as
+    failures; CircuitOpen is raised while the breaker is open.
+
+    `acquire` (e.g. a rate limiter token) is awaited before every attempt,
+    including the hedged one, and is not counted in the latency.
+    """
+
+    def __init__(self, name: str, hedge: bool = False, hedge_percentile: float = 0.95, **breaker_kwargs):
+        self.name = name
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.breaker = CircuitBreaker(name, **breaker_kwargs)
+        self.latency = LatencyTracker()
+
+    async def _timed(self, fn: Callable[[], Awaitable[T]], acquire: Optional[Callable[[], Awaitable]]) -> T:
+        if acquire is not None:
+            await acquire()
+        start = time.monotonic()
+        result = await fn()
+        self.latency.add(time.monotonic() - start)
+        return result
+
+    async def call(self, fn: Callable[[], Awaitable[T]], acquire: Optional[Callable[[], Awaitable]] = None) -> T:
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            UPSTREAM_SECONDS.labels(upstream=self.name, outcome="rejected").observe(0)
+            raise
+        start = time.monotonic()
+        try:
+            delay = self.latency.percentile(self.hedge_percentile) if self.hedge else None
+            if delay is not None:
+                result = await hedged(lambda: self._timed(fn, acquire), delay)
+            else:
+                result = await self._timed(fn, acquire)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record(False)
+            UPSTREAM_SECONDS.labels(upstream=self.name, outcome="error").observe(time.monotonic() - start)
+            raise
+        status = _status(result)
+        ok = not (status is not None and status >= 500)
+        self.breaker.record(ok)
+        UPSTREAM_SECONDS.labels(upstream=self.name, outcome="ok" if ok else "error").observe(time.monotonic() - start)
+        return result
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def upstream(name: str) -> Upstream:
+    """
+    Process-wide Upstream per name. Hedging is opt-in per upstream with
+    HEDGED_UPSTREAMS="crossref,unpaywall"; use it only for idempotent GETs.
+    """
+    if name not in _upstreams:
+        hedged_names = {n.strip() for n in os.getenv("HEDGED_UPSTREAMS", "").split(",") if n.strip()}
+        _upstreams[name] = Upstream(name, hedge=name in hedged_names)
+    return _upstreams[name]
@@ -0,0 +1,121 @@
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # tracing becomes a no-op
+    trace = None
+
+logger = logging.getLogger("common.tracing")
+
+_configured = False
+
+
+def setup_tracing(service_name: str):
+    """
+    Export spans for this process. OTEL_EXPORTER_OTLP_ENDPOINT sends them to
+    a collector (e.g. http://otel-collector:4318); TRACE_FILE appends one
+    JSON span per line for offline runs. With neither set nothing is exported,
+    but trace context is still passed along in message headers.
+    """
+    global _configured
+    if trace is None or _configured:
+        return
+    _configured = True
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": os.getenv("OTEL_SERVICE_NAME", service_name)
+    }))
+
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            logger.info("Exporting traces to %s", os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"))
+        except ImportError:
+            logger.warning("OTEL_EXPORTER_OTLP_ENDPOINT set but the OTLP exporter is not installed")
+
+    trace_file = os.getenv("TRACE_FILE")
+    if trace_file:
+        out = open(trace_file, "a", buffering=1)
+        provider.add_span_processor(BatchSpanProcessor(
+            ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+        ))
+        logger.info("Writing traces to %s", trace_file)
+
+    trace.set_tracer_provider(provider)
+    _instrument_http_clients()
+
+
+def _instrument_http_clients():
+    # One client span per outgoing HTTP request (Crossref, Unpaywall, Oxylabs, Writer, Winston, publishers)
+    try:
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+        HTTPXClientInstrumentor().instrument()
+    except ImportError:
+        pass
+    try:
+        from opentelemetry.instrumentation.aiohttp_client import AioHttpClientInstrumentor
+        AioHttpClientInstrumentor().instrument()
+    except ImportError:
+        pass
+
+
+def inject(headers: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the current trace context (traceparent/tracestate) to message headers."""
+    if trace is not None:
+        propagate.inject(headers)
+    return headers
+
+
+@contextmanager
+def span(name: str, headers: Optional[Dict[str, Any]] = None, kind: str = "internal", **attributes):
+    """
+    Run the block in a span. With `headers` the span continues the trace
+    that the publisher injected into the message.
+    """
+    if trace is None:
+        yield None
+        return
+
+    parent = None
+    if headers is not None:
+        parent = propagate.extract({
+            k: v.decode() if isinstance(v, bytes) else str(v) for k, v in headers.items()
+        })
+    token = otel_context.attach(parent) if parent is not None else None
+    try:
+        tracer = trace.get_tracer("acarelia")
+        with tracer.start_as_current_span(
+            name, kind=getattr(SpanKind, kind.upper()), record_exception=True, set_status_on_exception=True
+        ) as current:
+            for key, value in attributes.items():
+                if value is not None:
+                    current.set_attribute(f"acarelia.{key}", value)
+            yield current
+    finally:
+        if token is not None:
+            otel_context.detach(token)
+
+
+def set_attributes(**attributes):
+    """Tag the current span, e.g. with the job id once the payload is decoded."""
+    if trace is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(f"acarelia.{key}", value)
+
+
+def mark_error(description: str):
+    if trace is None:
+        return
+    trace.get_current_span().set_status(Status(StatusCode.ERROR, description))